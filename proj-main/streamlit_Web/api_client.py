@@ -0,0 +1,223 @@
+# ==============================================================================
+# api_client.py - 비동기 HTTP 클라이언트 모듈
+# ==============================================================================
+# 이 파일은 공공데이터포털 API 호출에 공통으로 사용하는 비동기 HTTP 클라이언트를
+# 제공합니다. 기존의 PowerShell + 임시 파일 방식은 요청마다 프로세스를 새로
+# 띄우고 디스크를 거쳐야 했으며, Linux 환경에서는 아예 동작하지 않았습니다.
+#
+# [주요 기능]
+# 1. **커넥션 풀 / keep-alive (`ApiClient`):** 하나의 `aiohttp.ClientSession`을
+#    여러 요청이 공유하여 TCP/TLS 연결을 재사용합니다.
+# 2. **동시성 제한:** `asyncio.Semaphore`로 동시에 진행되는 요청 수를 제한합니다.
+# 3. **호스트별 속도 제한 (`TokenBucket`):** 호스트마다 초당 요청 수를 제한하여
+#    API 서버에 과도한 부하를 주지 않도록 합니다.
+# 4. **메모리 내 파싱:** 응답 바이트를 파일로 저장하지 않고 바로 XML(또는 JSON)로
+#    파싱합니다.
+# 5. **스트리밍 파싱 (`ItemStreamParser`, `ApiClient.iter_items`):** 응답을 조각
+#    단위로 읽으면서 `<item>`이 닫히는 즉시 딕셔너리로 넘기고 처리한 요소는
+#    트리에서 제거합니다. 전체 응답 바이트, 디코딩한 문자열, 완성된 트리를 동시에
+#    메모리에 올리지 않으므로 큰 페이지에서도 메모리 사용량이 일정합니다.
+# 6. **동기 코드 연동 (`run_with_client`):** 기존 동기 함수에서 클라이언트를 열고
+#    코루틴을 실행할 수 있도록 돕습니다.
+#
+# [사용 예시]
+#     async with ApiClient() as client:
+#         root = await client.fetch_xml(url)
+#         page = await client.fetch_page(url)  # page.result_code, page.total_count, page.items
+# ==============================================================================
+
+import asyncio
+import json
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+
+import aiohttp
+from yarl import URL
+
+# --- 기본 설정값 ---
+DEFAULT_CONCURRENCY = 8       # 동시에 진행할 최대 요청 수
+DEFAULT_RATE_PER_HOST = 10    # 호스트별 초당 최대 요청 수
+DEFAULT_TIMEOUT = 30          # 요청 하나당 전체 타임아웃(초)
+STREAM_CHUNK_SIZE = 64 * 1024 # 스트리밍 파싱 시 한 번에 읽을 바이트 수
+
+# 응답 헤더/본문에서 값을 읽어 둘 태그 (`<item>` 바깥에 있을 때만)
+HEADER_TAGS = {'resultCode': 'result_code', 'resultMsg': 'result_msg', 'totalCount': 'total_count'}
+
+class TokenBucket:
+    """
+    키(호스트 등)별로 초당 요청 수를 제한하는 토큰 버킷입니다.
+
+    Args:
+        rate (float): 초당 채워지는 토큰 수
+        burst (int, optional): 한 번에 사용할 수 있는 최대 토큰 수 (기본값: rate)
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self._buckets = {}  # key -> (남은 토큰 수, 마지막 갱신 시각)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, key=None):
+        """토큰을 하나 사용할 수 있을 때까지 기다립니다."""
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(key, (self.capacity, now))
+                tokens = min(self.capacity, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[key] = (tokens - 1, now)
+                    return
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            await asyncio.sleep(wait)
+
+class ItemStreamParser:
+    """
+    공공데이터포털 XML 응답을 조각 단위로 파싱하는 풀(pull) 파서입니다.
+    `feed()`에 바이트 조각을 넣을 때마다 그 사이에 닫힌 `<item>`들을
+    `{태그: 텍스트}` 딕셔너리로 반환하고, 처리한 요소는 트리에서 제거합니다.
+    `resultCode`/`resultMsg`/`totalCount`는 읽히는 즉시 속성에 기록됩니다.
+    """
+    def __init__(self):
+        self.result_code = None
+        self.result_msg = None
+        self.total_count = None
+        self.bytes_read = 0
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._stack = []  # 현재 열려 있는 요소들 (완료된 item을 부모에서 떼어내기 위함)
+
+    def feed(self, data):
+        """바이트 조각을 파싱하고 이번 조각에서 완성된 item 딕셔너리 목록을 반환합니다."""
+        self.bytes_read += len(data)
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self):
+        """입력이 끝났음을 알리고 남은 item을 반환합니다. XML이 잘려 있으면 `ET.ParseError`가 발생합니다."""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        items = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                self._stack.append(elem)
+                continue
+
+            self._stack.pop()
+            in_item = any(open_elem.tag == 'item' for open_elem in self._stack)
+            if elem.tag == 'item' and not in_item:
+                items.append({child.tag: child.text for child in elem})
+                elem.clear()
+                if self._stack:
+                    self._stack[-1].remove(elem)
+            elif elem.tag in HEADER_TAGS and not in_item:
+                value = elem.text
+                if elem.tag == 'totalCount':
+                    value = int(value or 0)
+                setattr(self, HEADER_TAGS[elem.tag], value)
+        return items
+
+class ApiPage:
+    """스트리밍 파싱으로 읽은 API 응답 한 페이지입니다."""
+    def __init__(self, result_code, result_msg, total_count, items):
+        self.result_code = result_code
+        self.result_msg = result_msg
+        self.total_count = total_count
+        self.items = items
+
+class ApiClient:
+    """
+    커넥션 풀과 keep-alive를 공유하는 비동기 HTTP 클라이언트입니다.
+    `async with` 블록 안에서만 사용할 수 있습니다.
+
+    Args:
+        concurrency (int): 동시에 진행할 최대 요청 수
+        rate_per_host (float): 호스트별 초당 최대 요청 수
+        timeout (float): 요청 하나당 전체 타임아웃(초)
+    """
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST, timeout=DEFAULT_TIMEOUT):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._limiter = TokenBucket(rate_per_host)
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+
+    async def fetch_bytes(self, url, headers=None):
+        """URL의 응답 본문을 바이트로 반환합니다. HTTP 오류 시 예외가 발생합니다."""
+        host = urlsplit(url).hostname
+        async with self._semaphore:
+            await self._limiter.acquire(host)
+            # serviceKey 등은 이미 인코딩되어 있으므로 다시 인코딩하지 않습니다.
+            async with self._session.get(URL(url, encoded=True), headers=headers) as response:
+                response.raise_for_status()
+                return await response.read()
+
+    async def fetch_json(self, url, headers=None):
+        """URL의 JSON 응답을 파싱하여 반환합니다."""
+        return json.loads(await self.fetch_bytes(url, headers=headers))
+
+    async def fetch_xml(self, url):
+        """URL의 XML 응답을 메모리에서 바로 파싱하여 루트 Element로 반환합니다."""
+        xml_data = await self.fetch_bytes(url)
+        if not xml_data:
+            return None
+        return ET.fromstring(xml_data)
+
+    async def iter_items(self, url, parser=None):
+        """
+        응답을 조각 단위로 읽으면서 `<item>`이 닫히는 즉시 딕셔너리로 내보내는
+        비동기 제너레이터입니다. 헤더 값(`resultCode` 등)은 넘겨준 `parser`에서 확인합니다.
+        """
+        parser = parser or ItemStreamParser()
+        host = urlsplit(url).hostname
+        async with self._semaphore:
+            await self._limiter.acquire(host)
+            async with self._session.get(URL(url, encoded=True)) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    for item in parser.feed(chunk):
+                        yield item
+                if parser.bytes_read:
+                    for item in parser.close():
+                        yield item
+
+    async def fetch_page(self, url):
+        """
+        응답을 스트리밍 파싱하여 `ApiPage`로 반환합니다. 응답이 비어 있으면 None을 반환합니다.
+        전체 응답을 메모리에 모으거나 트리를 만들지 않습니다.
+        """
+        parser = ItemStreamParser()
+        items = [item async for item in self.iter_items(url, parser)]
+        if not parser.bytes_read:
+            return None
+        return ApiPage(parser.result_code, parser.result_msg, parser.total_count, items)
+
+def run_with_client(func, *args, client_options=None, **kwargs):
+    """
+    동기 코드에서 `ApiClient(**client_options)`를 열고 `func(client, *args, **kwargs)`
+    코루틴을 실행한 뒤 그 결과를 반환합니다.
+    """
+    async def _runner():
+        async with ApiClient(**(client_options or {})) as client:
+            return await func(client, *args, **kwargs)
+    return asyncio.run(_runner())
@@ -27,7 +27,8 @@ from datetime import datetime, timedelta
 from tabs import map_view, stats_view, detail_view, favorites_view
 
 # 데이터 로딩 및 관리를 위한 함수들을 임포트합니다.
-from data_manager import init_db, load_data, get_sido_list, get_sigungu_list, get_kind_list
+from data_manager import init_db, get_filter_engine, get_filter_result_cache, get_sido_list, get_sigungu_list, get_kind_list
+from filter_engine import normalize_filter_key
 
 import streamlit.web.server.component_request_handler as crh
 
@@ -158,8 +159,8 @@ with st.sidebar.expander("🔍 필터", expanded=True):
     
     st.markdown("### 🐶 동물 정보")
     search_query = st.text_input(
-        "이름으로 검색",
-        placeholder="예: 초코, 하양이",
+        "이름·품종·특징으로 검색",
+        placeholder="예: 초코, 믹스견, 사람을 좋아함",
         label_visibility="collapsed"
     )
 
@@ -203,71 +204,26 @@ with st.sidebar.expander("🔍 필터", expanded=True):
 
 # --- 3. 데이터 필터링 및 정렬 로직 ---
 def get_filtered_data(start_date, end_date, sido, sigungu, species, query, sort_by):
-    animals = load_data("animals")
-    shelters = load_data("shelters")
-
-    if animals.empty or shelters.empty:
-        return pd.DataFrame(), pd.DataFrame(), 0, 0, 0, 0
-
-    # ⭐ 중요: 품종 코드(숫자)를 한글 이름으로 변환하는 로직을
-    # `data_manager.py`의 `load_data` 함수로 옮겼기 때문에
-    # 아래 코드는 제거합니다.
-    # kind_list = get_kind_list()
-    # kind_map = {kind['code']: kind['name'] for kind in kind_list}
-    # animals['species'] = animals['species'].map(kind_map).fillna(animals['species'])
-
-    # 1. 날짜 필터링 (공고일 기준)
-    animals['notice_date'] = pd.to_datetime(animals['notice_date'])
-    mask = (animals['notice_date'].dt.date >= start_date) & (animals['notice_date'].dt.date <= end_date)
-    filtered_animals = animals[mask]
-
-    # 2. 텍스트 검색 필터링 (동물 이름)
-    if query:
-        filtered_animals = filtered_animals[filtered_animals['animal_name'].str.contains(query, case=False, na=False)]
-
-    # 3. 축종 필터링
-    if species:
-        filtered_animals = filtered_animals[filtered_animals['species'].isin(species)]
-
-    # 필터링된 동물 목록을 기반으로, 해당 동물들이 있는 보호소 목록을 구합니다.
-    shelter_names_with_animals = filtered_animals['shelter_name'].unique()
-    filtered_shelters = shelters[shelters['shelter_name'].isin(shelter_names_with_animals)]
-
-    # 4. 지역 필터링 (보호소 주소 기준)
-    if sido != "전체":
-        filtered_shelters = filtered_shelters[filtered_shelters["careAddr"].str.startswith(sido, na=False)]
-    if sigungu != "전체":
-        full_region_name = f"{sido} {sigungu}"
-        filtered_shelters = filtered_shelters[filtered_shelters["careAddr"].str.startswith(full_region_name, na=False)]
-
-    # 최종적으로 필터링된 보호소에 소속된 동물들만 다시 추립니다.
-    final_animal_shelters = filtered_shelters['shelter_name'].unique()
-    final_animals = filtered_animals[filtered_animals['shelter_name'].isin(final_animal_shelters)]
-
-    # 5. 정렬 로직 적용
-    if not final_animals.empty:
-        if sort_by == "최신 공고일 순":
-            final_animals = final_animals.sort_values(by='notice_date', ascending=False)
-        elif sort_by == "오래된 공고일 순":
-            final_animals = final_animals.sort_values(by='notice_date', ascending=True)
-        elif sort_by in ["나이 어린 순", "나이 많은 순"]:
-            final_animals['year_of_birth'] = pd.to_numeric(
-                final_animals['age'].str.extract('(\d{4})')[0], 
-                errors='coerce'
-            )
-            ascending = (sort_by == "나이 어린 순")
-            final_animals = final_animals.sort_values(by='year_of_birth', ascending=ascending, na_position='last')
-            final_animals = final_animals.drop(columns=['year_of_birth'])
-
-    shelter_count = filtered_shelters['shelter_name'].nunique()
-    animal_count = len(final_animals)
-    long_term_count = int(filtered_shelters['long_term'].sum())
-    adopted_count = int(filtered_shelters['adopted'].sum())
-
-    return final_animals, filtered_shelters, shelter_count, animal_count, long_term_count, adopted_count
+    """
+    사이드바 조건으로 동물/보호소를 필터링하고 정렬합니다.
+    실제 조회는 데이터 버전마다 한 번 만들어 두는 `FilterEngine`이 미리 계산한
+    배열(공고일 일수, 축종 코드, 보호소 코드, 지역 마스크)로 처리합니다.
+    조건과 데이터 버전이 같으면 (탭 전환, 찜하기 등으로 인한 rerun) 결과 캐시에서
+    바로 가져옵니다. 반환된 DataFrame은 캐시와 공유되므로 수정하지 않아야 합니다.
+    """
+    engine = get_filter_engine()
+    if engine is None or engine.is_empty:
+        return pd.DataFrame(), pd.DataFrame(), 0, 0, 0, 0, None
+
+    key = normalize_filter_key(engine.data_key, start_date, end_date, sido, sigungu, species, query, sort_by,
+                               normalize_query=engine.normalize_query)
+    result = get_filter_result_cache().get_or_compute(
+        key, lambda: engine.query(start_date, end_date, sido, sigungu, species, query, sort_by)
+    )
+    return result.as_tuple()
 
 # 위에서 정의한 함수를 호출하여 필터링된 데이터를 가져옵니다.
-final_animals, filtered_shelters, shelter_count, animal_count, long_term_count, adopted_count = get_filtered_data(
+final_animals, filtered_shelters, shelter_count, animal_count, long_term_count, adopted_count, animal_mask = get_filtered_data(
     start_date, end_date, selected_sido_name, selected_sigungu_name, species_filter, search_query, sort_by_option
 )
 
@@ -300,6 +256,6 @@ if st.session_state.active_tab_idx == 0:
 elif st.session_state.active_tab_idx == 1:
     stats_view.show(filtered_shelters)
 elif st.session_state.active_tab_idx == 2:
-    detail_view.show(filtered_shelters)
+    detail_view.show(filtered_shelters, animal_mask, final_animals)
 elif st.session_state.active_tab_idx == 3:
     favorites_view.show()
\ No newline at end of file
@@ -0,0 +1,598 @@
+# ==============================================================================
+# benchmark.py - 성능 측정 스크립트
+# ==============================================================================
+# 이 스크립트는 데이터 수집/가공 단계의 주요 경로를 로컬에서 반복 측정하기 위한
+# 도구입니다. 외부 API나 DB 없이도 실행할 수 있도록, 필요한 경우 로컬 스텁
+# 서버와 합성 데이터를 사용합니다.
+#
+# [측정 항목]
+# - `fetch`: 로컬 스텁 API 서버를 띄우고, 기존의 "요청마다 새 연결 + 임시 파일"
+#   방식과 `api_client.ApiClient`(커넥션 풀 + 동시 요청) 방식의 처리 시간을
+#   비교합니다. Windows에서 PowerShell을 사용할 수 있으면 PowerShell 경로도
+#   함께 측정합니다. `ApiClient.fetch_page`(스트리밍 파싱) 경로와 각 경로의 최대
+#   메모리 사용량(tracemalloc 기준)도 함께 출력합니다.
+# - `load`: 합성 유기동물 데이터를 `db_loader.BULK_WRITERS`의 각 적재 방식으로
+#   `config.ini`의 DB에 적재하고 초당 처리 행 수를 비교합니다. 측정용 테이블
+#   (`bench_animals`)은 측정이 끝나면 삭제됩니다.
+# - `filter`: 합성 데이터에 대해 사이드바 필터 조합을 무작위로 만들어
+#   기존 `app.get_filtered_data` 방식(매번 날짜 변환 + 문자열 검색 + isin)과
+#   `filter_engine.FilterEngine`의 조회 지연 시간(p50/p95)을 비교합니다. 같은
+#   조건을 다시 조회하는 경우(탭 전환 등)의 결과 캐시 지연 시간도 함께 출력합니다.
+# - `map`: 합성 보호소로 지도를 만들고 HTML로 직렬화하는 시간과 크기를, 보호소마다
+#   `folium.Marker`를 만들던 기존 방식과 `shelter_clusters.ShelterPyramid`로 화면에
+#   맞는 클러스터만 보내는 방식(확대 수준별)으로 비교합니다.
+# - `search`: 이야기/성격 문장이 다양한 합성 데이터로 `search_index.SearchIndex`를
+#   만들고 저장/불러오기 시간과 검색 지연 시간(p50/p95)을, 전체 행에 대한 부분
+#   문자열 검색과 비교합니다.
+# - `stats`: 합성 보호소의 무작위 부분집합마다 통계 차트용 집계를, 보호소 행을
+#   복사해 다시 그룹화하던 기존 방식과 `stats_cube.StatsCube` 방식으로 비교합니다.
+#   막대 차트를 매번 만드는 시간과 차트 캐시(`stats_view.cached_figure`)에서
+#   꺼내는 시간, 캐시 적중률도 함께 출력합니다.
+# - `transform`: API 원본 형식의 합성 데이터로 `update_data.preprocess_data`의
+#   처리 시간을 측정합니다. 모든 보호소에 좌표가 있으므로 지오코딩 API는
+#   호출되지 않습니다.
+#
+# [실행 방법]
+# - `python benchmark.py fetch --pages 50 --latency 0.05`
+# - `python benchmark.py load --rows 100000`
+# - `python benchmark.py transform --shelters 10000 --animals 500000`
+# - `python benchmark.py filter --animals 500000 --queries 200`
+# - `python benchmark.py search --animals 500000 --queries 200`
+# - `python benchmark.py map --shelters 10000`
+# - `python benchmark.py stats --shelters 10000 --queries 200`
+# ==============================================================================
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from api_client import ApiClient
+
+# --- 로컬 스텁 API 서버 ---
+class StubApiHandler(BaseHTTPRequestHandler):
+    """공공데이터포털 응답 형식을 흉내 내는 XML을 돌려주는 요청 핸들러입니다."""
+    protocol_version = "HTTP/1.1"  # keep-alive 지원
+    total_count = 5000
+    latency = 0.0
+
+    def do_GET(self):
+        params = parse_qs(urlsplit(self.path).query)
+        page_no = int(params.get('pageNo', ['1'])[0])
+        num_of_rows = int(params.get('numOfRows', ['1000'])[0])
+        start = (page_no - 1) * num_of_rows
+        end = min(start + num_of_rows, self.total_count)
+
+        items = "".join(
+            f"<item><desertionNo>{i}</desertionNo><careNm>보호소{i % 300}</careNm>"
+            f"<kindCd>000{i % 50}</kindCd><sexCd>M</sexCd><noticeSdt>20240501</noticeSdt>"
+            f"<processState>보호중</processState><careAddr>서울특별시 중구 세종대로 {i}</careAddr></item>"
+            for i in range(start, end)
+        )
+        body = (
+            "<?xml version=\"1.0\" encoding=\"UTF-8\"?><response>"
+            "<header><resultCode>00</resultCode><resultMsg>NORMAL SERVICE.</resultMsg></header>"
+            f"<body><items>{items}</items><numOfRows>{num_of_rows}</numOfRows>"
+            f"<pageNo>{page_no}</pageNo><totalCount>{self.total_count}</totalCount></body></response>"
+        ).encode('utf-8')
+
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청 로그 출력 생략
+
+def start_stub_server(total_count=5000, latency=0.0):
+    """백그라운드 스레드에서 스텁 서버를 띄우고 (서버, 기본 URL)을 반환합니다."""
+    handler = type("ConfiguredStubApiHandler", (StubApiHandler,), {"total_count": total_count, "latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# --- 수집 경로별 구현 ---
+def _fetch_tempfile(url):
+    """기존 방식처럼 요청마다 새 연결로 임시 파일에 내려받은 뒤 다시 읽어 파싱합니다."""
+    fp, temp_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fp)
+    try:
+        with urllib.request.urlopen(url) as response, open(temp_path, 'wb') as f:
+            f.write(response.read())
+        with open(temp_path, 'rb') as f:
+            return ET.fromstring(f.read().decode('utf-8'))
+    finally:
+        os.remove(temp_path)
+
+def _fetch_powershell(url):
+    """기존 PowerShell 경로를 그대로 재현합니다. (Windows 전용)"""
+    fp, temp_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fp)
+    try:
+        command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
+        subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
+        with open(temp_path, 'rb') as f:
+            return ET.fromstring(f.read().decode('utf-8'))
+    finally:
+        os.remove(temp_path)
+
+async def _fetch_async(urls, concurrency):
+    async with ApiClient(concurrency=concurrency, rate_per_host=10_000) as client:
+        return await asyncio.gather(*(client.fetch_xml(url) for url in urls))
+
+async def _fetch_streaming(urls, concurrency):
+    async with ApiClient(concurrency=concurrency, rate_per_host=10_000) as client:
+        return await asyncio.gather(*(client.fetch_page(url) for url in urls))
+
+def _count_items(result):
+    """수집 경로별 결과(Element 또는 ApiPage)에서 item 개수를 셉니다."""
+    if isinstance(result, ET.Element):
+        return len(result.findall('.//item'))
+    return len(result.items)
+
+def bench_fetch(pages, latency, concurrency):
+    """스텁 서버를 대상으로 수집 경로별 처리 시간을 측정해 출력합니다."""
+    rows = 100
+    server, base_url = start_stub_server(total_count=pages * rows, latency=latency)
+    urls = [f"{base_url}/abandonmentPublic_v2?pageNo={p}&numOfRows={rows}&_type=xml" for p in range(1, pages + 1)]
+
+    paths = [("tempfile (순차, 요청마다 새 연결)", lambda: [_fetch_tempfile(u) for u in urls])]
+    if shutil.which("powershell"):
+        paths.append(("powershell (기존 방식)", lambda: [_fetch_powershell(u) for u in urls]))
+    paths.append((f"ApiClient (동시 {concurrency})", lambda: asyncio.run(_fetch_async(urls, concurrency))))
+    paths.append((f"ApiClient 스트리밍 (동시 {concurrency})", lambda: asyncio.run(_fetch_streaming(urls, concurrency))))
+
+    print(f"--- fetch: {pages}페이지, 응답 지연 {latency * 1000:.0f}ms ---")
+    try:
+        for name, run in paths:
+            tracemalloc.start()
+            started = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            items = sum(_count_items(result) for result in results)
+            print(f"{name:<40} {elapsed:8.3f}s  ({pages / elapsed:8.1f} pages/s, {items}건, 최대 {peak / 2**20:7.1f}MB)")
+    finally:
+        server.shutdown()
+
+# --- 합성 데이터 ---
+def make_synthetic_animals(n, n_shelters=300, seed=0):
+    """`update_data.preprocess_data`가 반환하는 `animals` 형식의 합성 데이터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    shelter_ids = rng.integers(0, n_shelters, n)
+    notice_dates = pd.Timestamp(datetime.now().date()) - pd.to_timedelta(rng.integers(0, 120, n), unit='D')
+    species = pd.Series([f"000{i}" for i in range(50)]).iloc[rng.integers(0, 50, n)].to_numpy()
+    sex = np.where(rng.random(n) < 0.5, 'M', 'F')
+    birth_offsets = rng.integers(0, 10, n)
+    return pd.DataFrame({
+        'desertion_no': [f"4{i:014d}" for i in range(n)],
+        'shelter_name': [f"보호소{s}" for s in shelter_ids],
+        'animal_name': pd.Series(species) + ' (' + sex + ')',
+        'species': species,
+        'age': [f"{2015 + a}(년생)" for a in birth_offsets],
+        'birth_year': pd.array(2015 + birth_offsets, dtype='Int64'),
+        'image_url': [f"https://example.com/images/{i}.jpg" for i in range(n)],
+        'personality': '정보 없음',
+        'story': np.where(rng.random(n) < 0.1, None, '온순하고 사람을 잘 따름, "산책" 좋아함'),
+        'notice_date': notice_dates,
+        'sex': sex,
+        'process_state': np.where(rng.random(n) < 0.2, '종료(입양)', '보호중'),
+        'careAddr': [f"서울특별시 중구 세종대로 {s}" for s in shelter_ids],
+        'happen_date': notice_dates - timedelta(days=3),
+    })
+
+def make_synthetic_raw(n_animals, n_shelters, seed=0):
+    """API 응답 형식(원본 컬럼 이름)의 합성 동물/보호소 데이터를 (동물, 보호소) 튜플로 만듭니다."""
+    rng = np.random.default_rng(seed)
+    shelter_ids = rng.integers(0, n_shelters, n_animals)
+    notice_dates = pd.Timestamp(datetime.now().date()) - pd.to_timedelta(rng.integers(0, 120, n_animals), unit='D')
+    animals = pd.DataFrame({
+        'desertionNo': [f"4{i:014d}" for i in range(n_animals)],
+        'careNm': [f"보호소{s}" for s in shelter_ids],
+        'kindCd': pd.Series([f"000{i}" for i in range(50)]).iloc[rng.integers(0, 50, n_animals)].to_numpy(),
+        'sexCd': np.where(rng.random(n_animals) < 0.5, 'M', 'F'),
+        'age': [f"{2015 + a}(년생)" for a in rng.integers(0, 10, n_animals)],
+        'popfile': [f"https://example.com/images/{i}.jpg" for i in range(n_animals)],
+        'specialMark': '온순함',
+        'noticeSdt': notice_dates.strftime('%Y%m%d'),
+        'happenDt': (notice_dates - timedelta(days=3)).strftime('%Y%m%d'),
+        'processState': np.where(rng.random(n_animals) < 0.2, '종료(입양)', '보호중'),
+        'careAddr': [f"서울특별시 중구 세종대로 {s}" for s in shelter_ids],
+    })
+    shelters = pd.DataFrame({
+        'careNm': [f"보호소{s}" for s in range(n_shelters)],
+        'careRegNo': [f"{s:09d}" for s in range(n_shelters)],
+        'careAddr': [f"서울특별시 중구 세종대로 {s}" for s in range(n_shelters)],
+        'careTel': '02-000-0000',
+        'lat': 37.5 + rng.random(n_shelters) * 0.1,
+        'lon': 127.0 + rng.random(n_shelters) * 0.1,
+    })
+    return animals, shelters
+
+SIDO_NAMES = ["서울특별시", "부산광역시", "대구광역시", "인천광역시", "경기도", "강원특별자치도", "충청북도", "전라남도"]
+SIGUNGU_NAMES = ["중구", "동구", "서구", "남구", "북구", "수원시 장안구"]
+
+def make_synthetic_shelters(animals, seed=0):
+    """합성 동물 데이터의 보호소별로 `shelters` 테이블 형식의 데이터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    names = animals['shelter_name'].drop_duplicates().reset_index(drop=True)
+    n = len(names)
+    sido = np.array(SIDO_NAMES)[rng.integers(0, len(SIDO_NAMES), n)]
+    sigungu = np.array(SIGUNGU_NAMES)[rng.integers(0, len(SIGUNGU_NAMES), n)]
+    counts = animals.groupby('shelter_name').size().reindex(names).to_numpy()
+    return pd.DataFrame({
+        'shelter_name': names,
+        'careAddr': [f"{a} {b} 보호소길 {i}" for i, (a, b) in enumerate(zip(sido, sigungu))],
+        'region': sido,
+        'count': counts,
+        'species': animals.groupby('shelter_name')['species'].first().reindex(names).to_numpy(),
+        'long_term': rng.integers(0, 20, n),
+        'adopted': rng.integers(0, 10, n),
+        'lat': 35 + rng.random(n) * 3,
+        'lon': 126 + rng.random(n) * 3,
+    })
+
+# --- DB 적재 방식 비교 ---
+def bench_load(rows, writers):
+    """합성 데이터를 각 적재 방식으로 DB에 써 보고 초당 처리 행 수를 출력합니다."""
+    from db_loader import bulk_load
+    from update_data import get_db_engine
+
+    df = make_synthetic_animals(rows)
+    engine = get_db_engine(allow_local_infile=True)
+    table = "bench_animals"
+
+    print(f"--- load: 합성 유기동물 {rows}건 ---")
+    for writer in writers:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            started = time.perf_counter()
+            with engine.begin() as conn:
+                bulk_load(conn, table, df, writer=writer, dtype_table='animals')
+            elapsed = time.perf_counter() - started
+            print(f"{writer:<15} {elapsed:8.3f}s  ({rows / elapsed:10.0f} rows/s)")
+        except Exception as e:
+            print(f"{writer:<15} 실패: {e}")
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+# --- 변환 단계 측정 ---
+def bench_transform(n_shelters, n_animals, repeat):
+    """합성 원본 데이터로 `preprocess_data`를 반복 실행하고 처리 시간을 출력합니다."""
+    from update_data import preprocess_data
+
+    animals_raw, shelters_raw = make_synthetic_raw(n_animals, n_shelters)
+    print(f"--- transform: 보호소 {n_shelters}곳, 유기동물 {n_animals}건 ---")
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        shelter_df, animal_df = preprocess_data(animals_raw, shelters_raw)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"preprocess_data  최소 {best:8.3f}s / 평균 {sum(timings) / len(timings):8.3f}s  "
+          f"({n_animals / best:10.0f} rows/s, 보호소 {len(shelter_df)}곳)")
+
+# --- 필터 조회 측정 ---
+def _legacy_filter(animals, shelters, start_date, end_date, sido, sigungu, species, query, sort_by):
+    """`FilterEngine` 도입 전 `app.get_filtered_data`의 필터링 방식을 그대로 재현합니다."""
+    animals = animals.copy()
+    animals['notice_date'] = pd.to_datetime(animals['notice_date'])
+    mask = (animals['notice_date'].dt.date >= start_date) & (animals['notice_date'].dt.date <= end_date)
+    filtered_animals = animals[mask]
+    if query:
+        filtered_animals = filtered_animals[filtered_animals['animal_name'].str.contains(query, case=False, na=False)]
+    if species:
+        filtered_animals = filtered_animals[filtered_animals['species'].isin(species)]
+    filtered_shelters = shelters[shelters['shelter_name'].isin(filtered_animals['shelter_name'].unique())]
+    if sido != "전체":
+        filtered_shelters = filtered_shelters[filtered_shelters["careAddr"].str.startswith(sido, na=False)]
+    if sigungu != "전체":
+        filtered_shelters = filtered_shelters[filtered_shelters["careAddr"].str.startswith(f"{sido} {sigungu}", na=False)]
+    final_animals = filtered_animals[filtered_animals['shelter_name'].isin(filtered_shelters['shelter_name'].unique())]
+    if sort_by == "최신 공고일 순":
+        final_animals = final_animals.sort_values(by='notice_date', ascending=False)
+    elif sort_by == "오래된 공고일 순":
+        final_animals = final_animals.sort_values(by='notice_date', ascending=True)
+    else:
+        year_of_birth = pd.to_numeric(final_animals['age'].str.extract(r'(\d{4})')[0], errors='coerce')
+        final_animals = final_animals.assign(year_of_birth=year_of_birth).sort_values(
+            by='year_of_birth', ascending=(sort_by == "나이 어린 순"), na_position='last').drop(columns=['year_of_birth'])
+    return (final_animals, filtered_shelters, filtered_shelters['shelter_name'].nunique(), len(final_animals),
+            int(filtered_shelters['long_term'].sum()), int(filtered_shelters['adopted'].sum()))
+
+def make_filter_queries(animals, n, seed=0):
+    """사이드바에서 나올 법한 필터 조합을 무작위로 만듭니다."""
+    from filter_engine import SORT_OPTIONS
+
+    rng = np.random.default_rng(seed)
+    species_names = animals['species'].drop_duplicates().tolist()
+    today = datetime.now().date()
+    queries = []
+    for _ in range(n):
+        start = today - timedelta(days=int(rng.integers(7, 120)))
+        sido = "전체" if rng.random() < 0.5 else SIDO_NAMES[rng.integers(0, len(SIDO_NAMES))]
+        sigungu = "전체" if sido == "전체" or rng.random() < 0.5 else SIGUNGU_NAMES[rng.integers(0, len(SIGUNGU_NAMES))]
+        species = list(rng.choice(species_names, size=int(rng.integers(0, 4)), replace=False))
+        query = "" if rng.random() < 0.7 else f"000{rng.integers(0, 50)}"
+        queries.append((start, today, sido, sigungu, species, query, SORT_OPTIONS[rng.integers(0, len(SORT_OPTIONS))]))
+    return queries
+
+def _latency_summary(timings):
+    timings_ms = np.array(timings) * 1000
+    return f"p50 {np.percentile(timings_ms, 50):8.2f}ms  p95 {np.percentile(timings_ms, 95):8.2f}ms"
+
+def bench_filter(n_animals, n_queries):
+    """무작위 필터 조합으로 기존 방식과 `FilterEngine`의 조회 지연 시간을 비교합니다."""
+    from filter_engine import FilterEngine, normalize_filter_key
+    from utils import LRUCache
+
+    animals = make_synthetic_animals(n_animals, n_shelters=max(300, n_animals // 50))
+    shelters = make_synthetic_shelters(animals)
+    queries = make_filter_queries(animals, n_queries)
+    print(f"--- filter: 유기동물 {n_animals}건, 보호소 {len(shelters)}곳, 조회 {n_queries}회 ---")
+
+    started = time.perf_counter()
+    engine = FilterEngine(animals, shelters)
+    print(f"{'FilterEngine 생성 (데이터 버전당 1회)':<40} {time.perf_counter() - started:8.3f}s")
+
+    cache = LRUCache(len(queries))
+    for q in queries:  # 한 번씩 조회해 두고, 아래에서는 같은 조건을 다시 조회합니다.
+        cache.get_or_compute(normalize_filter_key(1, *q), lambda: engine.query(*q))
+
+    for name, run in [
+        ("기존 방식", lambda q: _legacy_filter(animals, shelters, *q)),
+        ("FilterEngine", lambda q: engine.query(*q)),
+        ("FilterEngine + 결과 캐시 (같은 조건 재조회)",
+         lambda q: cache.get_or_compute(normalize_filter_key(1, *q), lambda: engine.query(*q))),
+    ]:
+        timings = []
+        for q in queries:
+            started = time.perf_counter()
+            run(q)
+            timings.append(time.perf_counter() - started)
+        print(f"{name:<40} {_latency_summary(timings)}")
+    print(f"결과 캐시 통계: {cache.stats()}")
+
+# --- 지도 렌더링 측정 ---
+def _legacy_map(shelters, animals):
+    """예전 `map_view.show`처럼 보호소마다 `folium.Marker`를 만듭니다."""
+    import folium
+    from folium.plugins import MarkerCluster
+
+    shelter_image_map = animals.groupby('shelter_name')['image_url'].first().to_dict()
+    map_obj = folium.Map(location=[shelters['lat'].mean(), shelters['lon'].mean()], zoom_start=7)
+    marker_cluster = MarkerCluster().add_to(map_obj)
+    for _, row in shelters.iterrows():
+        if pd.notna(row['lat']) and pd.notna(row['lon']):
+            image_url = shelter_image_map.get(row['shelter_name'], 'https://via.placeholder.com/150')
+            popup_html = f"""
+                <b>{row['shelter_name']}</b><br>
+                <img src='{image_url}' width='150'><br>
+                지역: {row.get('region', '정보 없음')}<br>
+                주요 품종: {row.get('species', '정보 없음')}<br>
+                보호 중: {int(row.get('count', 0))} 마리
+            """
+            folium.Marker(
+                [row['lat'], row['lon']],
+                popup=popup_html,
+                tooltip=row['shelter_name'],
+                icon=folium.Icon(color="blue", icon="paw", prefix='fa')
+            ).add_to(marker_cluster)
+    return map_obj
+
+def bench_map(n_shelters):
+    """
+    보호소 지도를 만들고 HTML로 직렬화하는 시간과 크기를 기존 방식과 비교합니다.
+    격자 피라미드 방식은 확대 수준별로 가로 1000px, 세로 500px 화면을 가정합니다.
+    """
+    import folium
+    from shelter_clusters import ShelterPyramid
+    from tabs.map_view import build_marker_frame, build_marker_layer
+
+    animals = make_synthetic_animals(n_shelters * 20, n_shelters=n_shelters)
+    shelters = make_synthetic_shelters(animals)
+    print(f"--- map: 보호소 {len(shelters)}곳 ---")
+
+    def report(name, build):
+        started = time.perf_counter()
+        map_obj = build()
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        html = map_obj.get_root().render()
+        rendered = time.perf_counter() - started
+        print(f"{name:<30} 생성 {built:8.3f}s  직렬화 {rendered:8.3f}s  HTML {len(html.encode('utf-8')) / 2**20:7.2f}MB")
+
+    report("기존 방식 (보호소마다 Marker)", lambda: _legacy_map(shelters, animals))
+
+    started = time.perf_counter()
+    pyramid = ShelterPyramid(build_marker_frame(shelters, animals))
+    print(f"{'격자 피라미드 생성 (보호소 목록당 1회)':<30} {time.perf_counter() - started:8.3f}s")
+    center_lat, center_lon = shelters['lat'].mean(), shelters['lon'].mean()
+    for zoom in [7, 10, 13]:
+        half_lon = 360 * 500 / (256 << zoom)
+        half_lat = half_lon / 2
+        view = pyramid.view(zoom, (center_lat - half_lat, center_lon - half_lon, center_lat + half_lat, center_lon + half_lon))
+
+        def build():
+            map_obj = folium.Map(location=[center_lat, center_lon], zoom_start=zoom)
+            build_marker_layer(view).add_to(map_obj)
+            return map_obj
+
+        report(f"격자 피라미드 zoom {zoom} (마커 {view.marker_count}개)", build)
+
+# --- 검색 색인 측정 ---
+SEARCH_PHRASES = [
+    "사람을 잘 따름", "온순함", "겁이 많음", "산책을 좋아함", "짖음이 적음", "활발하고 장난이 많음",
+    "배변 훈련 완료", "다른 강아지와 잘 지냄", "목줄 착용", "왼쪽 뒷다리 절음", "피부병 치료 중",
+    "중성화 완료", "갈색 얼룩", "흰색 털", "검은 코", "꼬리가 짧음", "초코", "하양이", "누렁이", "콩이",
+]
+
+def make_synthetic_stories(n, seed=0):
+    """검색 측정용으로 `SEARCH_PHRASES`를 무작위로 이어 붙인 (이야기, 성격) 문장을 만듭니다."""
+    rng = np.random.default_rng(seed)
+    phrases = np.array(SEARCH_PHRASES, dtype=object)
+
+    def sentences():
+        picks = rng.integers(0, len(phrases), (n, 3))
+        return pd.Series(phrases[picks[:, 0]]) + ', ' + phrases[picks[:, 1]] + ', ' + phrases[picks[:, 2]]
+
+    return sentences(), sentences()
+
+def bench_search(n_animals, n_queries):
+    """`SearchIndex`의 생성/불러오기 시간과 검색 지연 시간을 전체 행 부분 문자열 검색과 비교합니다."""
+    from search_index import SearchIndex, normalize_text
+
+    animals = make_synthetic_animals(n_animals)
+    animals['story'], animals['personality'] = make_synthetic_stories(n_animals)
+    rng = np.random.default_rng(1)
+    words = [word for phrase in SEARCH_PHRASES for word in phrase.split()]
+    queries = [words[i] for i in rng.integers(0, len(words), n_queries)]
+    print(f"--- search: 유기동물 {n_animals}건, 검색 {n_queries}회 ---")
+
+    started = time.perf_counter()
+    index = SearchIndex.build(animals)
+    print(f"{'색인 생성 (적재 시 1회)':<30} {time.perf_counter() - started:8.3f}s  "
+          f"(bigram {len(index.keys)}개, 게시 항목 {len(index.docs)}개)")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        started = time.perf_counter()
+        index.save(temp_dir)
+        print(f"{'색인 저장':<30} {time.perf_counter() - started:8.3f}s")
+        started = time.perf_counter()
+        index = SearchIndex.load(temp_dir)
+        print(f"{'색인 불러오기 (메모리 맵)':<30} {time.perf_counter() - started:8.3f}s")
+
+        # 색인이 없을 때처럼 검색 대상 필드를 이어 붙인 문자열 전체를 매번 훑습니다.
+        haystack = (animals['animal_name'].fillna('') + animals['species'].fillna('')
+                    + animals['story'].fillna('') + animals['personality'].fillna('')).map(normalize_text)
+        for name, run in [
+            ("전체 행 부분 문자열 검색", lambda q: haystack.str.contains(normalize_text(q), regex=False)),
+            ("SearchIndex", lambda q: index.search(q)),
+        ]:
+            timings = []
+            for q in queries:
+                started = time.perf_counter()
+                run(q)
+                timings.append(time.perf_counter() - started)
+            print(f"{name:<30} {_latency_summary(timings)}")
+        del index  # 메모리 맵을 닫은 뒤 임시 폴더를 지웁니다.
+
+# --- 메인 실행 블록 ---
+# --- 통계 차트 집계 측정 ---
+def _legacy_stats(shelters):
+    """예전 `stats_view.show`처럼 보호소 행을 복사하고 다시 그룹화합니다."""
+    species_chart_data = shelters.groupby("species")["count"].sum().reset_index()
+    chart_data = shelters.copy()
+    chart_data['sido'] = chart_data['careAddr'].str.split().str[0]
+    return species_chart_data, chart_data.groupby("sido")["long_term"].sum().reset_index()
+
+def bench_stats(n_shelters, n_queries):
+    """무작위로 고른 보호소 부분집합에 대해 기존 방식과 `StatsCube`의 차트 집계 지연 시간을 비교합니다."""
+    from stats_cube import StatsCube
+
+    animals = make_synthetic_animals(n_shelters * 20, n_shelters=n_shelters)
+    shelters = make_synthetic_shelters(animals)
+    rng = np.random.default_rng(0)
+    subsets = [shelters[rng.random(len(shelters)) < rng.choice([1.0, 0.3, 0.05])] for _ in range(n_queries)]
+    print(f"--- stats: 보호소 {len(shelters)}곳, 조회 {n_queries}회 ---")
+
+    started = time.perf_counter()
+    cube = StatsCube(shelters)
+    print(f"{'StatsCube 생성 (데이터 버전당 1회)':<40} {time.perf_counter() - started:8.3f}s")
+
+    def run_cube(subset):
+        totals = cube.aggregate(subset)
+        return cube.by_species(totals, "count"), cube.by_sido(totals, "long_term")
+
+    for name, run in [("기존 방식 (groupby)", _legacy_stats), ("StatsCube", run_cube)]:
+        timings = []
+        for subset in subsets:
+            started = time.perf_counter()
+            run(subset)
+            timings.append(time.perf_counter() - started)
+        print(f"{name:<40} {_latency_summary(timings)}")
+
+    from tabs.stats_view import build_species_bar, cached_figure, figure_cache_stats
+    charts = [run_cube(subset)[0] for subset in subsets]
+    for data in charts:  # 한 번씩 만들어 두고, 아래에서는 같은 데이터로 다시 꺼냅니다.
+        cached_figure("species_bar", data, build_species_bar)
+    for name, run in [
+        ("막대 차트 생성 (px.bar)", build_species_bar),
+        ("막대 차트 캐시 (같은 데이터 재조회)", lambda data: cached_figure("species_bar", data, build_species_bar)),
+    ]:
+        timings = []
+        for data in charts:
+            started = time.perf_counter()
+            run(data)
+            timings.append(time.perf_counter() - started)
+        print(f"{name:<40} {_latency_summary(timings)}")
+    print(f"차트 캐시 통계: {figure_cache_stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="데이터 파이프라인 성능 측정")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="API 수집 경로 비교")
+    fetch_parser.add_argument("--pages", type=int, default=50)
+    fetch_parser.add_argument("--latency", type=float, default=0.05)
+    fetch_parser.add_argument("--concurrency", type=int, default=8)
+
+    load_parser = subparsers.add_parser("load", help="DB 대량 적재 방식 비교")
+    load_parser.add_argument("--rows", type=int, default=100_000)
+    load_parser.add_argument("--writers", nargs="+", default=["multi", "executemany", "load_data"])
+
+    transform_parser = subparsers.add_parser("transform", help="preprocess_data 처리 시간 측정")
+    transform_parser.add_argument("--shelters", type=int, default=10_000)
+    transform_parser.add_argument("--animals", type=int, default=500_000)
+    transform_parser.add_argument("--repeat", type=int, default=3)
+
+    filter_parser = subparsers.add_parser("filter", help="사이드바 필터 조회 지연 시간 측정")
+    filter_parser.add_argument("--animals", type=int, default=500_000)
+    filter_parser.add_argument("--queries", type=int, default=200)
+
+    search_parser = subparsers.add_parser("search", help="검색 색인 생성 및 검색 지연 시간 측정")
+    search_parser.add_argument("--animals", type=int, default=500_000)
+    search_parser.add_argument("--queries", type=int, default=200)
+
+    map_parser = subparsers.add_parser("map", help="보호소 지도 생성 및 직렬화 시간 측정")
+    map_parser.add_argument("--shelters", type=int, default=10_000)
+
+    stats_parser = subparsers.add_parser("stats", help="통계 차트 집계 지연 시간 측정")
+    stats_parser.add_argument("--shelters", type=int, default=10_000)
+    stats_parser.add_argument("--queries", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == "fetch":
+        bench_fetch(args.pages, args.latency, args.concurrency)
+    elif args.command == "load":
+        bench_load(args.rows, args.writers)
+    elif args.command == "transform":
+        bench_transform(args.shelters, args.animals, args.repeat)
+    elif args.command == "filter":
+        bench_filter(args.animals, args.queries)
+    elif args.command == "search":
+        bench_search(args.animals, args.queries)
+    elif args.command == "map":
+        bench_map(args.shelters)
+    elif args.command == "stats":
+        bench_stats(args.shelters, args.queries)
@@ -11,9 +11,25 @@
 # 2. **데이터베이스 연결 (`get_db_engine`):** SQLAlchemy를 사용하여 데이터베이스
 #     연결 엔진을 생성하고, `@st.cache_resource`를 통해 연결을 재사용하여
 #     성능을 최적화합니다.
+#     커넥션 풀 옵션(`pool_size`, `pool_pre_ping` 등)과 읽기 전용 복제본([DB_REPLICA])
+#     설정은 `db_settings.py`로 `config.ini`에서 읽으며, 앱의 조회는 복제본으로 보냅니다.
 # 3. **데이터 로딩 (`load_data`):** 데이터베이스의 특정 테이블에서 데이터를
-#     Pandas DataFrame으로 읽어오며, `@st.cache_data`를 통해 이미 로드된
-#     데이터는 다시 로드하지 않고 캐시된 버전을 사용합니다.
+#     Pandas DataFrame으로 읽어오며, `@st.cache_resource`를 통해 이미 로드된
+#     데이터는 다시 로드하지 않고 캐시된 DataFrame 하나를 모든 세션과 필터 엔진이 함께 씁니다.
+#     (rerun마다 pickle 사본을 만들지 않으므로, 반환된 DataFrame은 읽기 전용으로 다뤄야 합니다.)
+#     캐시는 `update_data.py`가 올리는 데이터 버전(`get_data_version`)별로 유지되므로,
+#     새 데이터가 적재되면 자동으로 다시 로드되고, 로딩 실패 결과는 캐시되지 않습니다.
+#     `update_data.py`가 남긴 Arrow 스냅샷(`snapshot_store.py`)이 있으면 DB 대신
+#     가장 최신 스냅샷을 메모리 맵으로 읽고, 스냅샷이 없을 때만 DB에서 읽습니다.
+#     동물 사진은 이미 받아 둔 파일의 경로만 조회하며, 없는 사진은 데이터 버전마다
+#     한 번(`_prefetch_missing_images`) `image_prefetcher.py`가 백그라운드에서 동시에 내려받습니다.
+#     - `get_filter_engine`: 사이드바 필터 조회용 `FilterEngine`을 데이터 버전마다
+#       한 번만 만들어 모든 세션이 함께 사용합니다.
+#       검색어 조회에는 스냅샷과 함께 저장된 n-gram 검색 색인을 사용합니다.
+#       스냅샷이 없으면 동물 테이블 전체를 읽지 않고, 조건을 매개변수화된 SQL로 넘겨
+#       필요한 컬럼과 행만 읽는 `db_query.SqlFilterEngine`을 사용합니다.
+#     - `get_stats_cube`: 통계 차트용 보호소 (품종 × 시/도) 사전 집계(`stats_cube.py`)를
+#       데이터 버전마다 한 번만 만들어, 필터가 바뀌면 집계 배열만 잘라 차트를 그립니다.
 # 4. **외부 API 연동:**
 #     - `fetch_api_data_powershell`: PowerShell을 사용하여 안정적으로 외부 API의
 #       XML 데이터를 가져옵니다. (Windows 환경에 특화된 방식)
@@ -21,18 +37,26 @@
 #       호출하여 시/도, 시/군/구, 품종 목록을 가져옵니다. 이 데이터 역시 캐싱됩니다.
 # 5. **데이터베이스 초기화 (`init_db`):** 앱 시작 시 데이터베이스 테이블이
 #     존재하는지 확인하고, 없을 경우 경고 메시지를 표시합니다.
+#     테이블이 한 번 확인되면 프로세스가 끝날 때까지 다시 확인하지 않습니다.
 # ==============================================================================
 
 import pandas as pd
 import streamlit as st
 import configparser
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import inspect, text
 import xml.etree.ElementTree as ET
 from urllib.parse import quote
 import subprocess
 import tempfile
-import requests # 추가: 이미지를 다운로드하기 위해 requests 라이브러리 import
+from db_settings import create_db_engine, read_config_section
+from image_prefetcher import lookup_local_images, start_background_prefetch
+from snapshot_store import latest_snapshot_version, read_snapshot, snapshot_path
+from search_index import SearchIndex, load_search_index
+from db_query import SqlFilterEngine
+from filter_engine import FilterEngine
+from stats_cube import StatsCube
+from utils import LRUCache, map_species_names
 
 # --- 경로 및 설정 로드 ---
 current_script_path = os.path.abspath(__file__)
@@ -40,6 +64,16 @@ streamlit_web_dir = os.path.dirname(current_script_path)
 project_root = os.path.dirname(streamlit_web_dir)
 CONFIG_PATH = os.path.join(project_root, 'config.ini')
 
+# `load_data`로 읽을 수 있는 테이블 (테이블 이름은 SQL 매개변수로 넘길 수 없으므로 목록으로 제한)
+READABLE_TABLES = ('animals', 'shelters')
+
+# 필터 결과 캐시에 보관할 최대 조건 수
+FILTER_RESULT_CACHE_SIZE = 32
+
+# 데이터 버전을 다시 조회하기까지의 시간(초). 이 시간 안에 새 데이터가 적재되면
+# 다음 조회 시점에 캐시가 무효화됩니다.
+DATA_VERSION_TTL = 30
+
 def get_config():
     """`config.ini` 설정 파일을 읽어와 ConfigParser 객체로 반환합니다."""
     config = configparser.ConfigParser()
@@ -52,21 +86,20 @@ def get_config():
 # --- DB 및 API 클라이언트 ---
 @st.cache_resource
 def get_db_engine():
-    """설정 파일을 바탕으로 SQLAlchemy DB 엔진을 생성하고 반환합니다."""
+    """
+    설정 파일을 바탕으로 앱의 조회용 SQLAlchemy DB 엔진을 생성하고 반환합니다.
+    [DB_REPLICA] 섹션이 있으면 읽기 전용 복제본에 접속하며, 커넥션 풀 옵션은
+    `db_settings.py`에서 읽습니다. 엔진을 만들 때는 접속하지 않고, 끊긴 연결은
+    사용할 때 `pool_pre_ping`으로 걸러냅니다.
+    """
     config = get_config()
     if not config or 'DB' not in config:
         st.error("DB 설정이 올바르지 않습니다.")
         return None
-    db_config = config['DB']
     try:
-        engine = create_engine(
-            f"mysql+mysqlconnector://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config.get('port', 3306)}/{db_config['database']}"
-        )
-        with engine.connect() as _:
-            pass
-        return engine
+        return create_db_engine(read_config_section(config, replica=True))
     except Exception as e:
-        st.error(f"DB 연결에 실패했습니다: {e}")
+        st.error(f"DB 엔진을 만들지 못했습니다: {e}")
         return None
 
 def get_api_key():
@@ -101,38 +134,6 @@ def fetch_api_data_powershell(url):
         if os.path.exists(temp_path):
             os.remove(temp_path)
 
-# --- 이미지 다운로드 함수 추가 ---
-def download_image(url, desertion_no):
-    """
-    주어진 URL에서 이미지를 다운로드하여 'images' 폴더에 저장하고 로컬 경로를 반환합니다.
-    """
-    if not url:
-        return None
-    
-    images_dir = "images"
-    if not os.path.exists(images_dir):
-        os.makedirs(images_dir)
-
-    file_extension = url.split('.')[-1].split('?')[0]
-    filename = f"{desertion_no}.{file_extension}"
-    filepath = os.path.join(images_dir, filename)
-
-    if os.path.exists(filepath):
-        return filepath
-        
-    try:
-        response = requests.get(url, stream=True, timeout=10)
-        response.raise_for_status()
-        
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print(f"이미지 다운로드 성공: {url} -> {filepath}")
-        return filepath
-    except requests.exceptions.RequestException as e:
-        print(f"이미지 다운로드 실패: {url} - {e}")
-        return None
-
 # --- API 연동 함수 (수정 없음) ---
 @st.cache_data
 def get_sido_list():
@@ -205,8 +206,19 @@ def get_kind_list(upkind_code=''):
             
     return list({v['code']:v for v in all_kinds}.values())
 
+@st.cache_resource
+def _table_check_state():
+    """테이블 존재 확인 결과를 프로세스 동안 보관합니다. (앱의 모든 세션이 함께 사용)"""
+    return {'shelters_exists': False}
+
 def init_db():
-    """애플리케이션 시작 시 DB 연결 및 테이블 존재 여부를 확인합니다."""
+    """
+    애플리케이션 시작 시 DB 연결 및 테이블 존재 여부를 확인합니다.
+    테이블이 한 번 확인되면 이후 rerun에서는 DB에 다시 묻지 않습니다.
+    """
+    state = _table_check_state()
+    if state['shelters_exists']:
+        return
     engine = get_db_engine()
     if engine is None:
         st.error("DB 엔진을 초기화할 수 없어 앱 실행이 불가능합니다.")
@@ -216,48 +228,192 @@ def init_db():
             cursor = conn.execute(text("SHOW TABLES LIKE 'shelters'"))
             if cursor.fetchone() is None:
                 st.warning("'shelters' 테이블이 DB에 존재하지 않습니다. `update_data.py`를 먼저 실행해주세요.")
+            else:
+                state['shelters_exists'] = True
     except Exception as e:
         st.error(f"DB 초기화 중 오류 발생: {e}")
 
-@st.cache_data
-def load_data(table_name):
-    """데이터베이스에서 지정된 테이블의 모든 데이터를 DataFrame으로 로드하고 전처리합니다."""
+@st.cache_data(ttl=DATA_VERSION_TTL)
+def get_data_version():
+    """
+    `update_data.py`가 적재를 마칠 때마다 올리는 데이터 버전을 조회합니다.
+    버전 테이블이 없거나 조회에 실패하면 0을 반환합니다.
+    """
     engine = get_db_engine()
     if engine is None:
-        return pd.DataFrame()
+        return 0
     try:
         with engine.connect() as conn:
-            data = pd.read_sql(f"SELECT * FROM {table_name}", conn)
+            version = conn.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar()
+        return int(version or 0)
+    except Exception:
+        return 0
 
-            if table_name == 'shelters':
-                data['lat'] = pd.to_numeric(data['lat'], errors='coerce')
-                data['lon'] = pd.to_numeric(data['lon'], errors='coerce')
-            
-            # --- 'animals' 테이블에 대한 이미지 및 품종 전처리 로직 ---
-            if table_name == 'animals':
-                # 1. 품종 코드(숫자)를 한글 이름으로 변환
-                kind_list_data = get_kind_list()
-                kind_map = {k['code']: k['name'] for k in kind_list_data}
-                data['species'] = data['species'].map(kind_map).fillna('기타')
-                
-                # 2. 이미지를 다운로드하여 로컬 경로를 저장
-                data['image_path'] = data.apply(
-                    lambda row: download_image(row['image_url'], row['desertion_no']),
-                    axis=1
-                )
-            
+def _read_table_from_db(table_name, columns=None):
+    """DB에서 테이블의 열린 행을 모두(`columns`를 주면 그 컬럼만) 읽고 좌표 타입을 맞춥니다."""
+    if table_name not in READABLE_TABLES:
+        raise ValueError(f"읽을 수 없는 테이블입니다: {table_name}")
+    engine = get_db_engine()
+    if engine is None:
+        raise RuntimeError("DB 엔진을 사용할 수 없습니다.")
+    with engine.connect() as conn:
+        table_columns = {col['name'] for col in inspect(conn).get_columns(table_name)}
+        # 증분 적재 모드에서 닫힘으로 표시된(더 이상 조회되지 않는) 행은 SQL에서 제외합니다.
+        where = " WHERE is_closed = 0" if 'is_closed' in table_columns else ""
+        select = ", ".join(col for col in columns if col in table_columns) if columns else "*"
+        data = pd.read_sql(text(f"SELECT {select} FROM {table_name}{where}"), conn)
+
+    if table_name == 'shelters' and columns is None:
+        data['lat'] = pd.to_numeric(data['lat'], errors='coerce')
+        data['lon'] = pd.to_numeric(data['lon'], errors='coerce')
+    return data
+
+@st.cache_resource(max_entries=4)
+def _load_table(table_name, data_version, source='db'):
+    """
+    지정된 테이블의 모든 데이터를 DataFrame으로 로드하고 전처리합니다.
+    `source`가 'snapshot'이면 `data_version` 스냅샷을 먼저 읽고, 해당 테이블의
+    스냅샷이 없으면 DB에서 읽습니다. (스냅샷은 저장 시 타입이 고정되어 있습니다.)
+    캐시는 `(data_version, source)`별로 유지되며, 오류가 발생하면 예외를 그대로
+    전달하여 실패한 결과(빈 DataFrame)가 캐시되지 않도록 합니다.
+    결과는 복사하지 않고 모든 세션과 `FilterEngine`/`StatsCube`가 공유하므로 수정하면 안 됩니다.
+    """
+    data = read_snapshot(table_name, data_version) if source == 'snapshot' else None
+    if data is None:
+        data = _read_table_from_db(table_name)
+    
+    # --- 'animals' 테이블에 대한 이미지 및 품종 전처리 로직 ---
+    if table_name == 'animals':
+        data = _prepare_animals(data)
+    return data
+
+def _get_kind_map():
+    """품종 코드(숫자) → 한글 이름 사전을 반환합니다."""
+    return {k['code']: k['name'] for k in get_kind_list()}
+
+def _prepare_animals(data):
+    """DB나 스냅샷에서 읽은 동물 데이터를 화면에 쓰는 형태로 바꿉니다."""
+    if data.empty:
         return data
+    # 1. 품종 코드(숫자)를 한글 이름으로 변환
+    data['species'] = map_species_names(data['species'], _get_kind_map())
+
+    # 2. 이미 받아 둔 이미지의 로컬 경로만 조회합니다. 없는 이미지는 데이터 버전마다
+    #    한 번 `_prefetch_missing_images`가 받으며, 받는 동안 화면에서는 원본 image_url을 사용합니다.
+    image_paths = lookup_local_images(data)
+    data[image_paths.columns] = image_paths
+    return data
+
+def _prefetch_missing_images(animals):
+    """아직 받지 않은 동물 사진을 백그라운드에서 받기 시작합니다. (`_build_filter_engine`에서 데이터 버전마다 한 번)"""
+    if animals.empty or 'image_url' not in animals.columns:
+        return
+    image_paths = animals[['image_path']] if 'image_path' in animals.columns else lookup_local_images(animals)
+    missing = image_paths['image_path'].isna().to_numpy()
+    if missing.any():
+        start_background_prefetch(animals.loc[missing, ['desertion_no', 'image_url']].copy())
+
+def _current_data_key():
+    """
+    현재 데이터의 `(버전, 출처)`를 반환합니다.
+    스냅샷이 있으면 최신 스냅샷 버전을, 없으면 DB의 데이터 버전을 사용합니다.
+    """
+    snapshot_version = latest_snapshot_version()
+    if snapshot_version is not None:
+        return snapshot_version, 'snapshot'
+    return get_data_version(), 'db'
+
+def load_data(table_name):
+    """
+    지정된 테이블의 모든 데이터를 현재 데이터 버전 기준으로 로드합니다.
+    최신 스냅샷이 있으면 DB 왕복 없이 스냅샷을 읽고, 없으면 DB에서 읽습니다.
+    반환된 DataFrame은 캐시와 공유되므로 수정하지 않아야 합니다. (필요하면 `.copy()` 후 수정)
+    """
+    try:
+        return _load_table(table_name, *_current_data_key())
     except Exception as e:
         st.warning(f"'{table_name}' 테이블 로딩 중 오류: {e}. 빈 데이터를 반환합니다.")
         return pd.DataFrame()
 
+@st.cache_resource(max_entries=2)
+def _build_filter_engine(data_version, source):
+    """
+    데이터 버전마다 한 번만 필터 조회 엔진을 만듭니다. (앱의 모든 세션이 함께 사용)
+    스냅샷이 있으면 스냅샷 전체로 `FilterEngine`을 만들고, 검색 색인은 스냅샷에
+    저장된 것을 메모리 맵으로 엽니다. 스냅샷이 없으면 동물 테이블을 통째로 읽지 않고
+    조건을 SQL로 넘기는 `SqlFilterEngine`을 사용합니다.
+    """
+    if source == 'db':
+        engine = SqlFilterEngine(
+            get_db_engine(),
+            _load_table('shelters', data_version, source),
+            _get_kind_map(),
+            data_key=(data_version, source),
+            prepare_animals=_prepare_animals,
+        )
+        # 동물 테이블 전체 대신 사진 받기에 필요한 두 컬럼만 읽습니다.
+        _prefetch_missing_images(_read_table_from_db('animals', columns=['desertion_no', 'image_url']))
+        return engine
+    animals = _load_table('animals', data_version, source)
+    _prefetch_missing_images(animals)
+    search_index = load_search_index(snapshot_path(data_version)) if source == 'snapshot' else None
+    if search_index is None and not animals.empty:
+        search_index = SearchIndex.build(animals)
+    return FilterEngine(
+        animals,
+        _load_table('shelters', data_version, source),
+        data_key=(data_version, source),
+        search_index=search_index,
+    )
+
+def get_filter_engine():
+    """현재 데이터 버전의 `FilterEngine`을 반환합니다. 데이터를 읽지 못하면 None을 반환합니다."""
+    try:
+        return _build_filter_engine(*_current_data_key())
+    except Exception as e:
+        st.warning(f"필터 엔진을 준비하는 중 오류: {e}. 빈 데이터를 사용합니다.")
+        return None
+
+@st.cache_resource(max_entries=2)
+def _build_stats_cube(data_version, source):
+    """데이터 버전마다 한 번만 통계 차트용 (품종 × 시/도) 사전 집계를 만듭니다."""
+    return StatsCube(_load_table('shelters', data_version, source))
+
+def get_stats_cube():
+    """현재 데이터 버전의 `StatsCube`를 반환합니다. 데이터를 읽지 못하면 None을 반환합니다."""
+    try:
+        return _build_stats_cube(*_current_data_key())
+    except Exception as e:
+        st.warning(f"통계 집계를 준비하는 중 오류: {e}. 차트를 직접 집계합니다.")
+        return None
+
+@st.cache_resource
+def get_filter_result_cache():
+    """
+    필터 조건별 조회 결과를 보관하는 LRU 캐시를 반환합니다. (앱의 모든 세션이 함께 사용)
+    키에 데이터 버전이 포함되므로 새 데이터가 적재되면 이전 결과는 쓰이지 않고 밀려납니다.
+    """
+    return LRUCache(FILTER_RESULT_CACHE_SIZE)
+
 def get_filtered_data(sido_name, sigungu_name, species, search_query=""):
     shelters = load_data("shelters")
     return shelters
 
-def get_animal_details(shelter_name):
-    """특정 보호소 이름에 해당하는 동물들의 상세 정보를 조회합니다."""
-    animals = load_data("animals")
-    if animals.empty:
+def get_animal_details(shelter_name, animal_mask=None):
+    """
+    특정 보호소 이름에 해당하는 동물들의 상세 정보를 조회합니다.
+    전체 테이블을 훑지 않고 `FilterEngine`의 보호소별 행 범위(DB 조회라면 보호소 이름
+    인덱스)로 바로 찾으며, `animal_mask`(사이드바 필터 결과)를 주면 그중 조건에 맞는
+    동물만 반환합니다.
+    """
+    engine = get_filter_engine()
+    if engine is None or engine.is_empty:
+        return pd.DataFrame()
+    return engine.shelter_animals(shelter_name, animal_mask)
+
+def get_animals_by_id(desertion_nos):
+    """유기번호 목록(예: 찜 목록)에 해당하는 동물 정보를 조회합니다."""
+    engine = get_filter_engine()
+    if engine is None or engine.is_empty:
         return pd.DataFrame()
-    return animals[animals["shelter_name"] == shelter_name]
\ No newline at end of file
+    return engine.animals_by_id(desertion_nos)
@@ -0,0 +1,427 @@
+# ==============================================================================
+# db_loader.py - 데이터베이스 적재 모듈
+# ==============================================================================
+# 이 파일은 `update_data.py`의 적재(Load) 단계에서 사용하는 데이터베이스 작업을
+# 모아 둔 곳입니다.
+#
+# [주요 기능]
+# 1. **증분 적재 (`upsert_changed_rows`):** 키 컬럼을 기준으로 새로 생기거나
+#    내용이 바뀐 행만 INSERT ... ON DUPLICATE KEY UPDATE로 반영합니다.
+#    - 각 행의 내용 해시(`row_hash`)를 함께 저장하여 변경 여부를 판단합니다.
+#    - 이번 수집 범위에서 사라진 행은 삭제하지 않고 `is_closed = 1`로 표시합니다.
+# 2. **워터마크 (`get_watermark`, `set_watermark`):** 마지막으로 성공한 수집의
+#    종료일을 `etl_watermark` 테이블에 기록하여, 다음 실행에서는 그 이후 기간만
+#    수집할 수 있도록 합니다.
+# 3. **블루/그린 교체 (`swap_in_tables`):** 새 데이터를 스테이징 테이블(`*_next`)에
+#    다중 행 INSERT로 적재하고 인덱스까지 만든 뒤, `RENAME TABLE` 한 번으로 운영
+#    테이블과 원자적으로 교체합니다. 앱은 교체 전후의 완전한 테이블만 보게 됩니다.
+#    - 스테이징 테이블도 증분 적재와 같은 형식(`TABLE_KEYS`의 PRIMARY KEY + 관리용
+#      컬럼)으로 만들어, 전체/증분 모드를 번갈아 실행해도 됩니다.
+# 4. **데이터 버전 (`bump_data_version`):** 적재가 끝날 때마다 `data_version` 테이블의
+#    버전을 올려, 앱이 캐시를 언제 무효화해야 하는지 알 수 있도록 합니다.
+# 5. **대량 적재 방식 (`BULK_WRITERS`):** 스테이징 테이블에 행을 쓰는 방식을 선택할 수
+#    있습니다.
+#    - `multi`: `DataFrame.to_sql(method='multi')`
+#    - `executemany`: 청크 단위 `executemany` (드라이버가 다중 행 VALUES로 묶어 전송)
+#    - `load_data`: CSV로 직렬화한 뒤 `LOAD DATA LOCAL INFILE`로 적재
+#      (엔진 생성 시 `allow_local_infile=True`, 서버의 `local_infile=ON`이 필요합니다.)
+# ==============================================================================
+
+import csv
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, Integer, String, Text, inspect, text
+from sqlalchemy.dialects.mysql import DOUBLE
+
+WATERMARK_TABLE = "etl_watermark"
+DATA_VERSION_TABLE = "data_version"
+STAGING_SUFFIX = "_next"
+RETIRED_SUFFIX = "_old"
+INSERT_CHUNKSIZE = 1000  # 다중 행 INSERT 한 번에 담을 행 수
+DEFAULT_BULK_WRITER = "executemany"
+
+# pandas의 타입 추론(TEXT 등) 대신 사용할 컬럼 타입입니다.
+# 인덱스를 만들 컬럼은 길이가 정해진 타입으로 생성합니다.
+TABLE_DTYPES = {
+    'animals': {
+        'desertion_no': String(64),
+        'shelter_name': String(255),
+        'species': String(64),
+        'notice_date': DateTime(),
+        'happen_date': DateTime(),
+        'birth_year': Integer(),
+    },
+    'shelters': {
+        'shelter_name': String(255),
+        'careAddr': String(255),
+        'lat': DOUBLE(),
+        'lon': DOUBLE(),
+    },
+}
+TABLE_INDEXES = {
+    'animals': {
+        'idx_animals_desertion_no': ['desertion_no'],
+        'idx_animals_shelter_name': ['shelter_name'],
+        'idx_animals_notice_date': ['notice_date'],
+        # 앱의 DB 조건 조회(`db_query.py`): 공고일 범위 + 축종 + 보호소
+        'idx_animals_notice_species_shelter': ['notice_date', 'species', 'shelter_name'],
+    },
+    'shelters': {
+        'idx_shelters_shelter_name': ['shelter_name'],
+        # 지역(주소 접두어) 하위 쿼리를 인덱스만으로 처리합니다.
+        'idx_shelters_care_addr': ['careAddr', 'shelter_name'],
+    },
+}
+
+# 증분 적재 테이블에 추가되는 관리용 컬럼
+BOOKKEEPING_COLUMNS = ['row_hash', 'is_closed', 'closed_at', 'updated_at']
+
+# 테이블마다 행을 식별하는 키 컬럼 (PRIMARY KEY)
+TABLE_KEYS = {
+    'animals': 'desertion_no',
+    'shelters': 'shelter_key',
+}
+
+# --- 워터마크 ---
+def _ensure_watermark_table(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} ("
+        "  job VARCHAR(64) PRIMARY KEY,"
+        "  last_endde VARCHAR(8) NOT NULL,"
+        "  updated_at DATETIME NOT NULL"
+        ")"
+    ))
+
+def get_watermark(conn, job):
+    """`job`이 마지막으로 성공한 수집의 종료일(YYYYMMDD)을 반환합니다. 기록이 없으면 None입니다."""
+    _ensure_watermark_table(conn)
+    row = conn.execute(
+        text(f"SELECT last_endde FROM {WATERMARK_TABLE} WHERE job = :job"), {"job": job}
+    ).fetchone()
+    return row[0] if row else None
+
+def set_watermark(conn, job, endde):
+    """`job`의 마지막 성공 수집 종료일을 기록합니다."""
+    _ensure_watermark_table(conn)
+    conn.execute(
+        text(
+            f"INSERT INTO {WATERMARK_TABLE} (job, last_endde, updated_at) VALUES (:job, :endde, :now) "
+            "ON DUPLICATE KEY UPDATE last_endde = VALUES(last_endde), updated_at = VALUES(updated_at)"
+        ),
+        {"job": job, "endde": endde, "now": datetime.now()},
+    )
+
+# --- 데이터 버전 ---
+def bump_data_version(conn):
+    """`data_version` 테이블의 버전을 1 올리고 새 버전 번호를 반환합니다."""
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} ("
+        "  id TINYINT PRIMARY KEY,"
+        "  version BIGINT NOT NULL,"
+        "  updated_at DATETIME NOT NULL"
+        ")"
+    ))
+    conn.execute(
+        text(
+            f"INSERT INTO {DATA_VERSION_TABLE} (id, version, updated_at) VALUES (1, 1, :now) "
+            "ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at)"
+        ),
+        {"now": datetime.now()},
+    )
+    return conn.execute(text(f"SELECT version FROM {DATA_VERSION_TABLE} WHERE id = 1")).scalar()
+
+# --- 인덱스 ---
+def _create_indexes(conn, table, physical_table, skip_column=None):
+    """`TABLE_INDEXES`에 정의된 `table`의 인덱스를 `physical_table`에 만듭니다."""
+    for index_name, columns in TABLE_INDEXES.get(table, {}).items():
+        if columns == [skip_column]:
+            continue # 이미 PRIMARY KEY인 컬럼은 건너뜁니다.
+        conn.execute(text(f"CREATE INDEX {index_name} ON {physical_table} ({', '.join(columns)})"))
+
+# --- 대량 적재 방식 ---
+def _table_dtypes(table, key_col=None):
+    """`table`의 명시적 컬럼 타입입니다. `key_col`을 주면 키와 관리용 컬럼 타입을 더합니다."""
+    dtype = dict(TABLE_DTYPES.get(table, {}))
+    if key_col:
+        dtype.update({
+            key_col: String(64),
+            'row_hash': String(16),
+            'is_closed': Integer(),
+            'closed_at': DateTime(),
+            'updated_at': DateTime(),
+        })
+    return dtype
+
+def _create_empty_table(conn, table, df, dtype_table=None, key_col=None):
+    """
+    `df`의 컬럼 구성과 `TABLE_DTYPES`의 명시적 타입으로 빈 테이블을 만듭니다.
+    `key_col`을 주면 그 컬럼을 PRIMARY KEY로 지정합니다. (행을 쓰기 전에 지정해야
+    InnoDB가 적재 후 테이블 전체를 다시 만들지 않습니다.)
+    """
+    dtype = {col: typ for col, typ in _table_dtypes(dtype_table or table, key_col).items() if col in df.columns}
+    df.head(0).to_sql(table, conn, index=False, dtype=dtype)
+    if key_col:
+        conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({key_col})"))
+
+def _driver_value(value):
+    """pandas/numpy 값을 드라이버가 아는 파이썬 기본 값으로 바꿉니다. (Timestamp -> datetime 등)"""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _rows_for_driver(df):
+    """DataFrame을 DB 드라이버에 넘길 튜플 목록으로 변환합니다. (NaN/NaT -> None)"""
+    values = df.astype(object).where(df.notna(), None)
+    return [tuple(_driver_value(v) for v in row) for row in values.itertuples(index=False, name=None)]
+
+def write_to_sql_multi(conn, table, df, chunksize=INSERT_CHUNKSIZE):
+    """`to_sql(method='multi')`로 청크마다 다중 행 INSERT 문을 만들어 적재합니다."""
+    df.to_sql(table, conn, index=False, if_exists='append', method='multi', chunksize=chunksize)
+
+def write_executemany(conn, table, df, chunksize=INSERT_CHUNKSIZE):
+    """
+    청크 단위 `executemany`로 적재합니다. mysqlconnector는 INSERT ... VALUES 문을
+    다중 행 VALUES 한 문장으로 묶어 전송하므로 행마다 왕복하지 않습니다.
+    """
+    columns = ", ".join(f"`{col}`" for col in df.columns)
+    placeholders = ", ".join(["%s"] * len(df.columns))
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+    rows = _rows_for_driver(df)
+    for start in range(0, len(rows), chunksize):
+        conn.exec_driver_sql(sql, rows[start:start + chunksize])
+
+def write_load_data_infile(conn, table, df, chunksize=None):
+    """
+    DataFrame을 CSV로 직렬화한 뒤 `LOAD DATA LOCAL INFILE`로 한 번에 적재합니다.
+    mysqlconnector는 메모리 버퍼가 아닌 파일 경로만 받으므로, CSV는 임시 파일로 씁니다.
+    NULL은 따옴표 없는 `NULL`로, 문자열은 필요할 때만 큰따옴표로 감쌉니다.
+    """
+    fd, temp_path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            df.to_csv(f, index=False, header=False, na_rep='NULL', quoting=csv.QUOTE_MINIMAL,
+                      date_format='%Y-%m-%d %H:%M:%S', lineterminator='\n')
+
+        columns = ", ".join(f"`{col}`" for col in df.columns)
+        path_literal = temp_path.replace('\\', '/')
+        conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{path_literal}' INTO TABLE {table} CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' ({columns})"
+        )
+    finally:
+        os.remove(temp_path)
+
+BULK_WRITERS = {
+    'multi': write_to_sql_multi,
+    'executemany': write_executemany,
+    'load_data': write_load_data_infile,
+}
+
+def bulk_load(conn, table, df, writer=DEFAULT_BULK_WRITER, dtype_table=None, key_col=None):
+    """빈 테이블을 명시적 타입으로 만든 뒤, 선택한 대량 적재 방식으로 `df`를 씁니다."""
+    if writer not in BULK_WRITERS:
+        raise ValueError(f"알 수 없는 적재 방식입니다: {writer} (사용 가능: {', '.join(BULK_WRITERS)})")
+    _create_empty_table(conn, table, df, dtype_table, key_col)
+    if not df.empty:
+        BULK_WRITERS[writer](conn, table, df)
+
+# --- 블루/그린 교체 ---
+def swap_in_tables(engine, tables, writer=DEFAULT_BULK_WRITER):
+    """
+    `{테이블 이름: DataFrame}`을 스테이징 테이블에 적재한 뒤 운영 테이블과 한 번에 교체하고,
+    새 데이터 버전 번호를 반환합니다.
+
+    1. `<table>_next`를 증분 적재와 같은 형식(`TABLE_KEYS`의 키 컬럼 PRIMARY KEY +
+       `BOOKKEEPING_COLUMNS`)으로 만들고, `writer` 방식(`BULK_WRITERS` 참고)으로
+       데이터를 적재합니다. 모든 행은 열린 상태(`is_closed = 0`)로 들어갑니다.
+    2. 스테이징 테이블에 인덱스를 만듭니다.
+    3. `RENAME TABLE`로 모든 테이블을 한 문장 안에서 교체합니다. (원자적)
+    4. 이전 테이블(`<table>_old`)을 삭제하고 데이터 버전을 올립니다.
+    """
+    now = datetime.now()
+    with engine.begin() as conn:
+        for table, df in tables.items():
+            key_col = TABLE_KEYS[table]
+            staging = f"{table}{STAGING_SUFFIX}"
+            conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+            df = _with_bookkeeping(df, key_col, now)
+            bulk_load(conn, staging, df, writer=writer, dtype_table=table, key_col=key_col)
+            _create_indexes(conn, table, staging, skip_column=key_col)
+
+    # DDL은 MySQL에서 암묵적으로 커밋되므로, 교체는 별도의 단일 RENAME 문으로 수행합니다.
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        renames = []
+        retired = []
+        for table in tables:
+            if inspector.has_table(table):
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}{RETIRED_SUFFIX}"))
+                renames.append(f"{table} TO {table}{RETIRED_SUFFIX}")
+                retired.append(f"{table}{RETIRED_SUFFIX}")
+            renames.append(f"{table}{STAGING_SUFFIX} TO {table}")
+        conn.execute(text(f"RENAME TABLE {', '.join(renames)}"))
+
+        for table in retired:
+            conn.execute(text(f"DROP TABLE {table}"))
+        return bump_data_version(conn)
+
+# --- 증분 적재 ---
+def compute_row_hash(df, key_col):
+    """키와 관리용 컬럼을 제외한 내용 컬럼으로 행마다 해시(16자리 16진수 문자열)를 계산합니다."""
+    content_cols = sorted(c for c in df.columns if c != key_col and c not in BOOKKEEPING_COLUMNS)
+    hashes = pd.util.hash_pandas_object(df[content_cols].astype(str), index=False)
+    return hashes.map(lambda h: f"{h:016x}")
+
+def _with_bookkeeping(df, key_col, now):
+    """
+    키가 없는 행을 빼고 키가 중복된 행은 마지막 것만 남긴 뒤, 관리용 컬럼
+    (`BOOKKEEPING_COLUMNS`)을 채운 사본을 반환합니다.
+    """
+    if key_col not in df.columns:
+        raise ValueError(f"키 컬럼 '{key_col}'이(가) 데이터에 없습니다.")
+    missing = int(df[key_col].isna().sum())
+    if missing:
+        print(f"경고: 키 컬럼 '{key_col}'이(가) 비어 있는 행 {missing}건은 적재하지 않습니다.")
+    df = df[df[key_col].notna()].drop_duplicates(subset=key_col, keep='last').copy()
+    df[key_col] = df[key_col].astype(str)
+    df['row_hash'] = compute_row_hash(df, key_col)
+    df['is_closed'] = 0
+    df['closed_at'] = None
+    df['updated_at'] = now
+    return df
+
+def _migrate_to_incremental(conn, table, key_col, columns):
+    """
+    관리용 컬럼이 없는 예전 형식의 테이블을 그 자리에서 증분 적재 형식으로 바꿉니다.
+    (테이블을 지우지 않으며, 기존 행은 모두 열린 상태로 남습니다.)
+
+    1. 키 컬럼이 없거나, 키가 비었거나 중복된 행이 있으면 바꾸지 않고 예외를 발생시킵니다.
+       이때는 `python update_data.py --mode full`로 테이블을 다시 만들어야 합니다.
+    2. 관리용 컬럼을 추가하고 키 컬럼에 PRIMARY KEY를 지정합니다.
+    3. 기존 행의 내용 해시(`row_hash`)를 계산해 채웁니다.
+    """
+    rebuild_hint = "`python update_data.py --mode full`로 테이블을 다시 만든 뒤 실행하세요."
+    if key_col not in columns:
+        raise RuntimeError(f"'{table}' 테이블에 키 컬럼 '{key_col}'이(가) 없어 증분 적재 형식으로 바꿀 수 없습니다. {rebuild_hint}")
+    total, distinct, missing = conn.execute(text(
+        f"SELECT COUNT(*), COUNT(DISTINCT {key_col}), SUM(CASE WHEN {key_col} IS NULL THEN 1 ELSE 0 END) FROM {table}"
+    )).fetchone()
+    if missing or total != distinct:
+        raise RuntimeError(
+            f"'{table}' 테이블의 '{key_col}' 값이 비었거나 중복된 행이 있어 증분 적재 형식으로 바꿀 수 없습니다. {rebuild_hint}"
+        )
+
+    print(f"정보: '{table}' 테이블을 증분 적재 형식으로 변환합니다. (기존 행 {total}건 유지)")
+    dtype = _table_dtypes(table, key_col)
+    for col in BOOKKEEPING_COLUMNS:
+        if col not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN `{col}` {dtype[col].compile(dialect=conn.dialect)}"))
+    conn.execute(text(f"ALTER TABLE {table} MODIFY `{key_col}` {dtype[key_col].compile(dialect=conn.dialect)} NOT NULL"))
+    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({key_col})"))
+    conn.execute(text(f"UPDATE {table} SET is_closed = 0, updated_at = :now"), {"now": datetime.now()})
+
+    existing = pd.read_sql(text(f"SELECT * FROM {table}"), conn)
+    if not existing.empty:
+        existing[key_col] = existing[key_col].astype(str)
+        hashes = compute_row_hash(existing, key_col)
+        params = [{"row_hash": h, "key": k} for k, h in zip(existing[key_col], hashes)]
+        for start in range(0, len(params), INSERT_CHUNKSIZE):
+            conn.execute(
+                text(f"UPDATE {table} SET row_hash = :row_hash WHERE {key_col} = :key"),
+                params[start:start + INSERT_CHUNKSIZE],
+            )
+
+def _ensure_incremental_table(conn, table, df, key_col):
+    """
+    증분 적재용 테이블(키 컬럼 PRIMARY KEY + 관리용 컬럼)이 없으면 새로 만듭니다.
+    테이블이 예전 형식이면 그 자리에서 변환하고(`_migrate_to_incremental`),
+    `df`에 새로 생긴 컬럼만 추가합니다.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        _create_empty_table(conn, table, df, key_col=key_col)
+        _create_indexes(conn, table, table, skip_column=key_col)
+        return
+
+    columns = {col['name'] for col in inspector.get_columns(table)}
+    if 'row_hash' not in columns:
+        _migrate_to_incremental(conn, table, key_col, columns)
+    for col in [col for col in df.columns if col not in columns and col not in BOOKKEEPING_COLUMNS]:
+        col_type = TABLE_DTYPES.get(table, {}).get(col, Text())
+        print(f"정보: '{table}' 테이블에 '{col}' 컬럼을 추가합니다.")
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN `{col}` {col_type.compile(dialect=conn.dialect)}"))
+
+def _upsert_rows(conn, table, df, key_col, chunksize=INSERT_CHUNKSIZE):
+    """
+    `df`의 행을 청크 단위 `executemany`의 INSERT ... ON DUPLICATE KEY UPDATE로 반영합니다.
+    임시 테이블(DDL)을 쓰지 않으므로 호출한 트랜잭션 안에서 함께 커밋/롤백됩니다.
+    """
+    columns = ", ".join(f"`{col}`" for col in df.columns)
+    placeholders = ", ".join(f":c{i}" for i in range(len(df.columns)))
+    updates = ", ".join(f"`{col}` = VALUES(`{col}`)" for col in df.columns if col != key_col)
+    sql = text(f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}")
+    rows = [{f"c{i}": value for i, value in enumerate(row)} for row in _rows_for_driver(df)]
+    for start in range(0, len(rows), chunksize):
+        conn.execute(sql, rows[start:start + chunksize])
+
+def upsert_changed_rows(conn, table, df, key_col, close_scope_sql=None, close_scope_params=None, close_vanished=True):
+    """
+    `df`를 `table`에 증분 반영하고 처리 건수를 딕셔너리로 반환합니다.
+
+    - 키가 없던 행은 추가하고, 내용 해시가 달라졌거나 닫혀 있던 행은 갱신합니다.
+    - 내용이 같은 행은 건드리지 않습니다.
+    - 이미 열려 있는 행 중 `close_scope_sql` 조건(생략 시 전체)에 해당하지만 이번 `df`에
+      없는 행은 `is_closed = 1`로 표시합니다.
+
+    Args:
+        conn: SQLAlchemy Connection (트랜잭션 안에서 호출하는 것을 권장합니다)
+        table (str): 대상 테이블 이름
+        df (pd.DataFrame): 반영할 데이터. `key_col` 컬럼이 반드시 있어야 합니다.
+        key_col (str): 행을 식별하는 키 컬럼
+        close_scope_sql (str, optional): 사라진 행을 판단할 범위를 제한하는 SQL 조건
+        close_scope_params (dict, optional): `close_scope_sql`의 바인딩 파라미터
+        close_vanished (bool): False이면 사라진 행을 닫지 않습니다. `df`가 수집 범위의 일부만
+            담고 있을 때(일부 페이지 수집 실패 등) 사용합니다.
+    """
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'closed': 0}
+
+    now = datetime.now()
+    df = _with_bookkeeping(df, key_col, now)
+
+    _ensure_incremental_table(conn, table, df, key_col)
+
+    existing = pd.read_sql(text(f"SELECT {key_col}, row_hash, is_closed FROM {table}"), conn)
+    merged = df[[key_col, 'row_hash']].merge(existing, on=key_col, how='left', suffixes=('', '_old'))
+    is_new = merged['row_hash_old'].isna()
+    is_changed = ~is_new & ((merged['row_hash'] != merged['row_hash_old']) | (merged['is_closed'] == 1))
+    stats['inserted'] = int(is_new.sum())
+    stats['updated'] = int(is_changed.sum())
+    stats['unchanged'] = int(len(merged) - stats['inserted'] - stats['updated'])
+
+    # 1. 새로 생기거나 바뀐 행만 반영합니다.
+    delta = df[(is_new | is_changed).to_numpy()]
+    if not delta.empty:
+        _upsert_rows(conn, table, delta, key_col)
+
+    # 2. 수집 범위 안에서 사라진 행은 닫힘으로 표시합니다.
+    if not close_vanished:
+        return stats
+    scope_sql = f" AND ({close_scope_sql})" if close_scope_sql else ""
+    open_keys = pd.read_sql(
+        text(f"SELECT {key_col} FROM {table} WHERE is_closed = 0{scope_sql}"), conn, params=close_scope_params
+    )[key_col]
+    vanished = sorted(set(open_keys) - set(df[key_col]))
+    if vanished:
+        conn.execute(
+            text(f"UPDATE {table} SET is_closed = 1, closed_at = :now WHERE {key_col} = :key"),
+            [{"now": now, "key": key} for key in vanished],
+        )
+    stats['closed'] = len(vanished)
+    return stats
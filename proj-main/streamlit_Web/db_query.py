@@ -0,0 +1,254 @@
+# ==============================================================================
+# db_query.py - DB 조건 조회(SQL 푸시다운) 모듈
+# ==============================================================================
+# 이 파일은 스냅샷 없이 DB에서 데이터를 읽을 때 사용하는 필터 조회 엔진
+# `SqlFilterEngine`을 제공합니다. `filter_engine.FilterEngine`과 같은 방식으로
+# 호출되지만, 동물 테이블 전체를 메모리에 올리지 않고 사이드바 조건(공고일, 축종,
+# 지역, 검색어)을 매개변수화된 SQL의 WHERE 절로 DB에 넘겨 조건에 맞는 행만 읽습니다.
+#
+# [조회 방식]
+# - **공고일:** `notice_date >= 시작일 AND notice_date < 종료일 다음 날`
+# - **축종:** 선택한 품종 이름을 품종 코드 목록으로 바꿔 `species IN (...)`
+#   ('기타'는 품종 목록에 없는 코드도 포함합니다.)
+# - **지역:** 보호소 주소 접두어로 `shelters` 테이블을 찾는 하위 쿼리
+#   (`shelter_name IN (SELECT ... WHERE careAddr LIKE '접두어%')`)
+# - **검색어:** 두 글자 이상이면 이름/이야기/성격의 부분 문자열(LIKE)과 이름에
+#   검색어가 들어가는 품종 코드로, 한 글자면 이름만 찾습니다. (DB 조회에는 n-gram
+#   색인을 쓰지 않으므로 정확한 부분 문자열 검색입니다.)
+# - **컬럼:** `SELECT *` 대신 화면과 다운로드에 쓰는 컬럼(`ANIMAL_COLUMNS`)만 읽고,
+#   닫힌 행(`is_closed = 1`)은 SQL에서 제외합니다.
+# - **정렬:** 정렬 옵션을 `ORDER BY`로 DB에 맡깁니다. (값이 없는 행은 맨 뒤)
+#
+# 보호소 테이블은 크기가 작으므로 데이터 버전마다 한 번 메모리에 읽어 두고,
+# 조건에 맞는 동물이 있는 보호소를 여기서 고릅니다.
+# 사용하는 인덱스는 `db_loader.TABLE_INDEXES`에 정의되어 있습니다.
+# 같은 조건의 반복 조회는 `app.get_filtered_data`의 결과 캐시와 이 엔진의
+# 보호소별 결과 캐시(`utils.LRUCache`)에서 바로 가져옵니다.
+# ==============================================================================
+
+import unicodedata
+from datetime import timedelta
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+from filter_engine import FilterResult, normalize_filter_key, region_prefix
+from search_index import normalize_text
+from utils import OTHER_SPECIES, LRUCache, parse_birth_year
+
+# 화면(카드, 지도 대표 사진)과 다운로드에 쓰는 동물 컬럼
+ANIMAL_COLUMNS = [
+    'desertion_no', 'shelter_name', 'animal_name', 'species', 'age', 'birth_year',
+    'image_url', 'personality', 'story', 'notice_date', 'sex', 'process_state',
+    'careAddr', 'happen_date',
+]
+
+SORT_SQL = {
+    "최신 공고일 순": ("notice_date", "DESC"),
+    "오래된 공고일 순": ("notice_date", "ASC"),
+    "나이 어린 순": ("birth_year", "DESC"),
+    "나이 많은 순": ("birth_year", "ASC"),
+}
+
+# 보호소별 동물 조회 결과를 보관할 최대 개수
+SHELTER_CACHE_SIZE = 64
+
+LIKE_ESCAPE = '!'
+
+def _like_pattern(value, prefix_only=False):
+    """LIKE 특수 문자를 이스케이프한 부분 문자열(또는 접두어) 패턴을 만듭니다."""
+    escaped = (value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+                    .replace('%', f'{LIKE_ESCAPE}%')
+                    .replace('_', f'{LIKE_ESCAPE}_'))
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+def like_query_text(query):
+    """
+    검색어를 LIKE 비교용으로 정규화합니다. (NFKC, 소문자, 앞뒤 공백 제거)
+    컬럼 값의 공백은 그대로 비교되므로 `normalize_text`와 달리 안쪽 공백은 남깁니다.
+    """
+    return unicodedata.normalize('NFKC', query or "").lower().strip()
+
+class AnimalPredicate:
+    """
+    사이드바 조건을 옮긴 SQL WHERE 절과 매개변수입니다.
+    `SqlFilterEngine.query`가 `FilterResult.animal_mask`로 돌려주며,
+    `SqlFilterEngine.shelter_animals`에 그대로 넘겨 같은 조건으로 다시 조회합니다.
+    """
+    def __init__(self, key, clauses, params, expanding):
+        self.key = key              # 정규화된 조건 (결과 캐시 키)
+        self.clauses = clauses      # AND로 묶을 조건 목록
+        self.params = params
+        self.expanding = expanding  # IN (...) 목록으로 펼칠 매개변수 이름
+
+    def where_sql(self, *extra_clauses):
+        clauses = [*self.clauses, *extra_clauses]
+        return " AND ".join(clauses) if clauses else "1 = 1"
+
+class SqlFilterEngine:
+    """
+    DB에 조건을 넘겨 조회하는 필터 조회 엔진입니다. `FilterEngine`과 같은 메서드를 제공합니다.
+
+    Args:
+        db_engine (sqlalchemy.engine.Engine): 조회용 DB 엔진
+        shelters (pd.DataFrame): `load_data("shelters")` 결과
+        kind_map (dict): 품종 코드 → 품종 이름 (`get_kind_list` 결과)
+        data_key (tuple, optional): 데이터의 `(버전, 출처)`
+        prepare_animals (callable, optional): 읽어 온 동물 DataFrame을 화면용으로 바꾸는 함수
+            (품종 이름 변환, 로컬 이미지 경로 추가 등)
+    """
+    # 검색어 정규화 방식 (`normalize_filter_key`에 넘깁니다). LIKE 패턴과 같은 문자열이어야 합니다.
+    normalize_query = staticmethod(like_query_text)
+
+    def __init__(self, db_engine, shelters, kind_map, data_key=None, prepare_animals=None):
+        self.db_engine = db_engine
+        self.shelters = shelters
+        self.kind_map = kind_map
+        self.data_key = data_key
+        self.prepare_animals = prepare_animals or (lambda df: df)
+        self.is_empty = shelters.empty
+        self._shelter_cache = LRUCache(SHELTER_CACHE_SIZE)
+        self._addresses = shelters['careAddr'].astype('string').fillna('') if 'careAddr' in shelters.columns \
+            else pd.Series('', index=shelters.index, dtype='string')
+
+        columns = {col['name'] for col in inspect(db_engine).get_columns('animals')}
+        self.animal_columns = [col for col in ANIMAL_COLUMNS if col in columns]
+        self.has_birth_year = 'birth_year' in columns
+        self.has_personality = 'personality' in columns
+        self.open_clause = "a.is_closed = 0" if 'is_closed' in columns else None
+
+    def _numeric_column(self, shelters, column):
+        if column not in shelters.columns:
+            return 0
+        return int(pd.to_numeric(shelters[column], errors='coerce').fillna(0).sum())
+
+    # --- 조건 ---
+    def species_codes(self, species):
+        """품종 이름 목록을 품종 코드 목록으로 바꿉니다."""
+        wanted = set(species)
+        return sorted(code for code, name in self.kind_map.items() if name in wanted)
+
+    def predicate(self, start_date, end_date, sido, sigungu, species, query):
+        """사이드바 조건을 `AnimalPredicate`로 바꿉니다."""
+        key = normalize_filter_key(self.data_key, start_date, end_date, sido, sigungu, species, query, None,
+                                   normalize_query=self.normalize_query)
+        clauses = ["a.notice_date >= :start_date", "a.notice_date < :end_date"]
+        params = {
+            'start_date': pd.Timestamp(start_date).normalize().to_pydatetime(),
+            'end_date': (pd.Timestamp(end_date).normalize() + timedelta(days=1)).to_pydatetime(),
+        }
+        expanding = []
+        if self.open_clause:
+            clauses.append(self.open_clause)
+
+        if species:
+            species_clauses = []
+            codes = self.species_codes(species)
+            if codes:
+                species_clauses.append("a.species IN :species")
+                params['species'] = codes
+                expanding.append('species')
+            if OTHER_SPECIES in species:
+                species_clauses.append("a.species IS NULL")
+                if self.kind_map:
+                    species_clauses.append("a.species NOT IN :known_species")
+                    params['known_species'] = sorted(self.kind_map)
+                    expanding.append('known_species')
+                else:
+                    species_clauses.append("1 = 1")
+            clauses.append(f"({' OR '.join(species_clauses)})" if species_clauses else "1 = 0")
+
+        prefix = region_prefix(sido, sigungu)
+        if prefix is not None:
+            clauses.append(
+                "a.shelter_name IN (SELECT s.shelter_name FROM shelters s "
+                f"WHERE s.careAddr LIKE :region ESCAPE '{LIKE_ESCAPE}')"
+            )
+            params['region'] = _like_pattern(prefix, prefix_only=True)
+
+        # 캐시 키와 LIKE 패턴은 같은 문자열(`like_query_text`)로 만들고,
+        # 한 글자 검색 여부와 품종 이름 비교는 그 문자열을 공백 없이 정규화해 판단합니다.
+        like_text = self.normalize_query(query)
+        text_query = normalize_text(like_text)
+        if text_query:
+            params['query'] = _like_pattern(like_text)
+            if len(text_query) < 2:
+                clauses.append(f"a.animal_name LIKE :query ESCAPE '{LIKE_ESCAPE}'")
+            else:
+                text_clauses = [f"a.{col} LIKE :query ESCAPE '{LIKE_ESCAPE}'"
+                                for col in ['animal_name', 'story'] + (['personality'] if self.has_personality else [])]
+                matching_codes = sorted(code for code, name in self.kind_map.items()
+                                        if text_query in normalize_text(name))
+                if matching_codes:
+                    text_clauses.append("a.species IN :query_species")
+                    params['query_species'] = matching_codes
+                    expanding.append('query_species')
+                clauses.append(f"({' OR '.join(text_clauses)})")
+        return AnimalPredicate(key, clauses, params, expanding)
+
+    # --- SQL 실행 ---
+    def _select_animals(self, predicate, extra_clauses=(), extra_params=None, sort_by=None):
+        columns = ", ".join(f"a.{col}" for col in self.animal_columns)
+        sql = f"SELECT {columns} FROM animals a WHERE {predicate.where_sql(*extra_clauses)}"
+        sort = SORT_SQL.get(sort_by)
+        if sort and (sort[0] != 'birth_year' or self.has_birth_year):
+            column, direction = sort
+            sql += f" ORDER BY a.{column} IS NULL, a.{column} {direction}, a.desertion_no"
+        statement = text(sql).bindparams(*[bindparam(name, expanding=True) for name in predicate.expanding])
+        with self.db_engine.connect() as conn:
+            animals = pd.read_sql(statement, conn, params={**predicate.params, **(extra_params or {})})
+
+        if sort and sort[0] == 'birth_year' and not self.has_birth_year:
+            # 출생 연도 컬럼이 없는 이전 테이블은 읽은 결과만 정렬합니다.
+            birth_year = parse_birth_year(animals['age']).astype('Float64')
+            order = birth_year.sort_values(ascending=(sort[1] == "ASC"), na_position='last', kind='stable').index
+            animals = animals.loc[order].reset_index(drop=True)
+        return self.prepare_animals(animals)
+
+    def _region_mask(self, sido, sigungu):
+        prefix = region_prefix(sido, sigungu)
+        if prefix is None:
+            return pd.Series(True, index=self.shelters.index)
+        return self._addresses.str.startswith(prefix).astype(bool)
+
+    # --- 조회 ---
+    def query(self, start_date, end_date, sido, sigungu, species, query, sort_by):
+        """사이드바 필터 조건으로 동물/보호소를 조회하여 `FilterResult`로 반환합니다."""
+        if self.is_empty:
+            return FilterResult(pd.DataFrame(), pd.DataFrame(), 0, 0, 0, 0)
+
+        predicate = self.predicate(start_date, end_date, sido, sigungu, species, query)
+        final_animals = self._select_animals(predicate, sort_by=sort_by)
+
+        shelter_mask = (self.shelters['shelter_name'].isin(final_animals['shelter_name'].unique())
+                        & self._region_mask(sido, sigungu))
+        filtered_shelters = self.shelters[shelter_mask.to_numpy()]
+        return FilterResult(
+            final_animals,
+            filtered_shelters,
+            filtered_shelters['shelter_name'].nunique(),
+            len(final_animals),
+            self._numeric_column(filtered_shelters, 'long_term'),
+            self._numeric_column(filtered_shelters, 'adopted'),
+            predicate,
+        )
+
+    def shelter_animals(self, shelter_name, animal_mask=None):
+        """
+        보호소에 속한 동물을 DB에서 조회합니다. (`idx_animals_shelter_name` 사용)
+        `animal_mask`(`FilterResult.animal_mask`, `AnimalPredicate`)를 주면 그중 조건에 맞는 동물만 남깁니다.
+        """
+        predicate = animal_mask if isinstance(animal_mask, AnimalPredicate) else \
+            AnimalPredicate((self.data_key,), [self.open_clause] if self.open_clause else [], {}, [])
+        return self._shelter_cache.get_or_compute(
+            (shelter_name, predicate.key),
+            lambda: self._select_animals(predicate, ["a.shelter_name = :shelter_name"], {'shelter_name': shelter_name}),
+        )
+
+    def animals_by_id(self, desertion_nos):
+        """유기번호 목록에 해당하는 동물을 DB에서 조회합니다. (`idx_animals_desertion_no` 사용)"""
+        desertion_nos = [str(no) for no in desertion_nos]
+        if not desertion_nos:
+            return pd.DataFrame(columns=self.animal_columns)
+        predicate = AnimalPredicate(None, [self.open_clause] if self.open_clause else [], {}, ['desertion_nos'])
+        return self._select_animals(predicate, ["a.desertion_no IN :desertion_nos"], {'desertion_nos': desertion_nos})
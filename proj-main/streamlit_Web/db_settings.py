@@ -0,0 +1,74 @@
+# ==============================================================================
+# db_settings.py - DB 접속 및 커넥션 풀 설정 모듈
+# ==============================================================================
+# 이 파일은 `config.ini`의 DB 설정으로 SQLAlchemy 엔진을 만드는 공통 함수를
+# 제공합니다. 앱(`data_manager.py`)과 적재 스크립트(`update_data.py`)가 같은
+# 방식으로 접속 주소와 커넥션 풀 옵션을 구성하도록 합니다.
+#
+# [커넥션 풀 설정] ([DB] 또는 [DB_REPLICA] 섹션, 생략하면 `POOL_DEFAULTS` 사용)
+# - `pool_size`: 풀에 유지할 연결 수
+# - `max_overflow`: `pool_size`를 넘어 잠시 더 열 수 있는 연결 수
+# - `pool_timeout`: 풀에서 연결을 기다릴 최대 시간(초)
+# - `pool_recycle`: 이 시간(초)보다 오래된 연결은 다시 연결합니다.
+#   (MySQL `wait_timeout`으로 서버가 먼저 끊은 연결을 쓰지 않도록 더 짧게 둡니다.)
+# - `pool_pre_ping`: 풀에서 연결을 꺼낼 때 살아 있는지 먼저 확인합니다.
+#
+# [읽기 전용 복제본]
+# - `config.ini`에 [DB_REPLICA] 섹션이 있으면 앱의 조회는 복제본으로 보냅니다.
+#   섹션에 없는 항목(user, password 등)은 [DB] 섹션의 값을 그대로 사용합니다.
+# - `update_data.py`의 쓰기는 항상 [DB](주 DB)로 보냅니다.
+# ==============================================================================
+
+import configparser
+
+from sqlalchemy import create_engine
+
+PRIMARY_SECTION = 'DB'
+REPLICA_SECTION = 'DB_REPLICA'
+
+POOL_DEFAULTS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+    'pool_pre_ping': True,
+}
+
+def database_url(db_config):
+    """DB 설정(섹션 또는 dict)으로 SQLAlchemy 접속 주소를 만듭니다."""
+    return (
+        f"mysql+mysqlconnector://{db_config['user']}:{db_config['password']}"
+        f"@{db_config['host']}:{db_config.get('port', 3306)}/{db_config['database']}"
+    )
+
+def pool_options(db_config):
+    """DB 설정에서 커넥션 풀 옵션을 읽어 `create_engine` 인자로 반환합니다."""
+    options = {}
+    for key, default in POOL_DEFAULTS.items():
+        value = db_config.get(key)
+        if value is None or str(value).strip() == '':
+            options[key] = default
+        elif isinstance(default, bool):
+            states = configparser.ConfigParser.BOOLEAN_STATES
+            if str(value).strip().lower() not in states:
+                raise ValueError(f"'{key}' 값은 true/false 중 하나여야 합니다: {value}")
+            options[key] = states[str(value).strip().lower()]
+        else:
+            options[key] = int(value)
+    return options
+
+def read_config_section(config, replica=False):
+    """
+    `replica`가 True이고 [DB_REPLICA] 섹션이 있으면 [DB] 위에 복제본 설정을 덮어쓴 dict를,
+    그렇지 않으면 [DB] 섹션을 반환합니다.
+    """
+    if replica and config.has_section(REPLICA_SECTION):
+        return {**config[PRIMARY_SECTION], **config[REPLICA_SECTION]}
+    return config[PRIMARY_SECTION]
+
+def create_db_engine(db_config, **kwargs):
+    """
+    DB 설정으로 커넥션 풀 옵션을 적용한 SQLAlchemy 엔진을 만듭니다.
+    엔진을 만들 때는 접속하지 않으며, 연결은 처음 사용할 때 풀에서 엽니다.
+    """
+    return create_engine(database_url(db_config), **pool_options(db_config), **kwargs)
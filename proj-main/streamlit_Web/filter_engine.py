@@ -0,0 +1,326 @@
+# ==============================================================================
+# filter_engine.py - 사이드바 필터 조회 엔진
+# ==============================================================================
+# 이 파일은 `app.py`의 사이드바 필터(공고일, 이름 검색, 지역, 축종)를 처리하는
+# 조회 엔진을 제공합니다. 엔진은 데이터 버전마다 한 번만 만들어지며, 이후의
+# 조회는 미리 계산해 둔 배열끼리의 불리언 마스크 연산으로 처리합니다.
+#
+# [미리 계산하는 항목]
+# - **공고일:** 1970-01-01 기준 일수(int64). 날짜 비교가 정수 비교가 됩니다.
+# - **축종:** 품종 이름의 범주 코드. 축종 필터는 코드 목록에 대한 `np.isin`입니다.
+# - **보호소 코드:** 동물/보호소 행마다 보호소 이름의 정수 코드를 두고,
+#   보호소별 동물 행 범위(`shelter_offsets`)를 만들어 둡니다.
+# - **지역:** (시/도, 시/군/구) 조합별 보호소 마스크를 처음 조회될 때 주소
+#   접두어로 한 번 계산하고 이후에는 재사용합니다. 시/군/구 이름에 띄어쓰기가
+#   들어가는 경우(예: "수원시 장안구")가 있어 주소를 단어로 나누지 않습니다.
+# - **검색어:** 두 글자 이상이면 이름/품종/이야기/성격에 대한 n-gram 색인
+#   (`search_index.SearchIndex`)으로 찾고, 한 글자면 소문자로 바꾼 동물 이름에서
+#   부분 문자열로 찾습니다. 검색어는 `search_index.normalize_text`로 정규화합니다.
+# - **정렬 순서:** 정렬 옵션 4가지 각각에 대한 전체 행의 정렬 순서(순열).
+#   필터 결과의 정렬은 이 순서에서 조건에 맞는 행만 골라내는 것으로 끝납니다.
+#   나이순 정렬은 `update_data.py`가 적재할 때 계산한 `birth_year`를 사용합니다.
+#
+# 같은 조건의 반복 조회(탭 전환, 찜하기 등으로 인한 rerun)는 `normalize_filter_key`로
+# 만든 키로 결과 캐시(`utils.LRUCache`)에서 바로 가져옵니다. (`app.get_filtered_data` 참고)
+#
+# 원본 DataFrame은 수정하지 않으므로 `st.cache_data`로 캐시된 데이터를 그대로
+# 넘겨도 안전합니다.
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+from search_index import contains_query, factorize_fields, normalize_text
+from utils import parse_birth_year
+
+SORT_OPTIONS = ["최신 공고일 순", "오래된 공고일 순", "나이 어린 순", "나이 많은 순"]
+ALL_REGIONS = "전체"
+
+# 공고일이 없는 행에 쓰는 값. 어떤 날짜 범위에도 포함되지 않습니다.
+MISSING_DAY = np.iinfo(np.int64).min
+
+def _to_day_number(values):
+    """날짜(또는 datetime) 배열을 1970-01-01 기준 일수(int64)로 변환합니다. 결측은 `MISSING_DAY`입니다."""
+    dates = pd.to_datetime(pd.Series(values), errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    days[dates.isna().to_numpy()] = MISSING_DAY
+    return days
+
+def _day_number(date_value):
+    return np.datetime64(pd.Timestamp(date_value).date(), 'D').astype(np.int64)
+
+def region_prefix(sido, sigungu):
+    """
+    지역 조건을 보호소 주소의 접두어로 바꿉니다. 지역 조건이 없으면 None을 반환합니다.
+    시/군/구가 선택되면 "시/도 시/군/구", 시/도만 선택되면 "시/도"입니다.
+    """
+    if sigungu != ALL_REGIONS:
+        return f"{sido} {sigungu}"
+    if sido != ALL_REGIONS:
+        return sido
+    return None
+
+def normalize_filter_key(data_key, start_date, end_date, sido, sigungu, species, query, sort_by,
+                         normalize_query=normalize_text):
+    """
+    필터 조건을 결과 캐시의 키로 쓸 수 있는 튜플로 정규화합니다.
+    축종은 선택 순서와 무관하게 정렬하고, 검색어는 조회할 엔진이 쓰는 방식(`normalize_query`,
+    엔진의 같은 이름 속성)으로 정규화합니다. 키가 같으면 조회 결과도 같아야 하기 때문입니다.
+    """
+    return (
+        data_key,
+        pd.Timestamp(start_date).date().isoformat(),
+        pd.Timestamp(end_date).date().isoformat(),
+        sido,
+        sigungu,
+        tuple(sorted(species or [])),
+        normalize_query(query or ""),
+        sort_by,
+    )
+
+class FilterResult:
+    """
+    `FilterEngine.query`의 결과입니다. `app.get_filtered_data`의 반환값과 같은 항목을 담습니다.
+    `animal_mask`는 같은 엔진의 `shelter_animals`에 넘겨 조건에 맞는 동물만 다시 찾을 때 씁니다.
+    `FilterEngine`에서는 전체 동물 행 기준으로 조건에 맞는 행을 표시한 불리언 배열이고,
+    `db_query.SqlFilterEngine`에서는 조건을 옮긴 SQL(`AnimalPredicate`)입니다.
+    """
+    def __init__(self, animals, shelters, shelter_count, animal_count, long_term_count, adopted_count,
+                 animal_mask=None):
+        self.animals = animals
+        self.shelters = shelters
+        self.shelter_count = shelter_count
+        self.animal_count = animal_count
+        self.long_term_count = long_term_count
+        self.adopted_count = adopted_count
+        self.animal_mask = animal_mask
+
+    def as_tuple(self):
+        return (self.animals, self.shelters, self.shelter_count, self.animal_count,
+                self.long_term_count, self.adopted_count, self.animal_mask)
+
+class FilterEngine:
+    """
+    동물/보호소 데이터에 대한 필터 조회 엔진입니다.
+
+    Args:
+        animals (pd.DataFrame): `load_data("animals")` 결과
+        shelters (pd.DataFrame): `load_data("shelters")` 결과
+        data_key (tuple, optional): 데이터의 `(버전, 출처)`
+        search_index (SearchIndex, optional): 검색어 조회에 쓸 n-gram 색인
+    """
+    # 검색어 정규화 방식 (`normalize_filter_key`에 넘깁니다). 색인과 부분 문자열 비교 모두 공백을 무시합니다.
+    normalize_query = staticmethod(normalize_text)
+
+    def __init__(self, animals, shelters, data_key=None, search_index=None):
+        self.data_key = data_key  # 엔진을 만든 데이터의 (버전, 출처). 결과 캐시 키에 사용
+        self.animals = animals
+        self.shelters = shelters
+        self.search_index = search_index
+        self.is_empty = animals.empty or shelters.empty
+        if self.is_empty:
+            return
+
+        # --- 동물 컬럼 ---
+        self.notice_day = _to_day_number(animals['notice_date'])
+        species = pd.Categorical(animals['species'])
+        self.species_codes = species.codes
+        self.species_categories = species.categories
+        self.name_lower = animals['animal_name'].astype('string').str.lower()
+        self._search_positions = self._align_search_index(animals)
+        self._search_fields = None  # 색인 후보 확인용 필드 코드. 첫 검색 때 만듭니다.
+
+        # --- 보호소 코드 및 보호소별 동물 행 범위 ---
+        shelter_names = pd.Categorical(animals['shelter_name'])
+        self.shelter_name_categories = shelter_names.categories
+        self.animal_shelter_code = shelter_names.codes.astype(np.int64)
+        order = np.argsort(self.animal_shelter_code, kind='stable')
+        counts = np.bincount(self.animal_shelter_code[self.animal_shelter_code >= 0],
+                             minlength=len(self.shelter_name_categories))
+        self.animals_by_shelter = order[self.animal_shelter_code[order] >= 0]
+        self.shelter_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.shelter_row_code = self.shelter_name_categories.get_indexer(shelters['shelter_name'])
+
+        # --- 지역 ---
+        self._addresses = shelters['careAddr'].astype('string').fillna('')
+        self._region_masks = {}
+
+        # --- 정렬 옵션별 전체 정렬 순서 ---
+        self.sort_orders = self._build_sort_orders(animals)
+
+        # --- KPI 집계용 ---
+        self.long_term = self._numeric_column(shelters, 'long_term')
+        self.adopted = self._numeric_column(shelters, 'adopted')
+
+    def _align_search_index(self, animals):
+        """
+        색인의 문서 번호를 이 엔진의 동물 행 위치로 바꾸는 배열을 만듭니다.
+        색인과 동물 데이터의 행 순서가 같으면(스냅샷에서 함께 읽은 경우) None을 반환합니다.
+        """
+        if self.search_index is None:
+            return None
+        keys = animals['desertion_no'].astype('string').fillna('').to_numpy(dtype=str)
+        index_keys = np.asarray(self.search_index.desertion_no)
+        if len(keys) == len(index_keys) and np.array_equal(keys, index_keys):
+            return None
+        return pd.Index(keys).get_indexer(index_keys)
+
+    @staticmethod
+    def _numeric_column(df, column):
+        if column not in df.columns:
+            return np.zeros(len(df))
+        return pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy()
+
+    @staticmethod
+    def _build_sort_orders(animals):
+        """
+        정렬 옵션별로 전체 행의 안정 정렬 순서(행 위치 배열)를 만듭니다.
+        값이 없는 행은 오름차순/내림차순 모두 맨 뒤에 둡니다.
+        """
+        notice_date = pd.to_datetime(animals['notice_date'], errors='coerce').reset_index(drop=True)
+        if 'birth_year' in animals.columns:
+            birth_year = pd.to_numeric(animals['birth_year'], errors='coerce')
+        else:
+            # 출생 연도 컬럼이 없는 이전 데이터는 여기서 한 번만 계산합니다.
+            birth_year = parse_birth_year(animals['age'])
+        birth_year = birth_year.reset_index(drop=True).astype('Float64')
+
+        def order(values, ascending):
+            return values.sort_values(ascending=ascending, na_position='last', kind='stable').index.to_numpy()
+
+        return {
+            "최신 공고일 순": order(notice_date, False),
+            "오래된 공고일 순": order(notice_date, True),
+            "나이 어린 순": order(birth_year, False),
+            "나이 많은 순": order(birth_year, True),
+        }
+
+    # --- 보호소별 조회 ---
+    def shelter_rows(self, shelter_name):
+        """보호소에 속한 동물의 행 위치(원래 순서)를 반환합니다."""
+        if self.is_empty:
+            return np.array([], dtype=np.int64)
+        code = self.shelter_name_categories.get_indexer([shelter_name])[0]
+        if code < 0:
+            return np.array([], dtype=np.int64)
+        return self.animals_by_shelter[self.shelter_offsets[code]:self.shelter_offsets[code + 1]]
+
+    def shelter_animals(self, shelter_name, animal_mask=None):
+        """
+        보호소에 속한 동물을 반환합니다. 보호소의 동물 수(k)에 비례하는 시간만 걸립니다.
+        `animal_mask`(`FilterResult.animal_mask`)를 주면 그중 조건에 맞는 동물만 남깁니다.
+        """
+        rows = self.shelter_rows(shelter_name)
+        if animal_mask is not None and len(animal_mask) == len(self.animals):
+            rows = rows[animal_mask[rows]]
+        return self.animals.iloc[rows]
+
+    def animals_by_id(self, desertion_nos):
+        """유기번호 목록에 해당하는 동물을 반환합니다."""
+        if self.animals.empty:
+            return self.animals
+        return self.animals[self.animals['desertion_no'].isin(desertion_nos)]
+
+    # --- 마스크 계산 ---
+    def date_mask(self, start_date, end_date):
+        return (self.notice_day >= _day_number(start_date)) & (self.notice_day <= _day_number(end_date))
+
+    def search(self, query):
+        """
+        검색어에 맞는 동물의 `(행 위치, 점수)`를 점수 내림차순으로 반환합니다.
+        색인으로 찾은 후보 중 검색어를 실제 부분 문자열로 포함하는 행만 남깁니다.
+        색인이 없거나 검색어가 두 글자 미만이면 None을 반환합니다.
+        """
+        if self.search_index is None:
+            return None
+        result = self.search_index.search_rows(query)
+        if result is None:
+            return None
+        rows, scores = result
+        if self._search_positions is not None:
+            rows = self._search_positions[rows]
+            found = rows >= 0
+            rows, scores = rows[found], scores[found]
+        # 두 글자 검색어는 bigram 하나가 곧 검색어이므로 색인 결과가 정확합니다.
+        if len(normalize_text(query)) > 2:
+            if self._search_fields is None:
+                self._search_fields = factorize_fields(self.animals)
+            found = contains_query(self._search_fields, rows, query)
+            rows, scores = rows[found], scores[found]
+        return rows, scores
+
+    def query_mask(self, query):
+        result = self.search(query)
+        if result is None:
+            text = normalize_text(query)
+            return self.name_lower.str.contains(text, regex=False).fillna(False).to_numpy(dtype=bool)
+        mask = np.zeros(len(self.animals), dtype=bool)
+        mask[result[0]] = True
+        return mask
+
+    def species_mask(self, species):
+        wanted = self.species_categories.get_indexer(list(species))
+        return np.isin(self.species_codes, wanted[wanted >= 0])
+
+    def region_mask(self, sido, sigungu):
+        """보호소 행 기준 지역 마스크를 반환합니다. 한 번 계산한 조합은 재사용합니다."""
+        key = (sido, sigungu)
+        if key not in self._region_masks:
+            prefix = region_prefix(sido, sigungu)
+            if prefix is None:
+                mask = np.ones(len(self.shelters), dtype=bool)
+            else:
+                mask = self._addresses.str.startswith(prefix).to_numpy(dtype=bool)
+            self._region_masks[key] = mask
+        return self._region_masks[key]
+
+    # --- 정렬 ---
+    def select_sorted(self, animal_mask, sort_by):
+        """
+        조건에 맞는 동물 행을 `sort_by` 순서로 반환합니다.
+        미리 만든 전체 정렬 순서에서 마스크에 해당하는 행만 골라내므로 다시 정렬하지 않습니다.
+        """
+        order = self.sort_orders.get(sort_by)
+        if order is None:
+            return self.animals[animal_mask]
+        return self.animals.iloc[order[animal_mask[order]]]
+
+    # --- 조회 ---
+    def query(self, start_date, end_date, sido, sigungu, species, query, sort_by):
+        """사이드바 필터 조건으로 동물/보호소를 조회하여 `FilterResult`로 반환합니다."""
+        if self.is_empty:
+            return FilterResult(pd.DataFrame(), pd.DataFrame(), 0, 0, 0, 0)
+
+        # 1. 동물 단위 조건 (공고일, 검색어, 축종)
+        animal_mask = self.date_mask(start_date, end_date)
+        if query:
+            animal_mask &= self.query_mask(query)
+        if species:
+            animal_mask &= self.species_mask(species)
+
+        # 2. 조건에 맞는 동물이 있는 보호소 중 지역 조건에 맞는 보호소
+        n_names = len(self.shelter_name_categories)
+        matched_codes = self.animal_shelter_code[animal_mask]
+        has_animals = np.zeros(n_names + 1, dtype=bool)  # 마지막 칸은 코드 -1(이름 없음)용
+        has_animals[matched_codes] = True
+        has_animals[-1] = False
+        shelter_mask = has_animals[self.shelter_row_code] & self.region_mask(sido, sigungu)
+
+        # 3. 최종 보호소에 속한 동물만 남깁니다.
+        final_names = np.zeros(n_names + 1, dtype=bool)
+        final_names[self.shelter_row_code[shelter_mask]] = True
+        final_names[-1] = False
+        animal_mask &= final_names[self.animal_shelter_code]
+
+        filtered_shelters = self.shelters[shelter_mask]
+        final_animals = self.select_sorted(animal_mask, sort_by)
+
+        return FilterResult(
+            final_animals,
+            filtered_shelters,
+            filtered_shelters['shelter_name'].nunique(),
+            len(final_animals),
+            int(self.long_term[shelter_mask].sum()),
+            int(self.adopted[shelter_mask].sum()),
+            animal_mask,
+        )
@@ -0,0 +1,158 @@
+# ==============================================================================
+# geocoder.py - 주소 좌표 변환(지오코딩) 및 영구 캐시 모듈
+# ==============================================================================
+# 이 파일은 보호소 주소를 카카오 로컬 API로 위도/경도 좌표로 변환하고, 그 결과를
+# 로컬 SQLite 파일에 저장하여 다음 실행에서 재사용하는 역할을 합니다.
+#
+# [주요 기능]
+# 1. **주소 정규화 (`normalize_address`):** 공백, 괄호 안 참고 정보 등을 정리하여
+#    표기만 다른 같은 주소가 하나의 캐시 항목을 쓰도록 합니다.
+# 2. **영구 캐시 (`GeocodeCache`):** 좌표를 찾은 주소는 `GEOCODE_TTL_DAYS` 동안,
+#    좌표를 찾지 못한 주소(negative cache)는 `NEGATIVE_TTL_DAYS` 동안 다시 조회하지
+#    않습니다. 네트워크 오류 등 일시적인 실패는 캐시하지 않습니다.
+# 3. **일괄 조회 (`geocode_addresses`):** 캐시에 없는 주소만 `api_client.ApiClient`로
+#    동시에 조회하며, 토큰 버킷으로 초당 요청 수(`KAKAO_RATE_PER_SECOND`)를 제한합니다.
+#
+# 같은 보호소 목록으로 다시 실행하면 카카오 API를 한 번도 호출하지 않습니다.
+# ==============================================================================
+
+import asyncio
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from urllib.parse import urlencode
+
+import aiohttp
+
+from api_client import run_with_client
+
+# --- 경로 및 설정 ---
+current_script_path = os.path.abspath(__file__)
+streamlit_web_dir = os.path.dirname(current_script_path)
+GEOCODE_CACHE_PATH = os.path.join(streamlit_web_dir, 'cache', 'geocode.sqlite')
+
+KAKAO_ADDRESS_URL = "https://dapi.kakao.com/v2/local/search/address.json"
+KAKAO_RATE_PER_SECOND = 10   # 카카오 API 초당 최대 요청 수
+KAKAO_CONCURRENCY = 4        # 동시에 진행할 카카오 API 요청 수
+GEOCODE_TTL_DAYS = 90        # 좌표를 찾은 주소의 캐시 유지 기간
+NEGATIVE_TTL_DAYS = 7        # 좌표를 찾지 못한 주소의 캐시 유지 기간
+
+def normalize_address(address):
+    """
+    캐시 키로 사용할 수 있도록 주소 문자열을 정규화합니다.
+    예: " 서울특별시  중구 세종대로 110 (태평로1가) " -> "서울특별시 중구 세종대로 110"
+    """
+    if not isinstance(address, str):
+        return None
+    address = unicodedata.normalize('NFC', address)
+    address = re.sub(r'\([^)]*\)', ' ', address) # 괄호 안 참고 정보 제거
+    address = re.sub(r'\s+', ' ', address).strip()
+    return address or None
+
+class GeocodeCache:
+    """
+    정규화된 주소별 좌표를 저장하는 SQLite 기반 영구 캐시입니다.
+    좌표를 찾지 못한 주소는 위도/경도를 NULL로 저장합니다. (negative cache)
+    """
+    def __init__(self, path=GEOCODE_CACHE_PATH, ttl_days=GEOCODE_TTL_DAYS, negative_ttl_days=NEGATIVE_TTL_DAYS):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "  address TEXT PRIMARY KEY,"
+            "  lat REAL,"
+            "  lon REAL,"
+            "  fetched_at REAL NOT NULL"
+            ")"
+        )
+
+    def get_many(self, addresses):
+        """
+        만료되지 않은 캐시 항목을 `{주소: (lat, lon)}`로 반환합니다.
+        좌표를 찾지 못했던 주소는 `(None, None)`이며, 캐시에 없거나 만료된 주소는 빠집니다.
+        """
+        now = time.time()
+        found = {}
+        addresses = list(addresses)
+        for start in range(0, len(addresses), 500): # SQLite 바인딩 변수 개수 제한
+            chunk = addresses[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT address, lat, lon, fetched_at FROM geocode WHERE address IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for address, lat, lon, fetched_at in rows:
+                ttl = self.ttl if lat is not None else self.negative_ttl
+                if now - fetched_at < ttl:
+                    found[address] = (lat, lon)
+        return found
+
+    def put_many(self, results):
+        """`{주소: (lat, lon)}`을 저장합니다. 좌표를 찾지 못한 주소는 `(None, None)`으로 넘깁니다."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO geocode (address, lat, lon, fetched_at) VALUES (?, ?, ?, ?)",
+                [(address, lat, lon, now) for address, (lat, lon) in results.items()],
+            )
+
+    def close(self):
+        self._conn.close()
+
+async def _lookup_kakao(client, kakao_api_key, address):
+    """
+    카카오 로컬 API로 주소 하나의 좌표를 조회합니다.
+    찾으면 `(lat, lon)`, 결과가 없으면 `(None, None)`, 오류가 나면 None을 반환합니다.
+    """
+    url = f"{KAKAO_ADDRESS_URL}?{urlencode({'query': address})}"
+    headers = {"Authorization": f"KakaoAK {kakao_api_key}"}
+    try:
+        data = await client.fetch_json(url, headers=headers)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"카카오 지오코딩 API 호출 중 오류 발생: {address} - {type(e).__name__} {e}")
+        return None
+
+    if data and data.get('documents'):
+        coords = data['documents'][0]
+        return float(coords['y']), float(coords['x']) # (위도, 경도) 순서로 반환
+    print(f"주소에 대한 좌표를 찾을 수 없습니다: {address}")
+    return None, None
+
+async def geocode_addresses_async(client, addresses, kakao_api_key, cache):
+    """
+    주소 목록을 `{원래 주소: (lat, lon)}`으로 변환합니다. (비동기 버전)
+    캐시에 없는 주소만 카카오 API로 조회하고, 조회 결과는 캐시에 저장합니다.
+    좌표를 얻지 못한 주소는 `(None, None)`입니다.
+    """
+    keys = {address: normalize_address(address) for address in addresses}
+    unique_keys = {key for key in keys.values() if key}
+    cached = cache.get_many(unique_keys)
+    missing = sorted(unique_keys - cached.keys())
+    print(f"지오코딩: 주소 {len(unique_keys)}건 중 캐시 사용 {len(cached)}건, API 조회 {len(missing)}건")
+
+    if missing:
+        if not kakao_api_key:
+            print("카카오 REST API 키가 설정되지 않았습니다.")
+        else:
+            looked_up = await asyncio.gather(*(_lookup_kakao(client, kakao_api_key, key) for key in missing))
+            # 일시적인 오류(None)는 캐시하지 않고, 결과가 없는 주소는 negative cache로 저장합니다.
+            new_results = {key: coords for key, coords in zip(missing, looked_up) if coords is not None}
+            cache.put_many(new_results)
+            cached.update(new_results)
+
+    return {address: cached.get(key, (None, None)) for address, key in keys.items()}
+
+def geocode_addresses(addresses, kakao_api_key, cache_path=GEOCODE_CACHE_PATH):
+    """`geocode_addresses_async`의 동기 버전입니다. 캐시 파일을 열고 닫는 것까지 처리합니다."""
+    cache = GeocodeCache(cache_path)
+    try:
+        return run_with_client(
+            geocode_addresses_async, list(addresses), kakao_api_key, cache,
+            client_options={"concurrency": KAKAO_CONCURRENCY, "rate_per_host": KAKAO_RATE_PER_SECOND},
+        )
+    finally:
+        cache.close()
@@ -0,0 +1,141 @@
+# ==============================================================================
+# image_prefetcher.py - 동물 이미지 미리 받기 모듈
+# ==============================================================================
+# 이 파일은 유기동물 사진을 `image_store.ImageStore`로 미리 내려받는 기능을 제공합니다.
+# 예전에는 `data_manager.load_data('animals')`가 행마다 `requests.get`을 순서대로
+# 호출했기 때문에, 캐시가 비어 있으면 첫 화면이 수천 건의 다운로드를 기다려야 했습니다.
+#
+# [주요 기능]
+# 1. **로컬 경로 조회 (`lookup_local_images`):** 이미 저장된 이미지의 원본/썸네일
+#    경로만 색인에서 찾아 반환합니다. 네트워크는 사용하지 않습니다.
+# 2. **동시 다운로드 (`prefetch_images`):** `api_client.ApiClient`의 세션 하나를
+#    공유하여 여러 이미지를 동시에 받고, 저장소에 넣으면서 썸네일을 만듭니다.
+#    같은 URL로 이미 저장된 이미지는 건너뛰며, 끝나면 용량 제한에 맞춰 오래된
+#    이미지를 정리합니다.
+# 3. **백그라운드 실행 (`start_background_prefetch`):** 앱에서 화면을 막지 않도록
+#    별도 스레드에서 다운로드를 진행합니다. 같은 프로세스에서는 한 번에 하나의
+#    작업만 실행되며, 실행 중에 들어온 요청은 대기열에 두었다가 이어서 받습니다.
+#
+# [실행 방법]
+# - `update_data.py`가 적재를 마친 뒤 자동으로 실행합니다.
+# - `python image_prefetcher.py`로 현재 데이터의 이미지를 따로 받을 수도 있습니다.
+# ==============================================================================
+
+import asyncio
+import threading
+
+import aiohttp
+import pandas as pd
+
+from api_client import run_with_client
+from image_store import get_image_store
+
+# --- 설정 ---
+IMAGE_CONCURRENCY = 16        # 동시에 받을 이미지 수
+IMAGE_RATE_PER_HOST = 20      # 이미지 호스트별 초당 최대 요청 수
+
+# 이미지 종류별로 `lookup_local_images`가 만드는 컬럼 이름
+IMAGE_PATH_COLUMNS = {'original': 'image_path', 'w150': 'image_w150_path', 'w300': 'image_w300_path'}
+
+_background_lock = threading.Lock()
+_background_thread = None
+_background_queue = []  # 실행 중인 작업이 끝난 뒤 이어서 받을 (df, store) 요청
+
+def _image_targets(df):
+    """`desertion_no`와 `image_url`이 모두 있는 행만 `{유기번호: URL}`로 만듭니다."""
+    if df.empty or 'image_url' not in df.columns:
+        return {}
+    rows = df.loc[df['image_url'].notna() & df['desertion_no'].notna(), ['desertion_no', 'image_url']]
+    return {str(desertion_no): url for desertion_no, url in zip(rows['desertion_no'], rows['image_url']) if url}
+
+def lookup_local_images(df, store=None):
+    """
+    각 행의 이미지가 이미 저장되어 있으면 종류별 경로를, 없으면 None을 담은 DataFrame을 반환합니다.
+    컬럼은 `IMAGE_PATH_COLUMNS`를 따르며, 다운로드는 하지 않습니다.
+    전체 데이터를 한꺼번에 조회하므로 LRU 사용 시각은 갱신하지 않습니다. (`ImageStore.touch` 참고)
+    """
+    store = store or get_image_store()
+    paths = pd.DataFrame(None, index=df.index, columns=list(IMAGE_PATH_COLUMNS.values()), dtype=object)
+    if df.empty or 'desertion_no' not in df.columns:
+        return paths
+    keys = df['desertion_no'].astype(str)
+    found = store.lookup_many(keys.unique(), touch=False)
+    for variant, column in IMAGE_PATH_COLUMNS.items():
+        paths[column] = keys.map(lambda no: found[no][variant] if no in found else None)
+    return paths
+
+async def prefetch_images_async(client, df, store=None):
+    """
+    아직 저장되지 않은 이미지를 공유 세션으로 동시에 내려받아 저장소에 넣고 통계를 반환합니다.
+    동시성과 호스트별 속도 제한은 `client`(`ApiClient`)의 설정을 따릅니다.
+    """
+    store = store or get_image_store()
+    targets = _image_targets(df)
+    stored = store.stored_urls(targets.keys())
+    targets = {no: url for no, url in targets.items() if stored.get(no) != url}
+    stats = {'requested': len(targets), 'downloaded': 0, 'failed': 0}
+
+    async def download(desertion_no, url):
+        try:
+            content = await client.fetch_bytes(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"이미지 다운로드 실패: {url} - {type(e).__name__} {e}")
+            stats['failed'] += 1
+            return
+        # 썸네일 생성과 색인 기록은 이벤트 루프를 막지 않도록 스레드에서 처리합니다.
+        content_hash = await asyncio.to_thread(store.put, desertion_no, url, content) if content else None
+        if content_hash is None:
+            stats['failed'] += 1
+        else:
+            stats['downloaded'] += 1
+
+    await asyncio.gather(*(download(no, url) for no, url in targets.items()))
+    stats['eviction'] = store.evict()
+    return stats
+
+def prefetch_images(df, store=None, concurrency=IMAGE_CONCURRENCY):
+    """`prefetch_images_async`의 동기 버전입니다."""
+    return run_with_client(
+        prefetch_images_async, df, store,
+        client_options={'concurrency': concurrency, 'rate_per_host': IMAGE_RATE_PER_HOST},
+    )
+
+def start_background_prefetch(df, store=None):
+    """
+    별도 스레드에서 이미지 다운로드를 시작하고 True를 반환합니다.
+    이미 실행 중인 작업이 있으면 요청을 대기열에 넣고 False를 반환하며,
+    대기열의 요청은 실행 중인 스레드가 차례로 이어서 받습니다.
+    """
+    global _background_thread
+    with _background_lock:
+        _background_queue.append((df, store))
+        if _background_thread is not None and _background_thread.is_alive():
+            return False
+
+        def worker():
+            global _background_thread
+            while True:
+                with _background_lock:
+                    if not _background_queue:
+                        _background_thread = None
+                        return
+                    queued_df, queued_store = _background_queue.pop(0)
+                try:
+                    stats = prefetch_images(queued_df, queued_store)
+                    print(f"이미지 미리 받기 완료: {stats}")
+                except Exception as e:
+                    print(f"이미지 미리 받기 중 오류 발생: {e}")
+
+        _background_thread = threading.Thread(target=worker, name="image-prefetch", daemon=True)
+        _background_thread.start()
+        return True
+
+# --- 메인 실행 블록 ---
+if __name__ == "__main__":
+    from snapshot_store import read_snapshot
+
+    animals = read_snapshot('animals')
+    if animals is None:
+        print("경고: 데이터 스냅샷이 없습니다. `update_data.py`를 먼저 실행해주세요.")
+    else:
+        print(f"이미지 미리 받기 결과: {prefetch_images(animals)}")
@@ -0,0 +1,259 @@
+# ==============================================================================
+# image_store.py - 동물 이미지 저장소 모듈
+# ==============================================================================
+# 이 파일은 내려받은 동물 사진을 내용 해시 기준으로 저장하고, 목록 화면용
+# 썸네일과 용량 제한을 함께 관리하는 이미지 저장소를 제공합니다.
+#
+# [저장 구조]
+# - 원본: `images/{해시 앞 2자리}/{해시}{확장자}` (확장자는 실제 이미지 형식 기준)
+# - 썸네일: `images/{해시 앞 2자리}/{해시}_w150.jpg`, `..._w300.jpg`
+# - 색인: `images/index.sqlite`
+#   - `image_index`: 유기번호 -> (원본 URL, 내용 해시)
+#   - `image_blobs`: 내용 해시 -> (확장자, 파일 크기 합계, 마지막 사용 시각)
+#
+# [주요 기능]
+# 1. **저장 (`ImageStore.put`):** 같은 내용의 이미지는 한 번만 저장하고,
+#    썸네일은 저장할 때 한 번만 만듭니다.
+# 2. **조회 (`ImageStore.lookup_many`):** 유기번호별로 원본/썸네일 경로를 돌려줍니다.
+#    데이터 전체를 읽을 때처럼 한꺼번에 조회할 때는 사용 시각을 건드리지 않고,
+#    실제로 화면에 그린 카드의 이미지만 `ImageStore.touch`로 갱신합니다.
+# 3. **용량 제한 (`ImageStore.evict`):** 전체 크기가 `IMAGE_CACHE_MAX_BYTES`를
+#    넘으면 가장 오래 사용하지 않은 이미지부터 지웁니다. (LRU)
+# ==============================================================================
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+
+from PIL import Image
+
+# --- 경로 및 설정 ---
+current_script_path = os.path.abspath(__file__)
+streamlit_web_dir = os.path.dirname(current_script_path)
+IMAGE_STORE_DIR = os.path.join(streamlit_web_dir, 'images')
+IMAGE_CACHE_MAX_BYTES = 1024 ** 3   # 이미지 저장소 최대 용량 (1GB)
+EVICT_TARGET_RATIO = 0.9            # 정리할 때는 최대 용량의 90%까지 줄여 자주 정리되지 않도록 함
+THUMBNAIL_WIDTHS = {'w150': 150, 'w300': 300}
+THUMBNAIL_QUALITY = 85
+
+# Pillow 이미지 형식 -> 저장할 확장자
+FORMAT_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp', 'BMP': '.bmp'}
+
+def _make_thumbnail(image, width):
+    """가로 폭을 `width`로 맞춘 JPEG 썸네일 바이트를 만듭니다. 원본이 더 작으면 크기를 유지합니다."""
+    thumb = image.convert('RGB')
+    if thumb.width > width:
+        height = max(1, round(thumb.height * width / thumb.width))
+        thumb = thumb.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumb.save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+def _write_atomic(path, content):
+    temp_path = f"{path}.part"
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+class ImageStore:
+    """
+    내용 해시 기반 이미지 저장소입니다. 여러 스레드에서 함께 사용할 수 있습니다.
+
+    Args:
+        root (str): 이미지와 색인 파일을 저장할 폴더
+        max_bytes (int): `evict()`가 유지할 최대 전체 크기(바이트)
+    """
+    def __init__(self, root=IMAGE_STORE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False, timeout=30)
+        with self._conn:
+            # 앱과 수집 스크립트가 동시에 사용할 수 있도록 WAL 모드를 사용합니다.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_index ("
+                "  desertion_no TEXT PRIMARY KEY,"
+                "  url TEXT NOT NULL,"
+                "  content_hash TEXT NOT NULL"
+                ")"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_blobs ("
+                "  content_hash TEXT PRIMARY KEY,"
+                "  ext TEXT NOT NULL,"
+                "  size_bytes INTEGER NOT NULL,"
+                "  last_access REAL NOT NULL"
+                ")"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_image_index_hash ON image_index (content_hash)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_image_blobs_access ON image_blobs (last_access)")
+
+    def variant_path(self, content_hash, ext, variant='original'):
+        """이미지 종류(`original`, `w150`, `w300`)별 파일 경로를 반환합니다."""
+        directory = os.path.join(self.root, content_hash[:2])
+        if variant == 'original':
+            return os.path.join(directory, f"{content_hash}{ext}")
+        return os.path.join(directory, f"{content_hash}_{variant}.jpg")
+
+    def _variant_paths(self, content_hash, ext):
+        return {variant: self.variant_path(content_hash, ext, variant) for variant in ['original', *THUMBNAIL_WIDTHS]}
+
+    def stored_urls(self, desertion_nos):
+        """이미 저장된 유기번호별 원본 URL을 `{유기번호: URL}`로 반환합니다."""
+        found = {}
+        desertion_nos = [str(no) for no in desertion_nos]
+        with self._lock:
+            for start in range(0, len(desertion_nos), 500): # SQLite 바인딩 변수 개수 제한
+                chunk = desertion_nos[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT desertion_no, url FROM image_index WHERE desertion_no IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put(self, desertion_no, url, content):
+        """
+        이미지를 저장하고 썸네일을 만든 뒤 색인에 기록합니다. 내용 해시를 반환합니다.
+        이미지로 읽을 수 없는 내용이면 저장하지 않고 None을 반환합니다.
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            row = self._conn.execute("SELECT ext FROM image_blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+
+        if row is None:
+            try:
+                with Image.open(io.BytesIO(content)) as image:
+                    ext = FORMAT_EXTENSIONS.get(image.format, '.img')
+                    image.load()
+                    thumbnails = {variant: _make_thumbnail(image, width) for variant, width in THUMBNAIL_WIDTHS.items()}
+            except (OSError, Image.DecompressionBombError) as e:
+                print(f"이미지를 읽을 수 없어 저장하지 않습니다: {url} - {e}")
+                return None
+
+            paths = self._variant_paths(content_hash, ext)
+            os.makedirs(os.path.dirname(paths['original']), exist_ok=True)
+            _write_atomic(paths['original'], content)
+            for variant, data in thumbnails.items():
+                _write_atomic(paths[variant], data)
+            size_bytes = len(content) + sum(len(data) for data in thumbnails.values())
+        else:
+            ext, size_bytes = row[0], None
+
+        now = time.time()
+        with self._lock, self._conn:
+            if size_bytes is None:
+                self._conn.execute("UPDATE image_blobs SET last_access = ? WHERE content_hash = ?", (now, content_hash))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO image_blobs (content_hash, ext, size_bytes, last_access) VALUES (?, ?, ?, ?)",
+                    (content_hash, ext, size_bytes, now),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_index (desertion_no, url, content_hash) VALUES (?, ?, ?)",
+                (str(desertion_no), url, content_hash),
+            )
+        return content_hash
+
+    def lookup_many(self, desertion_nos, touch=True):
+        """
+        저장된 이미지의 경로를 `{유기번호: {'original': 경로, 'w150': 경로, 'w300': 경로}}`로 반환합니다.
+        `touch`가 True이면 조회한 이미지의 마지막 사용 시각을 갱신합니다. (LRU 기준)
+        """
+        found = {}
+        hashes = set()
+        desertion_nos = [str(no) for no in desertion_nos]
+        with self._lock:
+            for start in range(0, len(desertion_nos), 500):
+                chunk = desertion_nos[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT i.desertion_no, b.content_hash, b.ext FROM image_index i "
+                    "JOIN image_blobs b ON b.content_hash = i.content_hash "
+                    f"WHERE i.desertion_no IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for desertion_no, content_hash, ext in rows:
+                    found[desertion_no] = self._variant_paths(content_hash, ext)
+                    hashes.add(content_hash)
+
+            if touch and hashes:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE image_blobs SET last_access = ? WHERE content_hash = ?",
+                        [(time.time(), content_hash) for content_hash in hashes],
+                    )
+        return found
+
+    def touch(self, desertion_nos):
+        """화면에 표시한 동물 이미지의 마지막 사용 시각을 갱신합니다. (LRU 기준)"""
+        desertion_nos = [str(no) for no in desertion_nos]
+        if not desertion_nos:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            for start in range(0, len(desertion_nos), 500):
+                chunk = desertion_nos[start:start + 500]
+                self._conn.execute(
+                    "UPDATE image_blobs SET last_access = ? WHERE content_hash IN ("
+                    f"SELECT content_hash FROM image_index WHERE desertion_no IN ({', '.join('?' * len(chunk))}))",
+                    [now, *chunk],
+                )
+
+    def total_bytes(self):
+        """저장된 이미지(원본 + 썸네일)의 전체 크기를 반환합니다."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM image_blobs").fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """
+        전체 크기가 `max_bytes`를 넘으면 가장 오래 사용하지 않은 이미지부터 삭제하여
+        `max_bytes * EVICT_TARGET_RATIO` 이하로 줄입니다. 삭제 통계를 반환합니다.
+        """
+        max_bytes = max_bytes or self.max_bytes
+        total = self.total_bytes()
+        stats = {'total_bytes': total, 'evicted': 0, 'freed_bytes': 0}
+        if total <= max_bytes:
+            return stats
+
+        target = max_bytes * EVICT_TARGET_RATIO
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content_hash, ext, size_bytes FROM image_blobs ORDER BY last_access"
+            ).fetchall()
+        evicted = []
+        for content_hash, ext, size_bytes in rows:
+            if total <= target:
+                break
+            for path in self._variant_paths(content_hash, ext).values():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            evicted.append((content_hash,))
+            total -= size_bytes
+            stats['freed_bytes'] += size_bytes
+
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM image_index WHERE content_hash = ?", evicted)
+            self._conn.executemany("DELETE FROM image_blobs WHERE content_hash = ?", evicted)
+        stats.update(total_bytes=total, evicted=len(evicted))
+        return stats
+
+    def close(self):
+        self._conn.close()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_image_store():
+    """프로세스에서 함께 사용하는 기본 `ImageStore`를 반환합니다."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ImageStore()
+        return _default_store
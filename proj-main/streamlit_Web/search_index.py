@@ -0,0 +1,207 @@
+# ==============================================================================
+# search_index.py - 동물 검색용 n-gram 역색인 모듈
+# ==============================================================================
+# 이 파일은 사이드바 검색창에서 쓰는 전문(full-text) 검색 색인을 제공합니다.
+# 동물 이름, 품종, 발견 이야기(story), 성격(personality)을 글자 2-gram(bigram)으로
+# 나누어 역색인을 만들고, 검색어의 모든 bigram을 포함하는 동물을 점수순으로 돌려줍니다.
+# bigram이 모두 있어도 순서가 다르면 검색어를 포함하지 않을 수 있으므로, 색인 결과는
+# 후보이며 `contains_query`로 실제 부분 문자열인지 확인합니다. (`FilterEngine.search`)
+#
+# [토큰화 방식]
+# - 유니코드 NFKC 정규화 후 소문자로 바꾸고, 공백은 모두 제거합니다.
+#   (한국어는 띄어쓰기가 일정하지 않으므로 "하양 이"와 "하양이"를 같게 취급)
+# - 형태소 분석 없이 연속된 두 글자를 하나의 토큰으로 사용합니다.
+# - 한 글자 검색어는 bigram을 만들 수 없으므로 색인 대신 이름 검색으로 처리합니다.
+#   (`filter_engine.FilterEngine.query_mask` 참고)
+#
+# [점수]
+# - 필드별 가중치(`FIELD_WEIGHTS`): 이름 3, 품종 2, 이야기/성격 1.
+# - 동물마다 검색어 bigram별로 그 bigram이 나타난 필드 중 가장 높은 가중치를 더합니다.
+#
+# [저장 형식]
+# - 데이터 스냅샷 폴더의 `search_index/` 아래에 numpy 배열(.npy)로 저장하며,
+#   읽을 때는 메모리 맵으로 엽니다. (`update_data.py`가 스냅샷과 함께 만듭니다.)
+# - 색인 배열은 모두 벡터 연산으로 만들기 때문에 동물 50만 건도 수 초 안에 만들어집니다.
+# ==============================================================================
+
+import os
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+FIELD_WEIGHTS = {'animal_name': 3, 'species': 2, 'story': 1, 'personality': 1}
+SEARCH_INDEX_DIRNAME = 'search_index'
+_ARRAYS = ['keys', 'offsets', 'docs', 'weights', 'desertion_no']
+
+def normalize_text(text):
+    """검색용으로 문자열을 정규화합니다. (NFKC, 소문자, 공백 제거)"""
+    if not isinstance(text, str):
+        return ''
+    return ''.join(unicodedata.normalize('NFKC', text).lower().split())
+
+def _normalize_series(values):
+    text = values.astype('string').fillna('')
+    text = text.str.normalize('NFKC').str.lower()
+    return text.str.replace(r'\s+', '', regex=True)
+
+def factorize_fields(animals):
+    """
+    색인 필드(`FIELD_WEIGHTS`)별로 `(행별 코드, 정규화한 고유 문자열)`을 만듭니다.
+    같은 문장이 여러 동물에 반복되는 경우가 많으므로 고유값만 정규화해 둡니다. (`contains_query`용)
+    """
+    fields = []
+    for field in FIELD_WEIGHTS:
+        if field in animals.columns:
+            codes, uniques = pd.factorize(animals[field])
+            fields.append((codes, _normalize_series(pd.Series(uniques, dtype=object))))
+    return fields
+
+def contains_query(fields, rows, query):
+    """
+    `rows` 행이 색인 필드 중 하나에 정규화한 검색어를 부분 문자열로 포함하는지
+    불리언 배열로 반환합니다. `fields`는 `factorize_fields`의 결과입니다. (색인 후보 확인용)
+    """
+    text = normalize_text(query)
+    found = np.zeros(len(rows), dtype=bool)
+    for codes, uniques in fields:
+        matched = np.append(uniques.str.contains(text, regex=False).to_numpy(dtype=bool), False)
+        found |= matched[codes[rows]]  # 코드 -1(결측)은 마지막의 False를 가리킵니다.
+    return found
+
+def _bigram_keys(codepoints):
+    """연속된 두 코드 포인트를 하나의 uint64 키로 합칩니다. (코드 포인트는 21비트 이하)"""
+    return (codepoints[:-1].astype(np.uint64) << np.uint64(21)) | codepoints[1:].astype(np.uint64)
+
+def query_keys(query):
+    """검색어의 bigram 키 목록(중복 제거)을 반환합니다. 두 글자 미만이면 빈 배열입니다."""
+    text = normalize_text(query)
+    if len(text) < 2:
+        return np.array([], dtype=np.uint64)
+    codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    return np.unique(_bigram_keys(codepoints))
+
+def _field_postings(texts, weight):
+    """
+    한 필드의 모든 문서에서 `(bigram 키, 문서 번호)` 쌍을 벡터 연산으로 뽑습니다.
+    문서 사이에는 구분 문자(U+0000)를 넣고, 구분 문자에 걸친 bigram은 버립니다.
+    """
+    joined = '\x00'.join(texts) + '\x00'
+    codepoints = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+    doc_of_char = np.concatenate([[0], np.cumsum(codepoints == 0)[:-1]]).astype(np.int32)
+    if len(codepoints) < 2:
+        return np.array([], dtype=np.uint64), np.array([], dtype=np.int32), np.array([], dtype=np.uint8)
+    valid = (codepoints[:-1] != 0) & (codepoints[1:] != 0)
+    keys = _bigram_keys(codepoints)[valid]
+    docs = doc_of_char[:-1][valid]
+    return keys, docs, np.full(len(keys), weight, dtype=np.uint8)
+
+class SearchIndex:
+    """
+    bigram 역색인입니다. 게시 목록(posting list)은 CSR 형식으로 저장합니다.
+    `keys[i]` bigram을 포함하는 문서 번호는 `docs[offsets[i]:offsets[i + 1]]`이고,
+    문서 번호는 색인을 만들 때 넘긴 DataFrame의 행 위치입니다.
+    """
+    def __init__(self, keys, offsets, docs, weights, desertion_no):
+        self.keys = keys
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.desertion_no = desertion_no
+
+    @classmethod
+    def build(cls, animals):
+        """동물 DataFrame으로 색인을 만듭니다. `desertion_no`가 없는 행은 검색되지 않습니다."""
+        n_docs = len(animals)
+        has_id = animals['desertion_no'].notna().to_numpy() if n_docs else np.array([], dtype=bool)
+        parts = [
+            _field_postings(_normalize_series(animals[field]).tolist(), weight)
+            for field, weight in FIELD_WEIGHTS.items() if field in animals.columns
+        ]
+        if parts:
+            keys = np.concatenate([p[0] for p in parts])
+            docs = np.concatenate([p[1] for p in parts])
+            weights = np.concatenate([p[2] for p in parts])
+        else:
+            keys, docs, weights = np.array([], dtype=np.uint64), np.array([], dtype=np.int32), np.array([], dtype=np.uint8)
+
+        keep = has_id[docs] if len(docs) else np.array([], dtype=bool)
+        keys, docs, weights = keys[keep], docs[keep], weights[keep]
+
+        # (키, 문서)별로 가장 높은 가중치 하나만 남깁니다.
+        order = np.lexsort((-weights.astype(np.int16), docs, keys))
+        keys, docs, weights = keys[order], docs[order], weights[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (keys[1:] != keys[:-1]) | (docs[1:] != docs[:-1])
+        keys, docs, weights = keys[first], docs[first], weights[first]
+
+        unique_keys, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+        desertion_no = animals['desertion_no'].astype('string').fillna('').to_numpy(dtype=str) if n_docs else np.array([], dtype=str)
+        return cls(unique_keys, offsets, docs.astype(np.int32), weights, desertion_no)
+
+    def save(self, path):
+        """`path` 폴더에 색인 배열을 .npy 파일로 저장합니다."""
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+
+    @classmethod
+    def load(cls, path):
+        """저장된 색인을 메모리 맵으로 엽니다. 색인이 없으면 None을 반환합니다."""
+        if not all(os.path.exists(os.path.join(path, f"{name}.npy")) for name in _ARRAYS):
+            return None
+        return cls(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in _ARRAYS))
+
+    def _postings(self, key):
+        i = np.searchsorted(self.keys, key)
+        if i >= len(self.keys) or self.keys[i] != key:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.docs[start:end], self.weights[start:end]
+
+    def search_rows(self, query):
+        """
+        검색어의 모든 bigram을 포함하는 문서(후보)의 `(행 위치, 점수)`를 점수 내림차순으로
+        반환합니다. 검색어 자체를 포함하는지는 `contains_query`로 따로 확인해야 합니다.
+        검색어가 두 글자 미만이면 None을 반환합니다. (색인으로 처리할 수 없음)
+        """
+        keys = query_keys(query)
+        if len(keys) == 0:
+            return None
+        postings = [self._postings(key) for key in keys]
+        if any(p is None for p in postings):
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int64)
+
+        # 가장 짧은 게시 목록을 후보로 두고, 나머지 목록에서 이진 탐색으로 후보를 걸러냅니다.
+        # (게시 목록은 문서 번호순으로 정렬되어 있음)
+        postings.sort(key=lambda p: len(p[0]))
+        rows = np.asarray(postings[0][0])
+        scores = np.asarray(postings[0][1], dtype=np.int64)
+        for docs, weights in postings[1:]:
+            if len(rows) == 0:
+                break
+            positions = np.minimum(np.searchsorted(docs, rows), len(docs) - 1)
+            found = np.asarray(docs[positions]) == rows
+            rows = rows[found]
+            scores = scores[found] + np.asarray(weights[positions[found]])
+
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
+
+    def search(self, query, limit=None):
+        """
+        검색 결과를 점수순 DataFrame(`desertion_no`, `score`)으로 반환합니다.
+        검색어가 두 글자 미만이면 None을 반환합니다.
+        """
+        result = self.search_rows(query)
+        if result is None:
+            return None
+        rows, scores = result
+        if limit is not None:
+            rows, scores = rows[:limit], scores[:limit]
+        return pd.DataFrame({'desertion_no': np.asarray(self.desertion_no)[rows], 'score': scores})
+
+def load_search_index(snapshot_path):
+    """스냅샷 폴더에 저장된 검색 색인을 엽니다. 없으면 None을 반환합니다."""
+    return SearchIndex.load(os.path.join(snapshot_path, SEARCH_INDEX_DIRNAME))
@@ -0,0 +1,123 @@
+# ==============================================================================
+# shelter_clusters.py - 보호소 지도용 서버 측 클러스터링 모듈
+# ==============================================================================
+# 이 파일은 지도 탭(`tabs/map_view.py`)에서 현재 화면(확대 수준, 영역)에 맞는
+# 보호소 마커만 골라 보내기 위한 격자 피라미드를 제공합니다.
+# 예전에는 조건에 맞는 모든 보호소를 브라우저로 보내고 Leaflet의 MarkerCluster가
+# 자바스크립트에서 묶었기 때문에, 보호소 수에 비례해 전송량이 늘어났습니다.
+#
+# [격자 피라미드]
+# - 보호소 좌표를 웹 메르카토르 좌표(0~1)로 바꾼 뒤, 확대 수준(zoom)마다
+#   화면 기준 약 `CELL_PIXELS` 픽셀 크기의 격자 칸 번호를 미리 계산해 둡니다.
+# - 조회할 때는 화면 영역(여유분 포함) 안의 보호소를 현재 확대 수준의 칸별로
+#   묶어 칸마다 보호소 수, `count`/`long_term` 합계, 중심 좌표를 돌려줍니다.
+# - 보호소가 하나뿐인 칸과, 화면 안의 보호소가 `MAX_INDIVIDUAL_MARKERS`곳 이하일
+#   때는 묶지 않고 개별 보호소로 돌려줍니다.
+# - 따라서 돌려주는 마커 수는 조건에 맞는 보호소 수와 관계없이 화면의 칸 수
+#   (또는 `MAX_INDIVIDUAL_MARKERS`) 이하로 유지됩니다.
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+MAX_ZOOM = 18                  # 미리 계산할 최대 확대 수준 (Leaflet 기본 최대값)
+TILE_PIXELS = 256              # 확대 수준 0에서 세계 지도 한 변의 픽셀 수
+CELL_PIXELS = 64               # 클러스터 격자 칸 한 변의 픽셀 수
+MAX_INDIVIDUAL_MARKERS = 200   # 화면 안의 보호소가 이 수 이하이면 묶지 않고 모두 표시
+VIEW_PADDING = 0.25            # 화면 영역 바깥으로 함께 조회할 여유분 (영역 크기 대비)
+MAX_MERCATOR_LAT = 85.05112878
+
+def _to_world(lat, lon):
+    """위경도를 웹 메르카토르 기준 0~1 범위의 (x, y) 좌표로 변환합니다."""
+    lat = np.radians(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (np.asarray(lon, dtype=float) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    return np.clip(x, 0.0, 1.0 - 1e-12), np.clip(y, 0.0, 1.0 - 1e-12)
+
+def parse_bounds(bounds):
+    """
+    `st_folium`이 돌려주는 `bounds`(`{'_southWest': {...}, '_northEast': {...}}`)를
+    `(남, 서, 북, 동)` 튜플로 바꿉니다. 값이 없으면 None을 반환합니다.
+    """
+    try:
+        south_west, north_east = bounds['_southWest'], bounds['_northEast']
+        values = (south_west['lat'], south_west['lng'], north_east['lat'], north_east['lng'])
+    except (KeyError, TypeError):
+        return None
+    if any(value is None for value in values):
+        return None
+    return tuple(float(value) for value in values)
+
+class ClusterView:
+    """`ShelterPyramid.view`의 결과입니다. 묶인 클러스터와 개별 보호소 행을 담습니다."""
+    def __init__(self, clusters, shelters, zoom):
+        self.clusters = clusters    # lat, lon, shelters, count, long_term 컬럼의 DataFrame
+        self.shelters = shelters    # 개별로 표시할 보호소 행 (원래 컬럼 그대로)
+        self.zoom = zoom
+
+    @property
+    def marker_count(self):
+        return len(self.clusters) + len(self.shelters)
+
+class ShelterPyramid:
+    """
+    보호소 좌표에 대한 확대 수준별 격자 피라미드입니다.
+
+    Args:
+        shelters (pd.DataFrame): `lat`, `lon` 컬럼이 있는 보호소 데이터.
+            `count`, `long_term` 컬럼이 있으면 클러스터별로 합산합니다.
+    """
+    def __init__(self, shelters):
+        lat = pd.to_numeric(shelters['lat'], errors='coerce')
+        lon = pd.to_numeric(shelters['lon'], errors='coerce')
+        valid = (lat.notna() & lon.notna()).to_numpy()
+        self.shelters = shelters[valid]
+        self.lat = lat.to_numpy(dtype=float)[valid]
+        self.lon = lon.to_numpy(dtype=float)[valid]
+        self.count = self._numeric(self.shelters, 'count')
+        self.long_term = self._numeric(self.shelters, 'long_term')
+
+        x, y = _to_world(self.lat, self.lon)
+        self.cells = {}
+        for zoom in range(MAX_ZOOM + 1):
+            side = (TILE_PIXELS << zoom) // CELL_PIXELS  # 이 확대 수준에서 세계 지도 한 변의 칸 수
+            self.cells[zoom] = (y * side).astype(np.int64) * side + (x * side).astype(np.int64)
+
+    @staticmethod
+    def _numeric(df, column):
+        if column not in df.columns:
+            return np.zeros(len(df))
+        return pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype=float)
+
+    def _rows_in_bounds(self, bounds):
+        if bounds is None:
+            return np.arange(len(self.lat))
+        south, west, north, east = bounds
+        pad_lat, pad_lon = (north - south) * VIEW_PADDING, (east - west) * VIEW_PADDING
+        mask = ((self.lat >= south - pad_lat) & (self.lat <= north + pad_lat)
+                & (self.lon >= west - pad_lon) & (self.lon <= east + pad_lon))
+        return np.flatnonzero(mask)
+
+    def view(self, zoom, bounds=None):
+        """
+        확대 수준 `zoom`과 화면 영역 `bounds`(`(남, 서, 북, 동)`, 생략하면 전체)에 맞는
+        클러스터와 개별 보호소를 `ClusterView`로 반환합니다.
+        """
+        zoom = int(min(max(zoom, 0), MAX_ZOOM))
+        rows = self._rows_in_bounds(bounds)
+        if len(rows) <= MAX_INDIVIDUAL_MARKERS:
+            return ClusterView(pd.DataFrame(columns=['lat', 'lon', 'shelters', 'count', 'long_term']),
+                               self.shelters.iloc[rows], zoom)
+
+        cell_ids, inverse = np.unique(self.cells[zoom][rows], return_inverse=True)
+        sizes = np.bincount(inverse, minlength=len(cell_ids))
+        clusters = pd.DataFrame({
+            'lat': np.bincount(inverse, weights=self.lat[rows]) / sizes,
+            'lon': np.bincount(inverse, weights=self.lon[rows]) / sizes,
+            'shelters': sizes,
+            'count': np.bincount(inverse, weights=self.count[rows]).astype(int),
+            'long_term': np.bincount(inverse, weights=self.long_term[rows]).astype(int),
+        })
+        # 보호소가 하나뿐인 칸은 클러스터 대신 그 보호소를 그대로 표시합니다.
+        single = sizes[inverse] == 1
+        return ClusterView(clusters[sizes > 1].reset_index(drop=True), self.shelters.iloc[rows[single]], zoom)
@@ -0,0 +1,135 @@
+# ==============================================================================
+# snapshot_store.py - 가공 데이터 스냅샷 모듈
+# ==============================================================================
+# 이 파일은 `update_data.py`가 DB 적재를 마친 뒤 남기는 열 지향(Arrow IPC)
+# 스냅샷을 쓰고 읽는 기능을 제공합니다. Streamlit 앱은 DB에 `SELECT *`를 보내고
+# 타입을 다시 추론하는 대신, 가장 최신 스냅샷 파일을 메모리 맵으로 바로 읽습니다.
+#
+# [주요 기능]
+# 1. **스냅샷 쓰기 (`write_snapshot`):** 테이블별 DataFrame을 타입이 고정된
+#    Arrow IPC 파일(`snapshots/v{데이터 버전}/{테이블}.arrow`)로 저장합니다.
+#    임시 폴더에 모두 쓴 뒤 이름을 바꾸므로, 읽는 쪽은 항상 완성된 스냅샷만 봅니다.
+#    오래된 스냅샷은 `SNAPSHOT_KEEP`개만 남기고 정리합니다.
+#    검색 색인처럼 스냅샷과 함께 바뀌어야 하는 파일도 `extra_writers`로 같은 폴더에 씁니다.
+# 2. **최신 버전 확인 (`latest_snapshot_version`):** 폴더 목록만 확인하므로
+#    DB 왕복 없이 새 데이터가 있는지 알 수 있습니다.
+# 3. **스냅샷 읽기 (`read_snapshot`):** 파일을 메모리 맵으로 열어 DataFrame으로
+#    변환합니다. 문자열 등 대부분의 컬럼은 변환할 때 pandas 메모리로 복사되므로,
+#    앱은 변환한 DataFrame을 `st.cache_resource`로 한 번만 만들어 공유합니다.
+#    스냅샷이 없으면 None을 반환하며, 이때는 DB에서 읽습니다.
+# ==============================================================================
+
+import os
+import re
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+
+# --- 경로 및 설정 ---
+current_script_path = os.path.abspath(__file__)
+streamlit_web_dir = os.path.dirname(current_script_path)
+SNAPSHOT_DIR = os.path.join(streamlit_web_dir, 'snapshots')
+SNAPSHOT_KEEP = 3              # 남겨 둘 스냅샷 버전 수
+SNAPSHOT_EXT = '.arrow'
+
+# 스냅샷에 저장할 때 숫자로 고정할 컬럼 (DB에서는 문자열로 읽히는 경우가 있음)
+NUMERIC_COLUMNS = ['lat', 'lon']
+# 스냅샷에 포함하지 않을 증분 적재용 관리 컬럼
+EXCLUDED_COLUMNS = ['row_hash', 'is_closed', 'closed_at', 'updated_at']
+
+_VERSION_DIR_PATTERN = re.compile(r'^v(\d+)$')
+
+def _version_dir(version, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"v{int(version):08d}")
+
+def list_snapshot_versions(snapshot_dir=SNAPSHOT_DIR):
+    """완성된 스냅샷 버전 목록을 오름차순으로 반환합니다."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    versions = []
+    for name in os.listdir(snapshot_dir):
+        match = _VERSION_DIR_PATTERN.match(name)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+def latest_snapshot_version(snapshot_dir=SNAPSHOT_DIR):
+    """가장 최신 스냅샷 버전을 반환합니다. 스냅샷이 없으면 None을 반환합니다."""
+    versions = list_snapshot_versions(snapshot_dir)
+    return versions[-1] if versions else None
+
+def _to_arrow_table(df):
+    """DataFrame을 스냅샷에 저장할 타입으로 정리하여 Arrow 테이블로 변환합니다."""
+    df = df.drop(columns=EXCLUDED_COLUMNS, errors='ignore').reset_index(drop=True)
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        elif df[col].dtype == object:
+            # 숫자/문자열이 섞인 컬럼도 저장할 수 있도록 결측값을 유지한 채 문자열로 통일합니다.
+            df[col] = df[col].astype('string')
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def snapshot_path(version=None, snapshot_dir=SNAPSHOT_DIR):
+    """스냅샷 버전의 폴더 경로를 반환합니다. `version`을 생략하면 최신 버전이며, 스냅샷이 없으면 None입니다."""
+    if version is None:
+        version = latest_snapshot_version(snapshot_dir)
+        if version is None:
+            return None
+    return _version_dir(version, snapshot_dir)
+
+def write_snapshot(tables, data_version, snapshot_dir=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP, extra_writers=None):
+    """
+    `{테이블 이름: DataFrame}`을 `data_version` 스냅샷으로 저장하고 저장된 폴더 경로를 반환합니다.
+    같은 버전의 스냅샷이 이미 있으면 새 내용으로 교체합니다.
+    `extra_writers`(`{이름: 함수}`)의 각 함수는 `스냅샷 폴더/이름` 경로를 받아 부가 파일을 씁니다.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    final_dir = _version_dir(data_version, snapshot_dir)
+    temp_dir = f"{final_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    try:
+        for table_name, df in tables.items():
+            arrow_table = _to_arrow_table(df)
+            path = os.path.join(temp_dir, f"{table_name}{SNAPSHOT_EXT}")
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        for name, write in (extra_writers or {}).items():
+            write(os.path.join(temp_dir, name))
+
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(temp_dir, final_dir)
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    # 오래된 스냅샷 정리
+    for version in list_snapshot_versions(snapshot_dir)[:-keep]:
+        shutil.rmtree(_version_dir(version, snapshot_dir), ignore_errors=True)
+    return final_dir
+
+def clear_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """
+    모든 스냅샷을 삭제합니다. DB는 갱신됐지만 스냅샷을 쓰지 못했을 때 호출하여,
+    앱이 오래된 스냅샷 대신 DB에서 읽도록 합니다.
+    """
+    for version in list_snapshot_versions(snapshot_dir):
+        shutil.rmtree(_version_dir(version, snapshot_dir), ignore_errors=True)
+
+def read_snapshot(table_name, version=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    스냅샷 파일을 메모리 맵으로 읽어 DataFrame으로 반환합니다.
+    `to_pandas` 변환에서 컬럼이 복사될 수 있으므로 호출하는 쪽에서 결과를 캐시해 재사용하세요.
+    `version`을 생략하면 가장 최신 스냅샷을 읽고, 해당 스냅샷이 없으면 None을 반환합니다.
+    """
+    version_dir = snapshot_path(version, snapshot_dir)
+    if version_dir is None:
+        return None
+    path = os.path.join(version_dir, f"{table_name}{SNAPSHOT_EXT}")
+    if not os.path.exists(path):
+        return None
+    # 변환된 DataFrame이 매핑된 버퍼를 참조할 수 있으므로 파일은 버퍼가 해제될 때 함께 닫힙니다.
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all().to_pandas()
@@ -0,0 +1,86 @@
+# ==============================================================================
+# animal_cards.py - 동물 카드 목록 페이지 나누기
+# ==============================================================================
+# 이 파일은 '보호소 상세 현황' 탭과 '찜한 동물' 탭에서 함께 쓰는 동물 카드 목록의
+# 페이지 나누기 기능을 제공합니다. 동물 한 마리마다 컬럼, 이미지, 버튼, 마크다운
+# 여러 개가 만들어지므로, 한 번에 한 페이지 분량의 카드만 그려 rerun마다 드는
+# 비용이 화면에 보이는 카드 수에만 비례하도록 합니다.
+#
+# [주요 기능]
+# 1. **페이지 선택 (`paginate`):** 이전/다음 버튼과 페이지 크기 선택 상자를 그리고,
+#    현재 페이지에 해당하는 행만 잘라 반환합니다. 페이지 번호와 크기는
+#    `st.session_state`에 목록별로 저장되어 rerun(찜하기 등) 후에도 유지됩니다.
+# 2. **카드 데이터 변환 (`to_records`):** 현재 페이지의 행을 컬럼 단위로 꺼내
+#    dict 목록으로 만듭니다. `iterrows()`처럼 행마다 Series를 만들지 않습니다.
+# 3. **이미지 사용 기록:** 현재 페이지 카드의 이미지만 저장소의 마지막 사용 시각을
+#    갱신합니다. (`image_store.ImageStore.touch`, 용량 정리 시 LRU 기준)
+# ==============================================================================
+
+import math
+
+import streamlit as st
+
+from image_prefetcher import IMAGE_PATH_COLUMNS
+from image_store import get_image_store
+
+PAGE_SIZE_OPTIONS = [10, 20, 50]
+DEFAULT_PAGE_SIZE = 10
+
+# 카드를 그릴 때 사용하는 컬럼
+CARD_COLUMNS = [
+    'desertion_no', 'animal_name', 'species', 'age', 'shelter_name',
+    'personality', 'story', 'image_url', *IMAGE_PATH_COLUMNS.values(),
+]
+
+def to_records(df, columns=CARD_COLUMNS):
+    """`df`의 `columns` 컬럼을 한 번씩만 꺼내 행별 dict 목록으로 만듭니다. 없는 컬럼은 건너뜁니다."""
+    present = [col for col in columns if col in df.columns]
+    values = [df[col].tolist() for col in present]
+    return [dict(zip(present, row)) for row in zip(*values)]
+
+def paginate(df, state_key, reset_token=None):
+    """
+    페이지 이동 컨트롤을 그리고 `df`에서 현재 페이지에 해당하는 행만 반환합니다.
+
+    Args:
+        df (pd.DataFrame): 전체 카드 목록 데이터
+        state_key (str): 페이지 상태를 저장할 `st.session_state` 키 (목록마다 다르게 지정)
+        reset_token: 값이 바뀌면 첫 페이지로 돌아갑니다. (예: 선택한 보호소 이름)
+
+    Returns:
+        pd.DataFrame: 현재 페이지의 행
+    """
+    state = st.session_state.setdefault(
+        state_key, {'page': 0, 'page_size': DEFAULT_PAGE_SIZE, 'token': reset_token}
+    )
+    if state['token'] != reset_token:
+        state.update(page=0, token=reset_token)
+
+    page_count = max(1, math.ceil(len(df) / state['page_size']))
+    state['page'] = min(state['page'], page_count - 1)
+
+    def move(step):
+        state['page'] = min(max(state['page'] + step, 0), page_count - 1)
+
+    def change_page_size():
+        state.update(page=0, page_size=st.session_state[f"{state_key}_page_size"])
+
+    col_prev, col_info, col_next, col_size = st.columns([1, 2, 1, 2])
+    col_prev.button("◀ 이전", key=f"{state_key}_prev", on_click=move, args=(-1,), disabled=state['page'] == 0)
+    col_info.markdown(f"**{state['page'] + 1} / {page_count} 페이지** (전체 {len(df)}마리)")
+    col_next.button("다음 ▶", key=f"{state_key}_next", on_click=move, args=(1,),
+                    disabled=state['page'] >= page_count - 1)
+    col_size.selectbox(
+        "페이지당 카드 수",
+        PAGE_SIZE_OPTIONS,
+        index=PAGE_SIZE_OPTIONS.index(state['page_size']) if state['page_size'] in PAGE_SIZE_OPTIONS else 0,
+        key=f"{state_key}_page_size",
+        on_change=change_page_size,
+        label_visibility="collapsed",
+    )
+
+    start = state['page'] * state['page_size']
+    page = df.iloc[start:start + state['page_size']]
+    if 'desertion_no' in page.columns:
+        get_image_store().touch(page['desertion_no'].dropna())
+    return page
@@ -0,0 +1,96 @@
+# ==============================================================================
+# data_export.py - 필터 결과 파일 내보내기
+# ==============================================================================
+# 이 파일은 '보호소 상세 현황' 탭의 다운로드 버튼에서 사용하는, 현재 필터
+# 결과(보호소 목록, 동물 목록)를 파일로 내보내는 기능을 제공합니다.
+#
+# [동작 방식]
+# - 파일은 rerun마다 미리 만들지 않고, 사용자가 다운로드 버튼을 눌렀을 때만
+#   만듭니다. (`st.download_button`의 `data`에 함수를 넘기는 지연 생성)
+# - 데이터는 `EXPORT_CHUNK_ROWS`행씩 나누어 임시 파일(`SpooledTemporaryFile`)에
+#   이어 쓰고, 다 쓴 뒤 한 번에 읽어 넘깁니다. 전체 CSV 문자열과 그 바이트 사본을
+#   메모리에 동시에 두지 않으며, 파일이 `EXPORT_SPOOL_BYTES`를 넘으면 디스크로
+#   옮겨집니다.
+# - 형식은 CSV(엑셀 한글 호환을 위한 'utf-8-sig'), gzip 압축 CSV, Parquet 중에서
+#   고를 수 있습니다.
+# - 동물 목록에서는 서버 내부 경로인 로컬 이미지 경로 컬럼을 제외합니다.
+# ==============================================================================
+
+import gzip
+import io
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from image_prefetcher import IMAGE_PATH_COLUMNS
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+# 표시 이름: (파일 확장자, MIME 타입)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip 압축)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+def _chunks(df):
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        yield df.iloc[start:start + EXPORT_CHUNK_ROWS]
+
+def _write_csv(df, binary_file):
+    text_file = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    for i, chunk in enumerate(_chunks(df)):
+        chunk.to_csv(text_file, index=False, header=(i == 0))
+    if df.empty:
+        df.to_csv(text_file, index=False)
+    text_file.flush()
+    text_file.detach()  # 아래 파일 객체는 닫지 않고 돌려줍니다.
+
+def _write_parquet(df, binary_file):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(binary_file, schema) as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def write_export(df, export_format, binary_file):
+    """`df`를 `export_format`(`EXPORT_FORMATS`의 키) 형식으로 `binary_file`에 나누어 씁니다."""
+    extension = EXPORT_FORMATS[export_format][0]
+    if extension == "parquet":
+        _write_parquet(df, binary_file)
+    elif extension == "csv.gz":
+        with gzip.GzipFile(fileobj=binary_file, mode='wb', compresslevel=6) as gz_file:
+            _write_csv(df, gz_file)
+    else:
+        _write_csv(df, binary_file)
+
+def export_file(df, export_format):
+    """`df`(로컬 이미지 경로 컬럼 제외)를 `export_format` 형식으로 내보낸 파일 내용(bytes)을 반환합니다."""
+    df = df.drop(columns=[col for col in IMAGE_PATH_COLUMNS.values() if col in df.columns])
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES) as binary_file:
+        write_export(df, export_format, binary_file)
+        binary_file.seek(0)
+        return binary_file.read()
+
+def download_button(df, label, file_stem, export_format, key):
+    """
+    누를 때만 파일을 만드는 다운로드 버튼을 그립니다.
+
+    Args:
+        df (pd.DataFrame): 내보낼 데이터
+        label (str): 버튼 문구
+        file_stem (str): 확장자를 뺀 파일 이름
+        export_format (str): `EXPORT_FORMATS`의 키
+        key (str): 버튼의 위젯 키
+    """
+    extension, mime = EXPORT_FORMATS[export_format]
+    st.download_button(
+        label=f"{label} ({export_format}, {len(df)}건)",
+        data=lambda: export_file(df, export_format),
+        file_name=f"{file_stem}.{extension}",
+        mime=mime,
+        key=key,
+        disabled=df.empty,
+    )
@@ -8,30 +8,39 @@
 # 1. **선택된 보호소 확인:** `st.session_state`에 저장된 `selected_shelter` 값을
 #    가져와 현재 어떤 보호소가 선택되었는지 확인합니다.
 # 2. **동물 상세 정보 조회:** `data_manager.get_animal_details` 함수를 호출하여
-#    선택된 보호소에 소속된 동물들의 데이터를 DB에서 가져옵니다.
-# 3. **동물 목록 표시:** 조회된 동물 데이터를 반복하면서 각 동물의 사진, 이름,
-#    나이, 특징 등의 정보를 `st.columns`를 활용하여 깔끔하게 표시합니다.
+#    선택된 보호소에 소속된 동물들의 데이터를 보호소별 색인으로 바로 가져옵니다.
+#    기본으로 사이드바 필터 조건에 맞는 동물만 보여주며, 체크를 해제하면
+#    보호소의 모든 동물을 보여줍니다.
+# 3. **동물 목록 표시:** 조회된 동물 데이터를 페이지 단위(`animal_cards.paginate`)로
+#    나누어, 현재 페이지 동물의 사진, 이름, 나이, 특징 등의 정보를 `st.columns`를
+#    활용하여 깔끔하게 표시합니다.
 # 4. **찜하기 기능:** 각 동물 정보 옆에 '찜하기/찜 취소' 버튼을 추가합니다.
 #    - 사용자가 버튼을 누르면 `st.session_state.favorites` 목록에 해당 동물의
 #      고유 ID(`desertion_no`)를 추가하거나 제거합니다.
 #    - 상태 변경 후 `st.rerun()`을 호출하여 화면을 즉시 새로고침하고 변경사항을
 #      반영합니다.
-# 5. **데이터 다운로드:** 현재 필터링된 조건에 맞는 보호소 목록 전체를
-#    CSV 파일로 다운로드할 수 있는 버튼을 제공합니다.
+# 5. **데이터 다운로드:** 현재 필터링된 조건에 맞는 보호소 목록과 동물 목록을
+#    CSV, gzip 압축 CSV, Parquet 파일로 내려받는 버튼을 제공합니다. 파일은 버튼을
+#    눌렀을 때만 나누어 만듭니다. (`data_export.py`)
 # ==============================================================================
 
 import streamlit as st
 from data_manager import get_animal_details
 import pandas as pd
-import os # 추가: 파일 경로 확인을 위해 os 모듈 import
+from tabs.animal_cards import paginate, to_records
+from tabs.data_export import EXPORT_FORMATS, download_button
+from utils import get_image_source
 
-def show(filtered_data):
+def show(filtered_data, animal_mask=None, filtered_animals=None):
     """
     '보호소 상세 현황' 탭의 전체 UI를 그리고 로직을 처리하는 메인 함수입니다.
 
     Args:
         filtered_data (pd.DataFrame): app.py에서 필터링된 보호소 데이터.
-                                     CSV 다운로드 기능에 사용됩니다.
+                                     파일 다운로드 기능에 사용됩니다.
+        animal_mask (np.ndarray, optional): app.py의 필터 조건에 맞는 동물 행 마스크.
+        filtered_animals (pd.DataFrame, optional): app.py에서 필터링된 동물 데이터.
+                                     파일 다운로드 기능에 사용됩니다.
     """
     st.subheader("📋 보호소 상세 현황")
 
@@ -43,28 +52,24 @@ def show(filtered_data):
         st.markdown(f"### 🏠 {selected_shelter}")
 
         # 선택된 보호소 이름으로 해당 보호소의 동물 목록을 조회합니다.
-        animal_details = get_animal_details(selected_shelter)
+        only_filtered = st.checkbox("사이드바 필터 조건에 맞는 동물만 보기", value=True)
+        animal_details = get_animal_details(selected_shelter, animal_mask if only_filtered else None)
 
         if not animal_details.empty:
-            # 조회된 동물 목록을 하나씩 순회하며 화면에 표시합니다.
-            for _, animal in animal_details.iterrows():
+            # 현재 페이지의 동물만 화면에 표시합니다. (페이지 상태는 보호소가 바뀌면 처음으로 돌아감)
+            page = paginate(animal_details, "detail_cards", reset_token=selected_shelter)
+            for animal in to_records(page):
                 # 화면을 두 개의 컬럼으로 나누어 왼쪽은 이미지, 오른쪽은 텍스트 정보를 배치합니다.
                 cols = st.columns([1, 3])
                 with cols[0]:
-                    # --- 이미지 로딩 로직 수정 ---
-                    image_path = animal.get('image_path')
-                    if image_path and os.path.exists(image_path):
-                        st.image(image_path, width=150)
-                    else:
-                        st.image('https://via.placeholder.com/150?text=No+Image', 
-                                 width=150)
-                    # --- 수정 끝 ---
+                    # 로컬 이미지가 아직 없으면 원본 URL로 대신 표시합니다.
+                    st.image(get_image_source(animal), width=150)
                         
                 with cols[1]:
                     # --- 찜하기 버튼 로직 ---
                     # 각 버튼은 고유한 key를 가져야 하므로, 동물의 고유 ID(desertion_no)를 사용합니다.
                     # desertion_no가 없는 데이터의 경우, 찜하기 기능을 비활성화합니다.
-                    if 'desertion_no' in animal and pd.notna(animal['desertion_no']):
+                    if pd.notna(animal.get('desertion_no')):
                         is_favorited = animal['desertion_no'] in st.session_state.favorites
                         button_text = "❤️ 찜 취소" if is_favorited else "🤍 찜하기"
                         
@@ -93,10 +98,14 @@ def show(filtered_data):
         st.info("지도에서 보호소 마커를 클릭하여 상세 정보를 확인하세요.")
 
     st.markdown("---")
-    # 사용자가 현재 필터링된 조건의 보호소 목록을 파일로 저장할 수 있도록 합니다.
-    st.download_button(
-        label="📥 현재 필터링된 보호소 목록 다운로드 (CSV)",
-        data=filtered_data.to_csv(index=False).encode('utf-8-sig'), # 한글 깨짐 방지를 위해 'utf-8-sig' 인코딩 사용
-        file_name="filtered_shelter_data.csv",
-        mime="text/csv"
-    )
\ No newline at end of file
+    # 사용자가 현재 필터링된 조건의 보호소/동물 목록을 파일로 저장할 수 있도록 합니다.
+    # 파일은 버튼을 눌렀을 때만 만들어지므로, 누르지 않는 rerun에서는 비용이 들지 않습니다.
+    export_format = st.radio("다운로드 형식", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+    col_shelters, col_animals = st.columns(2)
+    with col_shelters:
+        download_button(filtered_data, "📥 현재 필터링된 보호소 목록 다운로드", "filtered_shelter_data",
+                        export_format, key="export_shelters")
+    if filtered_animals is not None:
+        with col_animals:
+            download_button(filtered_animals, "📥 현재 필터링된 동물 목록 다운로드", "filtered_animal_data",
+                            export_format, key="export_animals")
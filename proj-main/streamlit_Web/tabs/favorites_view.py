@@ -7,20 +7,20 @@
 # [주요 기능]
 # 1. **찜 목록 확인:** `st.session_state.favorites`에 저장된 동물들의 고유 ID
 #    (`desertion_no`) 리스트를 가져옵니다.
-# 2. **전체 동물 데이터 로드:** `data_manager.load_data("animals")`를 통해
-#    DB에 저장된 모든 동물 데이터를 불러옵니다.
-# 3. **찜한 동물 필터링:** 전체 동물 데이터 중에서, `session_state`에 저장된
-#    ID 목록과 일치하는 동물들만 필터링하여 `favorite_animals` 데이터프레임을
-#    생성합니다.
-# 4. **목록 표시 및 찜 취소:** 필터링된 동물 목록을 순회하며 각 동물의 정보
-#    (사진, 이름, 보호소 등)를 표시하고, 옆에 '찜 취소' 버튼을 제공합니다.
+# 2. **찜한 동물 조회:** `data_manager.get_animals_by_id`로 `session_state`에 저장된
+#    ID 목록과 일치하는 동물들만 조회하여 `favorite_animals` 데이터프레임을
+#    생성합니다. (DB에서 읽는 경우 전체 동물 테이블을 읽지 않고 유기번호로 조회)
+# 3. **목록 표시 및 찜 취소:** 필터링된 동물 목록을 페이지 단위(`animal_cards.paginate`)로
+#    나누어 현재 페이지 동물의 정보(사진, 이름, 보호소 등)를 표시하고, 옆에
+#    '찜 취소' 버튼을 제공합니다.
 #    - 사용자가 '찜 취소' 버튼을 누르면 해당 동물의 ID를 `session_state`에서
 #      제거하고, `st.rerun()`으로 화면을 즉시 새로고침합니다.
 # ==============================================================================
 
 import streamlit as st
-from data_manager import load_data
-import os # 추가: 파일 경로 확인을 위해 os 모듈 import
+from data_manager import get_animals_by_id
+from tabs.animal_cards import paginate, to_records
+from utils import get_image_source
 
 def show():
     """
@@ -34,27 +34,17 @@ def show():
         st.info("아직 찜한 동물이 없습니다. 상세 정보 탭에서 하트 버튼을 눌러 추가해보세요!")
         return
 
-    # 1. 전체 동물 데이터를 DB에서 로드합니다.
-    all_animals = load_data("animals")
-    
-    # 2. 찜 목록(st.session_state.favorites)에 있는 desertion_no를 기준으로
-    #    전체 동물 데이터에서 해당하는 행들만 필터링합니다.
-    favorite_animals = all_animals[all_animals["desertion_no"].isin(st.session_state.favorites)]
+    # 1~2. 찜 목록(st.session_state.favorites)에 있는 desertion_no에 해당하는 동물만 조회합니다.
+    favorite_animals = get_animals_by_id(st.session_state.favorites)
 
     if not favorite_animals.empty:
-        # 3. 필터링된 찜한 동물 목록을 순회하며 화면에 표시합니다.
-        for _, animal in favorite_animals.iterrows():
+        # 3. 필터링된 찜한 동물 목록 중 현재 페이지의 동물만 화면에 표시합니다.
+        page = paginate(favorite_animals, "favorite_cards")
+        for animal in to_records(page):
             cols = st.columns([1, 3]) # 이미지와 텍스트 영역을 나눕니다.
             with cols[0]:
-                # --- 이미지 로딩 로직 수정 ---
-                image_path = animal.get('image_path')
-                if image_path and os.path.exists(image_path):
-                    st.image(image_path, width=150, caption=animal['animal_name'])
-                else:
-                    st.image('https://via.placeholder.com/150?text=No+Image', 
-                             width=150, 
-                             caption=animal['animal_name'])
-                # --- 수정 끝 ---
+                # 로컬 이미지가 아직 없으면 원본 URL로 대신 표시합니다.
+                st.image(get_image_source(animal), width=150, caption=animal['animal_name'])
             with cols[1]:
                 st.markdown(f"**{animal['animal_name']}** ({animal['species']}, {animal['age']})")
                 st.markdown(f"**🏠 보호소:** {animal['shelter_name']}")
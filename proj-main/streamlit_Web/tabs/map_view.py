@@ -1,11 +1,158 @@
 import streamlit as st
 import folium
-from folium.plugins import MarkerCluster # MarkerCluster 임포트
+from folium.template import Template
 from streamlit_folium import st_folium
 import pandas as pd
+import hashlib
 import sys, os
+from shelter_clusters import ShelterPyramid, parse_bounds
+from utils import LRUCache, PLACEHOLDER_IMAGE_URL
 sys.stderr = open(os.devnull, "w")
 
+# 보호소 목록별로 만들어 둔 격자 피라미드를 보관할 최대 개수
+MAP_CACHE_SIZE = 16
+DEFAULT_MAP_CENTER = [37.5665, 126.9780]  # 서울시청
+DEFAULT_ZOOM = 7
+CLUSTER_ZOOM_STEP = 2  # 클러스터를 클릭했을 때 확대할 단계 수
+MAP_KEY = "shelter_map"  # st_folium 컴포넌트 키. 마지막 확대 수준/영역이 세션 상태에 남습니다.
+
+# 마커 데이터의 컬럼
+MARKER_FIELDS = ['lat', 'lon', 'shelter_name', 'region', 'species', 'count', 'long_term', 'image_url']
+
+# 개별 보호소 마커 배열 한 행의 항목 순서 (브라우저의 `MARKER_CALLBACK`에서 row[i]로 사용)
+SHELTER_ROW_FIELDS = ['lat', 'lon', 'shelter_name', 'region', 'species', 'count', 'image_url']
+
+# 마커 배열 한 행으로 보호소 마커를 만드는 브라우저 측 함수입니다.
+# 팝업 HTML은 미리 만들지 않고 마커를 클릭했을 때 만듭니다.
+# 툴팁(보호소 이름)은 지도 클릭 시 `last_object_clicked_tooltip`으로 전달됩니다.
+MARKER_CALLBACK = """
+function (row) {
+    var escape = function (value) {
+        return String(value).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    };
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {
+        icon: L.AwesomeMarkers.icon({icon: 'paw', prefix: 'fa', markerColor: 'blue'})
+    });
+    marker.bindTooltip(escape(row[2]));
+    marker.bindPopup(function () {
+        return '<b>' + escape(row[2]) + '</b><br>'
+            + "<img src='" + escape(row[6]) + "' width='150'><br>"
+            + '지역: ' + escape(row[3]) + '<br>'
+            + '주요 품종: ' + escape(row[4]) + '<br>'
+            + '보호 중: ' + row[5] + ' 마리';
+    });
+    return marker;
+}
+"""
+
+class ShelterMarkerArray(folium.MacroElement):
+    """
+    보호소 마커 배열을 JSON 배열 하나로 넘기고, 브라우저에서 `MARKER_CALLBACK`으로
+    마커를 만들어 부모 레이어에 추가합니다. (`FastMarkerCluster`와 같은 방식이지만,
+    클러스터링은 서버(`ShelterPyramid`)에서 이미 했으므로 다시 묶지 않습니다.)
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function () {
+                var callback = {{ this.callback }};
+                var data = {{ this.data|tojson }};
+                for (var i = 0; i < data.length; i++) {
+                    callback(data[i]).addTo({{ this._parent.get_name() }});
+                }
+            })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, callback=MARKER_CALLBACK):
+        super().__init__()
+        self._name = "ShelterMarkerArray"
+        self.data = data
+        self.callback = callback.strip()
+
+def build_marker_frame(filtered_shelters, filtered_animals):
+    """
+    좌표가 있는 보호소를 `MARKER_FIELDS` 컬럼의 DataFrame으로 만듭니다.
+    보호소별 대표 이미지는 해당 보호소 동물 중 첫 번째 동물의 사진입니다.
+    """
+    shelters = filtered_shelters[filtered_shelters['lat'].notna() & filtered_shelters['lon'].notna()]
+
+    # 보호소별 대표 이미지 매핑
+    if not filtered_animals.empty and 'image_url' in filtered_animals.columns:
+        shelter_image_map = filtered_animals.groupby('shelter_name')['image_url'].first()
+    else:
+        shelter_image_map = pd.Series(dtype=object)
+
+    def text_column(column):
+        if column not in shelters.columns:
+            return '정보 없음'
+        return shelters[column].astype('string').fillna('정보 없음').to_numpy(dtype=object)
+
+    def int_column(column):
+        if column not in shelters.columns:
+            return 0
+        return pd.to_numeric(shelters[column], errors='coerce').fillna(0).astype(int).to_numpy()
+
+    return pd.DataFrame({
+        'lat': pd.to_numeric(shelters['lat'], errors='coerce').to_numpy(dtype=float),
+        'lon': pd.to_numeric(shelters['lon'], errors='coerce').to_numpy(dtype=float),
+        'shelter_name': shelters['shelter_name'].astype(str).to_numpy(dtype=object),
+        'region': text_column('region'),
+        'species': text_column('species'),
+        'count': int_column('count'),
+        'long_term': int_column('long_term'),
+        'image_url': shelters['shelter_name'].map(shelter_image_map).fillna(PLACEHOLDER_IMAGE_URL).to_numpy(dtype=object),
+    }, columns=MARKER_FIELDS)
+
+def marker_frame_key(markers):
+    """마커 데이터의 내용 해시. 보호소 목록이 같으면 같은 값이 나옵니다."""
+    return hashlib.sha1(pd.util.hash_pandas_object(markers, index=False).to_numpy().tobytes()).hexdigest()
+
+@st.cache_resource
+def _get_pyramid_cache():
+    """보호소 목록(마커 데이터)별로 만든 `ShelterPyramid`를 보관하는 LRU 캐시입니다. (앱의 모든 세션이 함께 사용)"""
+    return LRUCache(MAP_CACHE_SIZE)
+
+def build_marker_rows(shelters):
+    """개별 보호소 마커 데이터를 `SHELTER_ROW_FIELDS` 순서의 리스트 목록으로 만듭니다."""
+    columns = [shelters[field].tolist() for field in SHELTER_ROW_FIELDS]
+    return [list(row) for row in zip(*columns)]
+
+def cluster_tooltip(cluster):
+    return f"보호소 {cluster.shelters}곳 · 보호 중 {cluster.count}마리 · 장기 보호 {cluster.long_term}마리"
+
+def build_marker_layer(view):
+    """
+    `ClusterView`의 클러스터와 개별 보호소를 하나의 `FeatureGroup`으로 만듭니다.
+    개별 보호소는 마커 배열 하나(`ShelterMarkerArray`)로 넘기며, 팝업은 클릭할 때 만듭니다.
+    """
+    layer = folium.FeatureGroup(name="보호소")
+    for cluster in view.clusters.itertuples(index=False):
+        size = 30 + min(len(str(cluster.shelters)), 4) * 6
+        folium.Marker(
+            [cluster.lat, cluster.lon],
+            tooltip=cluster_tooltip(cluster),
+            icon=folium.DivIcon(
+                html=(f"<div style='width:{size}px;height:{size}px;line-height:{size}px;border-radius:50%;"
+                      "background:rgba(49,130,206,0.8);color:white;text-align:center;font-weight:bold;'>"
+                      f"{cluster.shelters}</div>"),
+                icon_size=(size, size),
+                icon_anchor=(size // 2, size // 2),
+            ),
+        ).add_to(layer)
+    if not view.shelters.empty:
+        ShelterMarkerArray(build_marker_rows(view.shelters)).add_to(layer)
+    return layer
+
+def _safe_rerun():
+    # rerun을 안전하게 호출
+    try:
+        st.rerun()
+    except Exception as e:
+        # rerun 중 Streamlit 내부 컴포넌트가 닫히면 발생하는 에러를 무시
+        print(f"[DEBUG] rerun 예외 발생 (무시): {e}")
+
 def show(filtered_shelters, filtered_animals, tab_labels):
     st.subheader("📍 보호소 지도")
 
@@ -14,44 +161,24 @@ def show(filtered_shelters, filtered_animals, tab_labels):
         st.warning("표시할 데이터가 없습니다. 필터 조건을 변경해보세요.")
         return
 
-    # 보호소별 대표 이미지 매핑
-    if not filtered_animals.empty and 'image_url' in filtered_animals.columns:
-        shelter_image_map = filtered_animals.groupby('shelter_name')['image_url'].first().to_dict()
-    else:
-        shelter_image_map = {}
+    # 격자 피라미드는 보호소 목록이 같으면 이전에 만든 것을 그대로 재사용합니다.
+    markers = build_marker_frame(filtered_shelters, filtered_animals)
+    pyramid_key = marker_frame_key(markers)
+    pyramid = _get_pyramid_cache().get_or_compute(pyramid_key, lambda: ShelterPyramid(markers))
 
-    # 지도 중심 좌표 계산 (좌표가 없으면 서울시청 기준)
-    valid_lat = filtered_shelters['lat'].dropna()
-    valid_lon = filtered_shelters['lon'].dropna()
-    if not valid_lat.empty and not valid_lon.empty:
-        map_center = [valid_lat.mean(), valid_lon.mean()]
-    else:
-        map_center = [37.5665, 126.9780]
-
-    # folium 지도 생성
-    map_obj = folium.Map(location=map_center, zoom_start=7)
-
-    # MarkerCluster 객체 생성 및 지도에 추가
-    # 이 객체에 마커들을 추가하면 자동으로 클러스터링됩니다.
-    marker_cluster = MarkerCluster().add_to(map_obj) # 여기에 추가!
-
-    # 마커 추가
-    for _, row in filtered_shelters.iterrows():
-        if pd.notna(row['lat']) and pd.notna(row['lon']):
-            image_url = shelter_image_map.get(row['shelter_name'], 'https://via.placeholder.com/150')
-            popup_html = f"""
-                <b>{row['shelter_name']}</b><br>
-                <img src='{image_url}' width='150'><br>
-                지역: {row.get('region', '정보 없음')}<br>
-                주요 품종: {row.get('species', '정보 없음')}<br>
-                보호 중: {int(row.get('count', 0))} 마리
-            """
-            folium.Marker(
-                [row['lat'], row['lon']],
-                popup=popup_html,
-                tooltip=row['shelter_name'],
-                icon=folium.Icon(color="blue", icon="paw", prefix='fa')
-            ).add_to(marker_cluster) # map_obj 대신 marker_cluster에 추가!
+    # 지도 중심: 클러스터를 클릭해 확대한 위치가 있으면 그 위치, 없으면 보호소 좌표의 평균 (없으면 서울시청)
+    focus = st.session_state.get("map_focus")
+    if focus is None or focus["key"] != pyramid_key:
+        center = [float(markers['lat'].mean()), float(markers['lon'].mean())] if not markers.empty else DEFAULT_MAP_CENTER
+        focus = {"key": pyramid_key, "center": center, "zoom": DEFAULT_ZOOM}
+        st.session_state.map_focus = focus
+
+    # 마지막으로 받은 지도 상태(확대 수준, 영역)에 맞는 마커만 보냅니다.
+    # 기본 지도는 항상 같으므로 마커가 바뀌어도 지도를 다시 불러오지 않고 마커 레이어만 바뀝니다.
+    last_state = st.session_state.get(MAP_KEY) or {}
+    zoom = last_state.get("zoom") or focus["zoom"]
+    view = pyramid.view(zoom, parse_bounds(last_state.get("bounds")))
+    base_map = folium.Map(location=DEFAULT_MAP_CENTER, zoom_start=DEFAULT_ZOOM)
 
     # Use a column to explicitly group map and table for consistent layout
     col1, = st.columns(1)
@@ -59,7 +186,15 @@ def show(filtered_shelters, filtered_animals, tab_labels):
         # 지도 렌더링 - rerun 시 발생하는 FileNotFoundError 무시
         map_event = None
         try:
-            map_event = st_folium(map_obj, width='100%', height=500)
+            map_event = st_folium(
+                base_map,
+                key=MAP_KEY,
+                center=focus["center"],
+                zoom=focus["zoom"],
+                feature_group_to_add=build_marker_layer(view),
+                width='100%',
+                height=500,
+            )
         except FileNotFoundError:
             # rerun 도중에 발생하는 frontend/build/None 에러는 무시
             map_event = None
@@ -67,26 +202,29 @@ def show(filtered_shelters, filtered_animals, tab_labels):
             print(f"[DEBUG] st_folium 예외 발생 (무시): {e}")
             map_event = None
 
-    
-
     # 클릭 이벤트 처리
-    # (MarkerCluster는 클러스터 자체를 클릭하는 이벤트를 직접 제공하지 않고,
-    # 확대/축소를 통해 개별 마커가 드러난 후 마커 클릭 이벤트를 감지하는 방식이 일반적입니다.)
-    # 현재 코드는 개별 마커의 tooltip을 기반으로 보호소 클릭을 처리하고 있으므로 그대로 유지합니다.
+    # 개별 보호소 마커는 tooltip(보호소 이름)으로 보호소 클릭을 처리하고,
+    # 클러스터 마커를 클릭하면 그 위치를 중심으로 `CLUSTER_ZOOM_STEP`단계 확대합니다.
     if map_event and map_event.get("last_object_clicked_tooltip"):
         clicked_shelter = map_event["last_object_clicked_tooltip"]
 
-        if st.session_state.get("selected_shelter") != clicked_shelter:
-            st.session_state.selected_shelter = clicked_shelter
-            detail_tab_idx = tab_labels.index("📋 보호소 상세 현황")
-            st.session_state.active_tab_idx = detail_tab_idx
-
-            # rerun을 안전하게 호출
-            try:
-                st.rerun()
-            except Exception as e:
-                # rerun 중 Streamlit 내부 컴포넌트가 닫히면 발생하는 에러를 무시
-                print(f"[DEBUG] rerun 예외 발생 (무시): {e}")
+        if clicked_shelter in set(markers['shelter_name']):
+            if st.session_state.get("selected_shelter") != clicked_shelter:
+                st.session_state.selected_shelter = clicked_shelter
+                detail_tab_idx = tab_labels.index("📋 보호소 상세 현황")
+                st.session_state.active_tab_idx = detail_tab_idx
+                _safe_rerun()
+        elif map_event.get("last_object_clicked") \
+                and st.session_state.get("map_click_count") != map_event.get("last_object_clicked_count"):
+            # 같은 클릭을 rerun마다 다시 처리하지 않도록 처리한 클릭 횟수를 기록합니다.
+            st.session_state.map_click_count = map_event.get("last_object_clicked_count")
+            clicked_point = map_event["last_object_clicked"]
+            st.session_state.map_focus = {
+                "key": pyramid_key,
+                "center": [clicked_point["lat"], clicked_point["lng"]],
+                "zoom": view.zoom + CLUSTER_ZOOM_STEP,
+            }
+            _safe_rerun()
 
     # 보호소 현황 테이블
     st.subheader("📊 보호소별 동물 현황")
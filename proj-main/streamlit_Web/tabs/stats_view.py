@@ -7,23 +7,86 @@
 #
 # [주요 기능]
 # 1. **데이터 준비:** `app.py`에서 전달받은 필터링된 보호소 데이터
-#    (`filtered_data`)를 기반으로 각 차트에 맞는 형태로 데이터를 가공(group by, sum 등)합니다.
+#    (`filtered_data`)를 데이터 버전마다 한 번 만들어 둔 (품종 × 시/도) 사전 집계
+#    (`data_manager.get_stats_cube`)에 대입해, 원본 행을 다시 그룹화하지 않고
+#    집계 배열을 잘라 각 차트의 데이터를 만듭니다.
 # 2. **품종별 보호 동물 수 막대 차트:**
-#    - 보호소별로 집계된 주요 품종(`species`)과 동물 수(`count`)를 그룹화하여
-#      전체 품종별 총 동물 수를 계산합니다.
+#    - 보호소별로 집계된 주요 품종(`species`)별 동물 수(`count`) 합계를 사용합니다.
 #    - `px.bar`를 사용하여 막대 차트를 생성하고, 각 막대에 수치를 표시하여
 #      가독성을 높입니다.
 # 3. **지역별 장기 보호 동물 비율 파이 차트:**
-#    - 보호소 주소(`careAddr`)에서 시/도 정보만 추출하여 새로운 'sido' 컬럼을 만듭니다.
-#    - 시/도별로 장기 보호 동물 수(`long_term`)의 합계를 계산합니다.
+#    - 보호소 주소(`careAddr`)의 시/도별 장기 보호 동물 수(`long_term`) 합계를 사용합니다.
 #    - `px.pie`를 사용하여 지역별 장기 보호 동물의 분포를 한눈에 파악할 수 있는
 #      파이 차트를 생성합니다.
 #    - 단일 지역만 선택된 경우 비율 비교가 의미 없으므로, 차트를 표시하지 않고
 #      안내 메시지를 보여줍니다.
+# 4. **차트 캐시 (`cached_figure`):** 만든 Figure는 차트 종류와 차트 데이터의 내용
+#    해시를 키로 LRU 캐시(`FIGURE_CACHE_SIZE`개, 모든 세션 공유)에 보관합니다.
+#    필터와 관계없는 위젯 클릭 등으로 rerun되어도 같은 데이터면 `px.bar`/`px.pie`를
+#    다시 호출하지 않습니다. 적중률은 `figure_cache_stats()`로 확인할 수 있습니다.
 # ==============================================================================
 
-import streamlit as st
+import hashlib
+
+import pandas as pd
 import plotly.express as px
+import streamlit as st
+
+from data_manager import get_stats_cube
+from stats_cube import StatsCube
+from utils import LRUCache
+
+# 차트 데이터별로 만들어 둔 Figure를 보관할 최대 개수
+FIGURE_CACHE_SIZE = 32
+
+@st.cache_resource
+def _get_figure_cache():
+    """차트 데이터 내용별로 만든 Plotly Figure를 보관하는 LRU 캐시입니다. (앱의 모든 세션이 함께 사용)"""
+    return LRUCache(FIGURE_CACHE_SIZE)
+
+def chart_data_key(kind, chart_data):
+    """차트 종류와 차트 데이터(컬럼 이름과 값)의 내용 해시. 내용이 같으면 같은 값이 나옵니다."""
+    digest = hashlib.sha1(kind.encode('utf-8'))
+    digest.update('\x00'.join(chart_data.columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(chart_data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def cached_figure(kind, chart_data, build):
+    """
+    `chart_data`로 만든 Figure를 캐시에서 찾아 반환하고, 없으면 `build(chart_data)`로 만들어 보관합니다.
+    캐시된 Figure는 여러 세션이 함께 사용하므로 꺼낸 뒤 수정하지 않습니다.
+    """
+    return _get_figure_cache().get_or_compute(chart_data_key(kind, chart_data), lambda: build(chart_data))
+
+def figure_cache_stats():
+    """차트 캐시의 `{'hits', 'misses', 'size', 'hit_rate'}` 통계를 반환합니다."""
+    return _get_figure_cache().stats()
+
+def build_species_bar(species_chart_data):
+    """품종별 보호 동물 수 막대 차트를 만듭니다."""
+    # Plotly Express를 사용하여 막대 차트를 생성합니다.
+    fig_bar = px.bar(
+        species_chart_data,
+        x="species",        # x축: 품종
+        y="count",          # y축: 동물 수
+        color="species",    # 각 막대를 품종별로 다른 색으로 표시
+        text="count",       # 막대 위에 수치(count)를 텍스트로 표시
+        template="plotly_white" # 깔끔한 흰색 배경의 템플릿 사용
+    )
+    fig_bar.update_traces(textposition="outside") # 텍스트를 막대 바깥쪽에 표시
+    fig_bar.update_layout(showlegend=False, margin=dict(t=10, b=10)) # 범례는 숨기고, 차트 여백을 조절
+    return fig_bar
+
+def build_long_term_pie(long_term_chart_data):
+    """지역별 장기 보호 동물 비율 파이 차트를 만듭니다."""
+    # Plotly Express를 사용하여 파이 차트를 생성합니다.
+    return px.pie(
+        long_term_chart_data,
+        values="long_term", # 각 조각의 크기: 장기 보호 동물 수
+        names="sido",      # 각 조각의 이름: 시/도
+        template="plotly_white",
+        title="시도별 장기 보호 동물 비율"
+    )
 
 def show(filtered_data):
     """
@@ -39,46 +102,29 @@ def show(filtered_data):
         st.warning("표시할 데이터가 없습니다. 필터 조건을 변경해보세요.")
         return
 
+    # 데이터 버전마다 한 번 만들어 둔 사전 집계에서 필터 결과 보호소만 골라 합산합니다.
+    cube = get_stats_cube() or StatsCube(filtered_data)
+    totals = cube.aggregate(filtered_data)
+
     # --- 1. 품종별 보호 동물 수 (막대 차트) ---
     st.markdown("#### 품종별 보호 동물 수")
     
-    # 'species' 컬럼으로 그룹화하고, 각 품종의 'count'를 합산합니다.
-    species_chart_data = filtered_data.groupby("species")["count"].sum().reset_index()
+    # 품종별 'count' 합계를 집계 배열에서 잘라냅니다.
+    species_chart_data = cube.by_species(totals, "count")
     
-    # Plotly Express를 사용하여 막대 차트를 생성합니다.
-    fig_bar = px.bar(
-        species_chart_data,
-        x="species",        # x축: 품종
-        y="count",          # y축: 동물 수
-        color="species",    # 각 막대를 품종별로 다른 색으로 표시
-        text="count",       # 막대 위에 수치(count)를 텍스트로 표시
-        template="plotly_white" # 깔끔한 흰색 배경의 템플릿 사용
-    )
-    fig_bar.update_traces(textposition="outside") # 텍스트를 막대 바깥쪽에 표시
-    fig_bar.update_layout(showlegend=False, margin=dict(t=10, b=10)) # 범례는 숨기고, 차트 여백을 조절
+    # 같은 데이터로 만든 차트가 캐시에 있으면 그대로 사용합니다.
+    fig_bar = cached_figure("species_bar", species_chart_data, build_species_bar)
     st.plotly_chart(fig_bar, use_container_width=True) # Streamlit에 차트를 렌더링
 
     # --- 2. 지역별 장기 보호 동물 비율 (파이 차트) ---
     st.markdown("#### 지역별 장기 보호 동물 비율")
     
-    # 원본 데이터를 복사하여 작업합니다 (원본 데이터 보존).
-    chart_data = filtered_data.copy()
-    # 'careAddr' 컬럼에서 첫 단어(시/도)를 추출하여 'sido' 컬럼을 생성합니다.
-    chart_data['sido'] = chart_data['careAddr'].str.split().str[0]
+    # 시/도별 'long_term' 합계를 집계 배열에서 잘라냅니다. (보호소가 있는 시/도만 포함)
+    long_term_chart_data = cube.by_sido(totals, "long_term")
     
     # 여러 지역이 선택되어 비교가 의미 있을 때만 파이 차트를 그립니다.
-    if chart_data['sido'].nunique() > 1:
-        # 'sido' 컬럼으로 그룹화하고, 각 지역의 'long_term' 수를 합산합니다.
-        long_term_chart_data = chart_data.groupby("sido")["long_term"].sum().reset_index()
-        
-        # Plotly Express를 사용하여 파이 차트를 생성합니다.
-        fig_pie = px.pie(
-            long_term_chart_data,
-            values="long_term", # 각 조각의 크기: 장기 보호 동물 수
-            names="sido",      # 각 조각의 이름: 시/도
-            template="plotly_white",
-            title="시도별 장기 보호 동물 비율"
-        )
+    if len(long_term_chart_data) > 1:
+        fig_pie = cached_figure("long_term_pie", long_term_chart_data, build_long_term_pie)
         st.plotly_chart(fig_pie, use_container_width=True)
     else:
         # 단일 지역만 선택되었을 경우 안내 메시지를 표시합니다.
@@ -0,0 +1,5 @@
+# 앱 모듈은 `streamlit_Web` 폴더에서 바로 import하는 구조이므로, 테스트에서도 같은 경로를 사용합니다.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,107 @@
+# ==============================================================================
+# test_preprocess_data.py - `update_data.preprocess_data` 회귀 테스트
+# ==============================================================================
+# 보호소 집계와 좌표 채우기를 벡터 연산으로 바꾼 `preprocess_data`가 예전 구현
+# (그룹마다 lambda로 집계하고 `iterrows`로 좌표를 채우던 방식)과 같은 결과를 내는지
+# `benchmark.make_synthetic_raw`의 합성 데이터로 비교합니다.
+# 카카오 지오코딩은 네트워크를 쓰지 않도록 가짜 함수로 바꿉니다.
+#
+# [실행 방법]
+# - `streamlit_Web` 폴더에서 `python -m pytest tests`
+# ==============================================================================
+
+import pandas as pd
+import pytest
+
+import update_data
+from benchmark import make_synthetic_raw
+
+def _reference_preprocess_data(animal_df_raw, shelter_api_df_raw):
+    """벡터화 이전의 `preprocess_data` 집계/병합/좌표 채우기 방식을 그대로 재현합니다."""
+    animals_df = update_data._prepare_animals(animal_df_raw)
+
+    agg_dict = {
+        'careAddr_animal': ('careAddr', 'first'),
+        'region': ('careAddr', lambda x: x.iloc[0].split()[0] if x.notna().any() else '정보 없음'),
+        'count': ('desertion_no', 'count'),
+        'long_term': ('notice_date', lambda x: (x < pd.Timestamp.now() - pd.Timedelta(days=30)).sum()),
+        'adopted': ('process_state', lambda x: (x == '종료(입양)').sum()),
+        'species': ('species', lambda x: x.value_counts().index[0] if not x.empty else '정보 없음'),
+        'image_url': ('image_url', 'first'),
+    }
+    shelter_df_from_animals = animals_df.groupby('shelter_name').agg(**agg_dict).reset_index()
+
+    shelter_api_df = shelter_api_df_raw.rename(columns={
+        'careNm': 'shelter_name', 'careRegNo': 'care_reg_no', 'careAddr': 'careAddr_api',
+        'careTel': 'care_tel', 'dataStdDt': 'data_std_dt', 'lat': 'lat_api', 'lon': 'lon_api'
+    })
+    shelter_api_df['lat_api'] = pd.to_numeric(shelter_api_df['lat_api'], errors='coerce')
+    shelter_api_df['lon_api'] = pd.to_numeric(shelter_api_df['lon_api'], errors='coerce')
+
+    merged = pd.merge(shelter_df_from_animals, shelter_api_df, on='shelter_name', how='outer')
+    merged['careAddr'] = merged['careAddr_api'].fillna(merged['careAddr_animal'])
+    merged['lat'] = merged['lat_api']
+    merged['lon'] = merged['lon_api']
+
+    unique_addresses = merged.loc[
+        merged['careAddr'].notna() & (merged['lat'].isna() | merged['lon'].isna()), 'careAddr'
+    ].unique()
+    cache = update_data.geocode_addresses(unique_addresses, update_data.get_kakao_rest_api_key())
+    for index, row in merged.iterrows():
+        if pd.isna(row['lat']) or pd.isna(row['lon']):
+            addr = row['careAddr']
+            if addr in cache:
+                merged.at[index, 'lat'], merged.at[index, 'lon'] = cache[addr]
+    merged['lat'] = merged['lat'].fillna(0)
+    merged['lon'] = merged['lon'].fillna(0)
+    merged.drop(columns=['careAddr_api', 'careAddr_animal', 'lat_api', 'lon_api'], inplace=True)
+    return merged, update_data._finalize_animals(animals_df)
+
+def _fake_geocode(addresses, api_key):
+    """주소마다 고정된 좌표를 돌려주고, 일부 주소는 찾지 못한 것으로 처리합니다."""
+    return {
+        addr: (37.0 + i * 0.001, 127.0 + i * 0.001)
+        for i, addr in enumerate(sorted(addresses)) if i % 3
+    }
+
+@pytest.fixture
+def raw_data(monkeypatch):
+    monkeypatch.setattr(update_data, 'geocode_addresses', _fake_geocode)
+    monkeypatch.setattr(update_data, 'get_kakao_rest_api_key', lambda: 'test-key')
+
+    animals, shelters = make_synthetic_raw(5000, 300, seed=1)
+    # 동물 데이터에만 있는 보호소, 보호소 API에만 있는 보호소, 좌표가 없는 보호소를 섞습니다.
+    shelters = shelters.iloc[::2].reset_index(drop=True)
+    shelters = pd.concat([shelters, pd.DataFrame({
+        'careNm': ['API 전용 보호소'], 'careRegNo': ['999999999'],
+        'careAddr': ['부산광역시 중구 중앙대로 1'], 'careTel': ['051-000-0000'], 'lat': [None], 'lon': [None],
+    })], ignore_index=True).astype({'careRegNo': object, 'careTel': object})
+    # API 응답에서 빠진 값은 None으로 들어옵니다.
+    shelters.loc[shelters.index % 7 == 0, 'careTel'] = None
+    shelters.loc[shelters.index % 5 == 0, ['lat', 'lon']] = None
+    return animals, shelters
+
+def test_preprocess_data_matches_reference(raw_data):
+    animals_raw, shelters_raw = raw_data
+    shelters, animals = update_data.preprocess_data(animals_raw, shelters_raw)
+    expected_shelters, expected_animals = _reference_preprocess_data(animals_raw, shelters_raw)
+    # 예전 구현과 의도적으로 다른 점은 API 컬럼의 결측 값을 NaN 하나로 통일한 것뿐입니다.
+    for col in ['care_reg_no', 'care_tel']:
+        expected_shelters[col] = expected_shelters[col].where(expected_shelters[col].notna())
+
+    pd.testing.assert_frame_equal(animals, expected_animals)
+    pd.testing.assert_frame_equal(
+        shelters.sort_values('shelter_name').reset_index(drop=True),
+        expected_shelters.sort_values('shelter_name').reset_index(drop=True)[shelters.columns],
+    )
+
+def test_missing_api_columns_use_one_filler(raw_data):
+    animals_raw, shelters_raw = raw_data
+    shelters, _ = update_data.preprocess_data(animals_raw, shelters_raw)
+
+    # 동물 데이터에만 있는 보호소의 결측과 API 응답의 None이 같은 값(NaN)이어야 행 해시가 흔들리지 않습니다.
+    animal_only = ~shelters['shelter_name'].isin(shelters_raw['careNm'])
+    assert animal_only.any()
+    for col in ['care_reg_no', 'care_tel']:
+        missing = shelters[col][shelters[col].isna()]
+        assert not missing.map(lambda value: value is None).any()
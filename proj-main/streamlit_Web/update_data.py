@@ -8,38 +8,57 @@
 # [주요 실행 흐름]
 # 1. **설정 로드:** `config.ini`에서 API 키와 DB 접속 정보를 가져옵니다.
 # 2. **데이터 추출 (Extract):**
-#    - `load_local_json_data`: 로컬 `data` 폴더의 JSON 파일에서 유기동물 데이터를 가져옵니다.
+#    - `load_local_json_data`: 로컬 `streamlit_Web/data` 폴더의 JSON 파일에서 유기동물 데이터를 가져옵니다.
 #    - `fetch_abandoned_animals`: 공공데이터포털에서 유기동물 정보를 조회합니다.
-#    - `fetch_shelters`: 전국의 모든 동물보호소 정보를 조회합니다.
-#    - `get_coordinates_from_address`: 카카오 지도 API를 사용하여 주소를
-#      위도/경도 좌표로 변환(지오코딩)합니다.
+#    - `fetch_shelters`: 전국의 모든 동물보호소 정보를 시/도별로 동시에 조회합니다.
+#      중단된 경우 `checkpoints/shelters.json`에서 이어서 수집합니다.
+#      (두 함수 모두 `api_client.ApiClient`를 공유하는 비동기 버전(`*_async`)이 있습니다.)
+#    - `geocoder.geocode_addresses`: 카카오 지도 API를 사용하여 주소를
+#      위도/경도 좌표로 변환(지오코딩)합니다. 결과는 `cache/geocode.sqlite`에
+#      저장되어 다음 실행에서 재사용됩니다.
 # 3. **데이터 변환 (Transform):**
 #    - `preprocess_data`: API와 JSON으로부터 받은 모든 원본 데이터를 분석하기 좋은 형태로
 #      가공하고 결합합니다.
 # 4. **데이터 적재 (Load):**
-#    - `update_database`: 가공된 데이터를 Pandas DataFrame 형태로 만든 후,
-#      SQLAlchemy를 통해 `shelters`와 `animals` 테이블에 저장합니다.
+#    - `update_database`: 가공된 데이터를 스테이징 테이블에 적재한 뒤 `shelters`와
+#      `animals` 테이블과 원자적으로 교체하고, 데이터 버전을 올립니다.
+#    - `update_database_incremental`: 증분 모드에서 새로 생기거나 바뀐 행만 반영하고,
+#      사라진 행은 닫힘으로 표시합니다. (`db_loader.py` 참고)
+#    - `save_snapshot`: 적재가 끝나면 같은 데이터 버전의 Arrow 스냅샷을
+#      `snapshots/`에 저장합니다. 앱은 DB 대신 이 스냅샷을 먼저 읽습니다.
+#      이름/품종/이야기/성격 검색용 n-gram 색인(`search_index.py`)도 함께 만듭니다.
+#    - `image_prefetcher.prefetch_images`: 적재한 동물의 사진을 `images/`로 동시에
+#      미리 받습니다. (`--skip-images`로 건너뛸 수 있습니다.)
 #
 # [실행 방법]
-# - 터미널에서 `python update_data.py` 명령으로 직접 실행합니다.
+# - 터미널에서 `python update_data.py` 명령으로 직접 실행합니다. (전체 교체)
+# - `python update_data.py --mode incremental`로 실행하면 마지막으로 성공한 수집
+#   이후 기간만 가져와 변경분만 반영합니다. 수집 기간은 `etl_watermark` 테이블에 기록됩니다.
 # - 주기적으로 자동 실행되도록 스케줄링(예: Cron, Windows Scheduler)하여
 #   데이터를 최신 상태로 유지할 수 있습니다.
 # ==============================================================================
 
+import argparse
+import asyncio
+import functools
 import json
-from data_manager import DataManager
 import pandas as pd
 import xml.etree.ElementTree as ET
-import mysql.connector
-from sqlalchemy import create_engine
+from sqlalchemy import text
 import configparser
 import os
+import time
 from datetime import datetime, timedelta
-import subprocess
-import tempfile
 from urllib.parse import quote
-import requests
-import json
+import aiohttp
+from api_client import run_with_client
+from db_settings import create_db_engine
+from geocoder import geocode_addresses
+from image_prefetcher import prefetch_images
+from search_index import SEARCH_INDEX_DIRNAME, SearchIndex
+from snapshot_store import clear_snapshots, write_snapshot
+from utils import map_species_names, parse_birth_year
+from db_loader import BOOKKEEPING_COLUMNS, BULK_WRITERS, DEFAULT_BULK_WRITER, bump_data_version, get_watermark, set_watermark, swap_in_tables, upsert_changed_rows
 
 # --- 경로 설정 ---
 current_script_path = os.path.abspath(__file__)
@@ -47,273 +66,488 @@ streamlit_web_dir = os.path.dirname(current_script_path)
 project_root = os.path.dirname(streamlit_web_dir)
 CONFIG_PATH = os.path.join(project_root, 'config.ini')
 
+# --- 페이지 수집 설정 ---
+PAGE_CONCURRENCY = 4     # 한 번에 동시에 요청할 페이지 수 (축종별)
+PAGE_RETRIES = 3         # 페이지 하나당 최대 재시도 횟수
+RETRY_BACKOFF = 1.0      # 재시도 대기 시간의 기준값(초). 시도마다 2배씩 늘어납니다.
+ANIMAL_TYPES = {'개': '417000', '고양이': '422400', '기타': '429900'}
+SIDO_CONCURRENCY = 6     # 동시에 수집할 시/도 수
+SHELTER_CHECKPOINT_PATH = os.path.join(streamlit_web_dir, 'checkpoints', 'shelters.json')
+
+# --- 증분 적재 설정 ---
+WATERMARK_JOB = 'abandoned_animals'  # etl_watermark 테이블의 작업 이름
+INITIAL_BGNDE = '20240501'           # 워터마크가 없을 때 사용할 수집 시작일
+INCREMENTAL_LOOKBACK_DAYS = 7        # 상태 변경을 다시 반영하기 위해 앞당겨 수집할 일수
+
 # --- 설정 정보 로드 함수 ---
-def get_db_config():
-    """`config.ini`에서 [DB] 섹션의 설정을 읽어옵니다."""
+@functools.lru_cache(maxsize=None)
+def _read_config():
+    """`config.ini`를 한 번만 읽어 프로세스 동안 재사용합니다."""
     config = configparser.ConfigParser()
     if not os.path.exists(CONFIG_PATH):
         raise FileNotFoundError(f"설정 파일을 찾을 수 없습니다: {CONFIG_PATH}")
     config.read(CONFIG_PATH)
-    return config['DB']
+    return config
+
+def get_db_config():
+    """`config.ini`에서 [DB] 섹션의 설정을 읽어옵니다."""
+    return _read_config()['DB']
 
 def get_api_key():
     """`config.ini`에서 공공데이터포털 API 키를 읽어옵니다."""
-    config = configparser.ConfigParser()
-    if not os.path.exists(CONFIG_PATH):
-        raise FileNotFoundError(f"설정 파일을 찾을 수 없습니다: {CONFIG_PATH}")
-    config.read(CONFIG_PATH)
-    return config['API']['service_key']
+    return _read_config()['API']['service_key']
 
 def get_kakao_rest_api_key():
     """`config.ini`에서 카카오 지도 API 키를 읽어옵니다."""
-    config = configparser.ConfigParser()
-    if not os.path.exists(CONFIG_PATH):
-        raise FileNotFoundError(f"설정 파일을 찾을 수 없습니다: {CONFIG_PATH}")
-    config.read(CONFIG_PATH)
-    return config['API']['kakao_rest_api_key']
+    return _read_config()['API']['kakao_rest_api_key']
+
+async def _fetch_page(client, url, label, retries=PAGE_RETRIES, backoff=RETRY_BACKOFF):
+    """
+    API 페이지 하나를 스트리밍 파싱하여 `ApiPage`로 반환합니다.
+    네트워크 오류, 빈 응답, 파싱 오류, 정상이 아닌 resultCode가 발생하면
+    지수 백오프로 재시도하고, 끝내 실패하면 None을 반환합니다.
+    """
+    for attempt in range(retries + 1):
+        try:
+            page = await client.fetch_page(url)
+            if page is None:
+                reason = "빈 응답"
+            else:
+                if page.result_code == '00':
+                    return page
+                reason = f"API 오류 (코드: {page.result_code or 'N/A'}, 메시지: {page.result_msg or 'N/A'})"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            reason = f"다운로드 오류: {type(e).__name__} {e}"
+        except ET.ParseError as e:
+            reason = f"XML 파싱 오류: {e}"
+
+        if attempt < retries:
+            delay = backoff * (2 ** attempt)
+            print(f"경고: {label} {reason} - {delay:.1f}초 후 재시도 ({attempt + 1}/{retries})")
+            await asyncio.sleep(delay)
+        else:
+            print(f"오류: {label} {reason} - 재시도 횟수를 모두 사용했습니다.")
+    return None
+
+async def fetch_abandoned_animals_async(client, api_key, bgnde, endde, upkind='', concurrency=PAGE_CONCURRENCY):
+    """
+    공공데이터포털에서 특정 기간과 축종의 유기동물 정보를 가져옵니다. (비동기 버전)
+    첫 페이지의 `totalCount`로 전체 페이지 수를 구한 뒤, 나머지 페이지는
+    최대 `concurrency`개씩 동시에 요청하고 결과는 페이지 순서대로 합칩니다.
 
-def fetch_abandoned_animals(api_key, bgnde, endde, upkind=''):
-    """공공데이터포털에서 특정 기간과 축종의 유기동물 정보를 가져옵니다."""
+    Returns:
+        tuple: `(items, complete)`. 첫 페이지를 끝내 받지 못하면 items는 None이고,
+        일부 페이지만 실패하면 나머지 결과와 함께 complete가 False입니다.
+    """
     api_key_encoded = quote(api_key)
     endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/abandonmentPublic_v2"
-
-    all_items = []
-    page_no = 1
     num_of_rows = 1000 # API가 허용하는 최대 요청 개수
 
-    while True:
-        # API 요청 URL 구성
+    def page_url(page_no):
         url = f"{endpoint}?serviceKey={api_key_encoded}&bgnde={bgnde}&endde={endde}&pageNo={page_no}&numOfRows={num_of_rows}&_type=xml"
         if upkind:
             url += f"&upkind={upkind}"
+        return url
+
+    # 1. 첫 페이지로 전체 건수 확인
+    label = f"[{upkind or '전체'}] 페이지 1"
+    print(f"[DEBUG] API 요청 URL: {page_url(1)}")
+    first_page = await _fetch_page(client, page_url(1), label)
+    if first_page is None:
+        return None, False
+
+    first_items = first_page.items
+    total_count = first_page.total_count or 0
+    total_pages = -(-total_count // num_of_rows) # 올림 나눗셈
+    print(f"{label}에서 {len(first_items)}건 수집. (전체 {total_count}건, {total_pages}페이지)")
+
+    # 2. 나머지 페이지를 동시에 요청
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_rest(page_no):
+        async with semaphore:
+            page = await _fetch_page(client, page_url(page_no), f"[{upkind or '전체'}] 페이지 {page_no}")
+        return page.items if page is not None else None
+
+    rest_pages = await asyncio.gather(*(fetch_rest(page_no) for page_no in range(2, total_pages + 1)))
+
+    # 3. 페이지 순서대로 결과 병합
+    all_items = list(first_items)
+    failed_pages = []
+    for page_no, items in enumerate(rest_pages, start=2):
+        if items is None:
+            failed_pages.append(page_no)
+        else:
+            all_items.extend(items)
 
-        print(f"[DEBUG] API 요청 URL: {url}")
-
-        # PowerShell을 사용하여 데이터를 임시 파일로 다운로드
-        fp, temp_path = tempfile.mkstemp(suffix=".xml")
-        os.close(fp)
-
-        try:
-            command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-            subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
-
-            with open(temp_path, 'rb') as f:
-                xml_data = f.read()
-
-            if not xml_data:
-                print(f"경고: 페이지 {page_no}에서 빈 응답을 받았습니다.")
-                break
-
-            root = ET.fromstring(xml_data.decode('utf-8'))
-
-            # API 응답 코드 확인
-            result_code = root.findtext('.//resultCode', 'N/A')
-            if result_code != '00':
-                print(f"API 오류 발생 (코드: {result_code}, 메시지: {root.findtext('.//resultMsg', 'N/A')})")
-                break
-
-            items_in_page = root.findall('.//item')
-            if not items_in_page:
-                print(f"정보: 페이지 {page_no}에 더 이상 데이터가 없습니다.")
-                break
-
-            # 수집된 데이터를 리스트에 추가
-            for item in items_in_page:
-                item_dict = {child.tag: child.text for child in item}
-                all_items.append(item_dict)
+    if failed_pages:
+        print(f"경고: [{upkind or '전체'}] {len(failed_pages)}개 페이지를 가져오지 못했습니다: {failed_pages}")
+    print(f"[{upkind or '전체'}] 총 {len(all_items)} / 전체 {total_count}건 수집 완료")
+    return all_items, not failed_pages
 
-            total_count = int(root.findtext('.//totalCount', '0'))
-            print(f"페이지 {page_no}에서 {len(items_in_page)}건 데이터 수집. (현재까지 총 {len(all_items)} / 전체 {total_count}건)")
+def fetch_abandoned_animals(api_key, bgnde, endde, upkind='', concurrency=PAGE_CONCURRENCY):
+    """`fetch_abandoned_animals_async`의 동기 버전입니다."""
+    return run_with_client(fetch_abandoned_animals_async, api_key, bgnde, endde, upkind, concurrency)
 
-            # 모든 데이터를 수집했으면 반복 종료
-            if len(all_items) >= total_count:
-                break
-
-            page_no += 1
+async def fetch_all_abandoned_animals_async(client, api_key, bgnde, endde, animal_types=None, concurrency=PAGE_CONCURRENCY):
+    """
+    여러 축종의 유기동물 정보를 동시에 가져옵니다.
+    `{축종 이름: (items, complete)}` 딕셔너리를 `animal_types` 순서대로 반환합니다.
+    (`fetch_abandoned_animals_async` 참고)
+    """
+    animal_types = animal_types or ANIMAL_TYPES
+    results = await asyncio.gather(*(
+        fetch_abandoned_animals_async(client, api_key, bgnde, endde, upkind=code, concurrency=concurrency)
+        for code in animal_types.values()
+    ))
+    return dict(zip(animal_types.keys(), results))
 
-        except subprocess.CalledProcessError as e:
-            print(f"PowerShell을 통한 데이터 다운로드 중 오류 발생: {e.stderr}")
-            return None # 오류 발생 시 None 반환
-        except ET.ParseError as e:
-            print(f"XML 파싱 오류: {e}")
-            return None
-        except Exception as e:
-            print(f"알 수 없는 오류 발생: {e}")
-            return None
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+class RegionListError(RuntimeError):
+    """시/도 또는 시/군/구 목록을 가져오지 못했을 때 발생합니다. 이 경우 수집을 중단합니다."""
 
-    return all_items
+async def _fetch_region_items(client, url, label):
+    """
+    지역 목록 API의 `<item>` 목록을 반환합니다. 유기동물 조회와 같이 `_fetch_page`로
+    resultCode를 확인하고 재시도하며, 끝내 받지 못하면 `RegionListError`를 발생시킵니다.
+    """
+    page = await _fetch_page(client, url, label)
+    if page is None:
+        raise RegionListError(f"{label} 조회에 실패했습니다.")
+    return page.items
 
-def _fetch_sido_list(api_key):
-    """보호소 목록 조회를 위해 내부적으로 사용되는 시/도 목록 조회 함수입니다."""
+async def _fetch_sido_list_async(client, api_key):
+    """
+    보호소 목록 조회를 위해 내부적으로 사용되는 시/도 목록 조회 함수입니다. (비동기 버전)
+    목록을 받지 못하거나 비어 있으면 `RegionListError`를 발생시킵니다.
+    """
     api_key_encoded = quote(api_key)
     endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/sido_v2"
     url = f"{endpoint}?serviceKey={api_key_encoded}&numOfRows=100&_type=xml"
-    
-    fp, temp_path = tempfile.mkstemp(suffix=".xml")
-    os.close(fp)
-    
-    try:
-        command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-        subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
-        
-        with open(temp_path, 'rb') as f:
-            xml_data = f.read()
-        
-        if not xml_data:
-            return []
-            
-        root = ET.fromstring(xml_data.decode('utf-8'))
-        sido_list = []
-        for item in root.findall('.//item'):
-            sido_list.append({"code": item.findtext("orgCd"), "name": item.findtext("orgdownNm")})
-        return sido_list
-    except Exception as e:
-        print(f"시/도 목록 조회 중 오류 발생: {e}")
-        return []
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
-def _fetch_sigungu_list(api_key, sido_code):
-    """특정 시/도에 속한 시/군/구 목록을 조회하는 내부 함수입니다."""
+    items = await _fetch_region_items(client, url, "시/도 목록")
+    if not items:
+        raise RegionListError("시/도 목록이 비어 있습니다.")
+    return [{"code": item.get("orgCd"), "name": item.get("orgdownNm")} for item in items]
+
+def _fetch_sido_list(api_key):
+    """`_fetch_sido_list_async`의 동기 버전입니다."""
+    return run_with_client(_fetch_sido_list_async, api_key)
+
+async def _fetch_sigungu_list_async(client, api_key, sido_code):
+    """
+    특정 시/도에 속한 시/군/구 목록을 조회하는 내부 함수입니다. (비동기 버전)
+    목록을 받지 못하면 `RegionListError`를 발생시킵니다. (시/군/구가 없는 시/도는 빈 목록입니다.)
+    """
     api_key_encoded = quote(api_key)
     endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/sigungu_v2"
     url = f"{endpoint}?serviceKey={api_key_encoded}&upr_cd={sido_code}&_type=xml"
-    
-    fp, temp_path = tempfile.mkstemp(suffix=".xml")
-    os.close(fp)
-    
-    try:
-        command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-        subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
-        
-        with open(temp_path, 'rb') as f:
-            xml_data = f.read()
-        
-        if not xml_data:
-            return []
-            
-        root = ET.fromstring(xml_data.decode('utf-8'))
-        sigungu_list = []
-        for item in root.findall('.//item'):
-            sigungu_list.append({"upr_code": item.findtext("uprCd"), "code": item.findtext("orgCd"), "name": item.findtext("orgdownNm")})
-        return sigungu_list
-    except Exception as e:
-        print(f"시/군/구 목록 조회 중 오류 발생: {e}")
-        return []
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-def fetch_shelters(api_key):
-    """전국의 모든 동물보호소 정보를 시/도 및 시/군/구별로 순회하며 가져옵니다."""
+
+    items = await _fetch_region_items(client, url, f"시/군/구 목록 ({sido_code})")
+    return [{"upr_code": item.get("uprCd"), "code": item.get("orgCd"), "name": item.get("orgdownNm")} for item in items]
+
+def _fetch_sigungu_list(api_key, sido_code):
+    """`_fetch_sigungu_list_async`의 동기 버전입니다."""
+    return run_with_client(_fetch_sigungu_list_async, api_key, sido_code)
+
+async def fetch_kind_map_async(client, api_key):
+    """
+    축종(`ANIMAL_TYPES`)별 품종 목록을 조회하여 `{품종 코드: 한글 이름}` 사전을 반환합니다. (비동기 버전)
+    앱(`data_manager.get_kind_list`)과 같은 목록이며, 한 페이지라도 받지 못하면 None을 반환합니다.
+    """
     api_key_encoded = quote(api_key)
-    endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/shelter_v2"
-    all_shelters = []
-    sido_list = _fetch_sido_list(api_key)
+    endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/kind_v2"
+    kind_map = {}
+    for upkind in ANIMAL_TYPES.values():
+        page_no, fetched = 1, 0
+        while True:
+            url = f"{endpoint}?serviceKey={api_key_encoded}&up_kind_cd={upkind}&pageNo={page_no}&numOfRows=1000&_type=xml"
+            page = await _fetch_page(client, url, f"품종 목록 [{upkind}] 페이지 {page_no}")
+            if page is None:
+                return None
+            for item in page.items:
+                kind_map[item.get("kindCd")] = item.get("kindNm")
+            fetched += len(page.items)
+            if not page.items or fetched >= (page.total_count or 0):
+                break
+            page_no += 1
+    return kind_map
 
-    if not sido_list:
-        print("경고: 시도 목록을 가져오지 못하여 보호소 데이터를 수집할 수 없습니다.")
-        return []
+def fetch_kind_map(api_key):
+    """`fetch_kind_map_async`의 동기 버전입니다."""
+    return run_with_client(fetch_kind_map_async, api_key)
 
-    for sido_info in sido_list:
-        sido_code = sido_info['code']
-        sido_name = sido_info['name']
-        print(f"--- {sido_name} ({sido_code}) 보호소 데이터 수집 시작 ---")
+class ShelterCheckpoint:
+    """
+    보호소 수집 진행 상황을 (시/도, 페이지) 단위로 파일에 저장하는 체크포인트입니다.
+    수집이 중간에 중단되더라도 다음 실행 시 이미 받은 페이지는 다시 요청하지 않습니다.
 
-        page_no = 1
-        collected_in_sido = 0
-        total_in_sido = -1 # -1로 초기화하여 아직 totalCount를 받지 않았음을 표시
+    파일 형식: `{시/도 코드: {"total_count": int, "pages": {페이지 번호: [item, ...]}}}`
+    """
+    def __init__(self, path):
+        self.path = path
+        self._data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+                print(f"정보: 보호소 수집 체크포인트를 불러왔습니다: {path}")
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"경고: 체크포인트 파일을 읽지 못해 처음부터 수집합니다: {e}")
+                self._data = {}
+
+    def get_sido(self, sido_code):
+        """`(total_count, {페이지 번호: items})`를 반환합니다. 기록이 없으면 `(-1, {})`입니다."""
+        entry = self._data.get(sido_code, {})
+        pages = {int(page_no): items for page_no, items in entry.get('pages', {}).items()}
+        return entry.get('total_count', -1), pages
+
+    def save_page(self, sido_code, page_no, total_count, items):
+        """페이지 하나의 수집 결과를 기록하고 파일에 바로 반영합니다."""
+        entry = self._data.setdefault(sido_code, {'total_count': total_count, 'pages': {}})
+        entry['total_count'] = total_count
+        entry['pages'][str(page_no)] = items
+
+        # 쓰는 도중 중단되어도 기존 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체합니다.
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        """모든 시/도 수집이 끝난 뒤 체크포인트 파일을 삭제합니다."""
+        self._data = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def _crawl_sido_shelters(client, api_key_encoded, sido_info, checkpoint):
+    """시/도 하나의 보호소 페이지를 순서대로 수집하고 수집 결과와 통계를 반환합니다."""
+    endpoint = "https://apis.data.go.kr/1543061/abandonmentPublicService_v2/shelter_v2"
+    sido_code = sido_info['code']
+    sido_name = sido_info['name']
+    started = time.perf_counter()
+
+    total_in_sido, saved_pages = checkpoint.get_sido(sido_code)
+    items_in_sido = []
+    fetched_pages = 0
+    resumed_pages = 0
+    complete = False
+    page_no = 1
 
-        while True:
+    while True:
+        if page_no in saved_pages:
+            # 이전 실행에서 이미 받은 페이지는 체크포인트에서 가져옵니다.
+            items_in_page = saved_pages[page_no]
+            resumed_pages += 1
+        else:
             url = f"{endpoint}?serviceKey={api_key_encoded}&upr_cd={sido_code}&pageNo={page_no}&numOfRows=1000&_type=xml"
             print(f"[DEBUG] 보호소 API 요청 URL: {url}") # 디버깅을 위한 URL 출력
 
-            fp, temp_path = tempfile.mkstemp(suffix=".xml")
-            os.close(fp)
+            page = await _fetch_page(client, url, f"{sido_name} 페이지 {page_no}")
+            if page is None:
+                break # 재시도 후에도 실패: 체크포인트를 남겨 다음 실행에서 이어서 수집합니다.
+            fetched_pages += 1
+
+            items_in_page = page.items
+            if total_in_sido == -1: # 첫 요청 시에만 totalCount를 설정
+                total_in_sido = page.total_count or 0
+            if items_in_page:
+                checkpoint.save_page(sido_code, page_no, total_in_sido, items_in_page)
+
+        if not items_in_page:
+            print(f"정보: {sido_name} 페이지 {page_no}에 더 이상 데이터가 없습니다.")
+            complete = True
+            break
+
+        items_in_sido.extend(items_in_page)
+        print(f"{sido_name} 페이지 {page_no}에서 {len(items_in_page)}건 수집. (현재 시/도 누적 {len(items_in_sido)} / 전체 {total_in_sido}건)")
+
+        if len(items_in_sido) >= total_in_sido:
+            complete = True
+            break
+        page_no += 1
+
+    stats = {
+        'sido_name': sido_name,
+        'items': len(items_in_sido),
+        'total_count': total_in_sido,
+        'fetched_pages': fetched_pages,
+        'resumed_pages': resumed_pages,
+        'elapsed': time.perf_counter() - started,
+        'complete': complete,
+    }
+    return items_in_sido, stats
+
+def _print_shelter_crawl_report(stats_list):
+    """시/도별 수집 시간과 건수를 표 형태로 출력합니다."""
+    print("--- 시/도별 보호소 수집 결과 ---")
+    print(f"{'시/도':<12}{'수집':>8}{'전체':>8}{'요청 페이지':>12}{'재개 페이지':>12}{'소요(초)':>10}  상태")
+    for stats in stats_list:
+        status = "완료" if stats['complete'] else "미완료"
+        print(f"{stats['sido_name']:<12}{stats['items']:>8}{stats['total_count']:>8}{stats['fetched_pages']:>12}"
+              f"{stats['resumed_pages']:>12}{stats['elapsed']:>10.2f}  {status}")
+
+async def fetch_shelters_async(client, api_key, checkpoint_path=SHELTER_CHECKPOINT_PATH, concurrency=SIDO_CONCURRENCY):
+    """
+    전국의 모든 동물보호소 정보를 시/도별로 동시에 수집합니다. (비동기 버전)
+    진행 상황은 `checkpoint_path`에 (시/도, 페이지) 단위로 저장되며, 모든 시/도 수집이
+    끝나면 체크포인트를 삭제합니다. 일부 시/도가 실패하면 체크포인트를 남겨 두어
+    다음 실행에서 이어서 수집합니다. 시/도 목록을 받지 못하면 `RegionListError`를 발생시킵니다.
 
-            try:
-                command = f"powershell -Command \"(New-Object System.Net.WebClient).DownloadFile('{url}', '{temp_path}')\""
-                subprocess.run(command, check=True, shell=True, capture_output=True, text=True)
+    Returns:
+        tuple: `(items, complete)`. 모든 시/도의 수집이 끝났을 때만 complete가 True입니다.
+    """
+    api_key_encoded = quote(api_key)
+    sido_list = await _fetch_sido_list_async(client, api_key)  # 실패하면 RegionListError
 
-                with open(temp_path, 'rb') as f:
-                    xml_data = f.read()
+    checkpoint = ShelterCheckpoint(checkpoint_path)
+    semaphore = asyncio.Semaphore(concurrency)
 
-                if not xml_data:
-                    print(f"경고: {sido_name} 페이지 {page_no}에서 빈 응답을 받았습니다.")
-                    break
+    async def crawl(sido_info):
+        async with semaphore:
+            print(f"--- {sido_info['name']} ({sido_info['code']}) 보호소 데이터 수집 시작 ---")
+            return await _crawl_sido_shelters(client, api_key_encoded, sido_info, checkpoint)
 
-                root = ET.fromstring(xml_data.decode('utf-8'))
-                result_code = root.findtext('.//resultCode', 'N/A')
+    results = await asyncio.gather(*(crawl(sido_info) for sido_info in sido_list))
 
-                if result_code != '00':
-                    print(f"API 오류 (코드: {result_code}, 메시지: {root.findtext('.//resultMsg', 'N/A')})")
-                    break
+    # 시/도 순서대로 결과 병합
+    all_shelters = []
+    stats_list = []
+    for items_in_sido, stats in results:
+        all_shelters.extend(items_in_sido)
+        stats_list.append(stats)
+
+    _print_shelter_crawl_report(stats_list)
+    complete = all(stats['complete'] for stats in stats_list)
+    if complete:
+        checkpoint.clear()
+    else:
+        print(f"경고: 일부 시/도 수집이 끝나지 않았습니다. 다음 실행 시 체크포인트에서 이어서 수집합니다: {checkpoint_path}")
 
-                items_in_page = root.findall('.//item')
-                if not items_in_page:
-                    print(f"정보: {sido_name} 페이지 {page_no}에 더 이상 데이터가 없습니다.")
-                    break
+    return all_shelters, complete
 
-                for item in items_in_page:
-                    item_dict = {child.tag: child.text for child in item}
-                    all_shelters.append(item_dict)
-                
-                collected_in_sido += len(items_in_page)
+def fetch_shelters(api_key, checkpoint_path=SHELTER_CHECKPOINT_PATH, concurrency=SIDO_CONCURRENCY):
+    """`fetch_shelters_async`의 동기 버전입니다."""
+    return run_with_client(fetch_shelters_async, api_key, checkpoint_path, concurrency)
 
-                if total_in_sido == -1: # 첫 요청 시에만 totalCount를 설정
-                    total_in_sido = int(root.findtext('.//totalCount', '0'))
+def get_coordinates_from_address(address):
+    """
+    카카오 로컬 API를 사용하여 주어진 주소 문자열을 위도, 경도 좌표로 변환합니다.
+    지도 시각화를 위해 필수적인 기능입니다. 결과는 `geocoder`의 영구 캐시를 거칩니다.
+    여러 주소를 변환할 때는 `geocoder.geocode_addresses`로 한 번에 조회하세요.
+    """
+    return geocode_addresses([address], get_kakao_rest_api_key())[address]
 
-                print(f"{sido_name} 페이지 {page_no}에서 {len(items_in_page)}건 수집. (현재 시/도 누적 {collected_in_sido} / 전체 {total_in_sido}건)")
+def _prepare_animals(animal_df_raw):
+    """원본 동물 데이터의 컬럼 이름을 통일하고 날짜 변환 및 파생 컬럼을 추가합니다."""
+    if isinstance(animal_df_raw, pd.DataFrame):
+        animals_df = animal_df_raw.copy()
+    else:
+        animals_df = pd.DataFrame(animal_df_raw)
 
-                if collected_in_sido >= total_in_sido:
-                    break
-                
-                page_no += 1
+    if animals_df.empty:
+        return pd.DataFrame()
+
+    # 컬럼 이름 변경
+    rename_map = {
+        'desertionNo': 'desertion_no', 'careNm': 'shelter_name', 'age': 'age',
+        'popfile': 'image_url', 'kindCd': 'species', 'specialMark': 'story',
+        'sexCd': 'sex', 'noticeSdt': 'notice_date', 'processState': 'process_state',
+        'careAddr': 'careAddr', 'happenDt': 'happen_date',
+        '성격 및 특징': 'personality'  # 로컬 JSON(data/dog_info.json)의 성격 설명
+    }
+    animals_df.rename(columns={k: v for k, v in rename_map.items() if k in animals_df.columns}, inplace=True)
+
+    # 날짜 변환
+    for date_col in ['notice_date', 'happen_date']:
+        if date_col in animals_df.columns:
+            animals_df[date_col] = pd.to_datetime(animals_df[date_col], format='%Y%m%d', errors='coerce')
+
+    # 파생 컬럼 생성
+    if 'species' in animals_df.columns and 'sex' in animals_df.columns:
+        animals_df['animal_name'] = animals_df['species'] + ' (' + animals_df['sex'] + ')'
+    else:
+        animals_df['animal_name'] = '정보 없음'
 
-            except Exception as e:
-                print(f"{sido_name} 보호소 조회 중 오류 발생: {e}")
-                break
-            finally:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+    # 성격 정보는 로컬 JSON에만 있으며, 검색 색인에도 사용됩니다.
+    if 'personality' in animals_df.columns:
+        animals_df['personality'] = animals_df['personality'].fillna('정보 없음')
+    else:
+        animals_df['personality'] = '정보 없음'
+    return animals_df
+
+def _finalize_animals(animals_df):
+    """`animals` 테이블에 저장할 최종 컬럼만 남깁니다."""
+    # image_url 컬럼이 없으면 추가 (NaN으로 채움)
+    if 'image_url' not in animals_df.columns:
+        animals_df['image_url'] = None
     
-    return all_shelters
+    # 앱의 나이순 정렬에 쓰는 출생 연도는 적재할 때 한 번만 계산합니다.
+    if 'age' in animals_df.columns:
+        animals_df['birth_year'] = parse_birth_year(animals_df['age'])
 
-def get_coordinates_from_address(address):
+    final_animal_cols = [
+        'desertion_no', 'shelter_name', 'animal_name', 'species', 'age', 'birth_year',
+        'image_url', 'personality', 'story', 'notice_date', 'sex', 'process_state',
+        'careAddr', 'happen_date'
+    ]
+    existing_final_cols = [col for col in final_animal_cols if col in animals_df.columns]
+    return animals_df[existing_final_cols]
+
+def preprocess_animals(animal_df_raw):
     """
-    카카오 로컬 API를 사용하여 주어진 주소 문자열을 위도, 경도 좌표로 변환합니다.
-    지도 시각화를 위해 필수적인 기능입니다.
+    동물 데이터만 가공하여 반환합니다. 보호소 집계와 지오코딩은 수행하지 않으므로,
+    증분 적재 모드에서 수집 기간(window)의 동물 데이터를 가공할 때 사용합니다.
     """
-    kakao_api_key = get_kakao_rest_api_key()
-    if not kakao_api_key:
-        print("카카오 REST API 키가 설정되지 않았습니다.")
-        return None, None
-
-    url = "https://dapi.kakao.com/v2/local/search/address.json"
-    headers = {"Authorization": f"KakaoAK {kakao_api_key}"}
-    params = {"query": address}
+    return _finalize_animals(_prepare_animals(animal_df_raw))
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status() # HTTP 오류 발생 시 예외 처리
-        data = response.json()
-        
-        if data and data['documents']:
-            coords = data['documents'][0]
-            return float(coords['y']), float(coords['x']) # (위도, 경도) 순서로 반환
-        else:
-            print(f"주소에 대한 좌표를 찾을 수 없습니다: {address}")
-            return None, None
-    except requests.exceptions.RequestException as e:
-        print(f"카카오 지오코딩 API 호출 중 오류 발생: {e}")
-        return None, None
-    except json.JSONDecodeError:
-        print(f"카카오 지오코딩 API 응답 파싱 오류: {response.text}")
-        return None, None
+def _group_mode(df, group_col, value_col):
+    """
+    그룹별 최빈값을 구합니다. 빈도가 같으면 먼저 나온 값을 사용하므로
+    그룹마다 `value_counts().index[0]`을 호출한 결과와 같습니다.
+    """
+    positions = df[[group_col, value_col]].reset_index(drop=True).reset_index()
+    counts = (
+        positions.groupby([group_col, value_col], sort=False)
+        .agg(_n=('index', 'size'), _first=('index', 'min'))
+        .reset_index()
+        .sort_values([group_col, '_n', '_first'], ascending=[True, False, True])
+    )
+    return counts.drop_duplicates(group_col).set_index(group_col)[value_col]
+
+def _aggregate_shelters(animals_df):
+    """
+    동물 데이터를 보호소 단위로 집계합니다.
+    그룹마다 파이썬 함수를 실행하지 않도록, 조건은 불리언 컬럼으로 미리 계산해
+    합산하고 대표 품종은 `_group_mode`로 한 번에 구합니다.
+    """
+    long_term_cutoff = pd.Timestamp.now() - pd.Timedelta(days=30)
+    source = animals_df.assign(
+        _long_term=animals_df['notice_date'] < long_term_cutoff,
+        _adopted=animals_df['process_state'] == '종료(입양)',
+    )
+
+    named_aggs = {
+        'careAddr_animal': ('careAddr', 'first'),
+        'count': ('desertion_no', 'count'),
+        'long_term': ('_long_term', 'sum'),
+        'adopted': ('_adopted', 'sum'),
+    }
+    if 'image_url' in source.columns:
+        named_aggs['image_url'] = ('image_url', 'first')
+    shelters = source.groupby('shelter_name').agg(**named_aggs)
+
+    # 지역: 보호소 첫 행 주소의 첫 단어 (주소가 모두 비어 있으면 '정보 없음')
+    first_addr = source.drop_duplicates('shelter_name').set_index('shelter_name')['careAddr']
+    shelters['region'] = first_addr.str.split().str[0].reindex(shelters.index).fillna('정보 없음').astype(str)
+
+    # 대표 품종: 가장 많은 품종
+    shelters['species'] = _group_mode(source, 'shelter_name', 'species').reindex(shelters.index).fillna('정보 없음').astype(str)
+
+    if 'image_url' not in shelters.columns:
+        shelters['image_url'] = None
+    column_order = ['careAddr_animal', 'region', 'count', 'long_term', 'adopted', 'species', 'image_url']
+    return shelters[column_order].reset_index()
 
 def preprocess_data(animal_df_raw, shelter_api_df_raw):
     print(f"[DEBUG] preprocess_data 시작. animal_df_raw 타입: {type(animal_df_raw)}, shelter_api_df_raw 타입: {type(shelter_api_df_raw)}")
@@ -321,54 +555,14 @@ def preprocess_data(animal_df_raw, shelter_api_df_raw):
     # -------------------------------------
     # 1. 동물 데이터 처리 (DataFrame/리스트 모두 대응)
     # -------------------------------------
-    if isinstance(animal_df_raw, pd.DataFrame):
-        animals_df = animal_df_raw.copy()
-    else:
-        animals_df = pd.DataFrame(animal_df_raw)
+    animals_df = _prepare_animals(animal_df_raw)
 
     if animals_df.empty:
-        animals_df = pd.DataFrame()
         shelter_df_from_animals = pd.DataFrame()
     else:
-        # 컬럼 이름 변경
-        rename_map = {
-            'desertionNo': 'desertion_no', 'careNm': 'shelter_name', 'age': 'age',
-            'popfile': 'image_url', 'kindCd': 'species', 'specialMark': 'story',
-            'sexCd': 'sex', 'noticeSdt': 'notice_date', 'processState': 'process_state',
-            'careAddr': 'careAddr'
-        }
-        animals_df.rename(columns={k: v for k, v in rename_map.items() if k in animals_df.columns}, inplace=True)
-
-        # 날짜 변환
-        if 'notice_date' in animals_df.columns:
-            animals_df['notice_date'] = pd.to_datetime(animals_df['notice_date'], format='%Y%m%d', errors='coerce')
-
-        # 파생 컬럼 생성
-        if 'species' in animals_df.columns and 'sex' in animals_df.columns:
-            animals_df['animal_name'] = animals_df['species'] + ' (' + animals_df['sex'] + ')'
-        else:
-            animals_df['animal_name'] = '정보 없음'
-
-        animals_df['personality'] = '정보 없음'
-
-        # 보호소 단위로 집계
-        agg_dict = {
-            'careAddr_animal': ('careAddr', 'first'),
-            'region': ('careAddr', lambda x: x.iloc[0].split()[0] if x.notna().any() else '정보 없음'),
-            'count': ('desertion_no', 'count'),
-            'long_term': ('notice_date', lambda x: (x < pd.Timestamp.now() - pd.Timedelta(days=30)).sum()),
-            'adopted': ('process_state', lambda x: (x == '종료(입양)').sum()),
-            'species': ('species', lambda x: x.value_counts().index[0] if not x.empty else '정보 없음')
-        }
-        if 'image_url' in animals_df.columns:
-            agg_dict['image_url'] = ('image_url', 'first')
-        
         # `animals_df`에 필요한 컬럼이 모두 있는지 확인
         if all(col in animals_df.columns for col in ['shelter_name', 'desertion_no', 'notice_date', 'process_state']):
-            shelter_df_from_animals = animals_df.groupby('shelter_name').agg(**agg_dict).reset_index()
-
-            if 'image_url' not in shelter_df_from_animals.columns:
-                shelter_df_from_animals['image_url'] = None
+            shelter_df_from_animals = _aggregate_shelters(animals_df)
         else:
             shelter_df_from_animals = pd.DataFrame()
 
@@ -404,6 +598,12 @@ def preprocess_data(animal_df_raw, shelter_api_df_raw):
     else:
         merged_shelter_df = pd.merge(shelter_df_from_animals, shelter_api_df_processed, on='shelter_name', how='outer')
 
+    # 동물 데이터에만 있는 보호소는 병합으로 NaN이, API 응답에서 빠진 값은 None이 들어가므로
+    # 결측을 NaN 하나로 통일합니다. (`db_loader.compute_row_hash`는 둘을 다른 값으로 봅니다.)
+    for col in ['care_reg_no', 'care_tel']:
+        if col in merged_shelter_df.columns:
+            merged_shelter_df[col] = merged_shelter_df[col].where(merged_shelter_df[col].notna())
+
     # 좌표 채우기 + 주소 결합
     if not merged_shelter_df.empty:
         careAddr_api = merged_shelter_df['careAddr_api'] if 'careAddr_api' in merged_shelter_df.columns else pd.Series(index=merged_shelter_df.index)
@@ -414,25 +614,21 @@ def preprocess_data(animal_df_raw, shelter_api_df_raw):
         merged_shelter_df['lat'] = merged_shelter_df['lat_api'] if 'lat_api' in merged_shelter_df.columns else pd.NA
         merged_shelter_df['lon'] = merged_shelter_df['lon_api'] if 'lon_api' in merged_shelter_df.columns else pd.NA
 
-        # **중복 제거 + 캐싱**
-        cache = {} # 주소별로 좌표 저장
+        # **중복 제거 + 영구 캐시** (캐시에 없는 주소만 카카오 API로 동시에 조회)
         unique_addresses = merged_shelter_df.loc[
             merged_shelter_df['careAddr'].notna() & 
             (merged_shelter_df['lat'].isna() | merged_shelter_df['lon'].isna()), 
             'careAddr'
         ].unique()
 
-        for addr in unique_addresses:
-            if addr not in cache:
-                lat, lon = get_coordinates_from_address(addr)
-                cache[addr] = (lat, lon)
+        cache = geocode_addresses(unique_addresses, get_kakao_rest_api_key()) if len(unique_addresses) else {}
 
-        # 좌표 채워 넣기
-        for index, row in merged_shelter_df.iterrows():
-            if pd.isna(row['lat']) or pd.isna(row['lon']):
-                addr = row['careAddr']
-                if addr in cache:
-                    merged_shelter_df.at[index, 'lat'], merged_shelter_df.at[index, 'lon'] = cache[addr]
+        # 좌표 채워 넣기 (좌표가 비어 있고 조회 결과가 있는 행만 주소로 매핑)
+        fill_mask = (merged_shelter_df['lat'].isna() | merged_shelter_df['lon'].isna()) & merged_shelter_df['careAddr'].isin(cache.keys())
+        if fill_mask.any():
+            fill_addr = merged_shelter_df.loc[fill_mask, 'careAddr']
+            merged_shelter_df.loc[fill_mask, 'lat'] = fill_addr.map({addr: coords[0] for addr, coords in cache.items()})
+            merged_shelter_df.loc[fill_mask, 'lon'] = fill_addr.map({addr: coords[1] for addr, coords in cache.items()})
 
         # 좌표 못 찾은 주소는 lat/lon = 0으로 기본값 처리 (선택 사항)
         merged_shelter_df['lat'] = merged_shelter_df['lat'].fillna(0)
@@ -444,25 +640,28 @@ def preprocess_data(animal_df_raw, shelter_api_df_raw):
     # -------------------------------------
     # 4. 최종 컬럼 정리 및 반환
     # -------------------------------------
-    # image_url 컬럼이 없으면 추가 (NaN으로 채움)
-    if 'image_url' not in animals_df.columns:
-        animals_df['image_url'] = None
-    
-    final_animal_cols = [
-        'desertion_no', 'shelter_name', 'animal_name', 'species', 'age',
-        'image_url', 'personality', 'story', 'notice_date', 'sex', 'process_state'
-    ]
-    existing_final_cols = [col for col in final_animal_cols if col in animals_df.columns]
-
-    return merged_shelter_df, animals_df[existing_final_cols]
+    return merged_shelter_df, _finalize_animals(animals_df)
 
 # --- 로컬 JSON 데이터 로드 함수 추가 ---
+def _local_record_key(record, file_name, position):
+    """
+    로컬 JSON 레코드의 고유 번호(`desertionNo`)를 만듭니다. 로컬 데이터에는 공고번호가 없으므로
+    사이트 링크의 경로(예: `.../search/01_v/2967/` → `local-01_v-2967`)를 쓰고,
+    링크가 없으면 파일 이름과 순서로 만듭니다. (DB의 키 컬럼이 비면 적재되지 않음)
+    """
+    link = record.get('사이트링크')
+    if isinstance(link, str) and link.strip('/'):
+        parts = [part for part in link.rstrip('/').split('/')[-2:] if part]
+        return 'local-' + '-'.join(parts)
+    return f"local-{os.path.splitext(file_name)[0]}-{position}"
+
 def load_local_json_data():
     """
-    로컬 'data' 폴더의 JSON 파일들에서 데이터를 읽어와 리스트로 반환합니다.
+    `streamlit_Web/data` 폴더의 JSON 파일들에서 데이터를 읽어와 리스트로 반환합니다.
+    각 레코드에는 `_local_record_key`로 만든 `desertionNo`를 채웁니다.
     """
     all_data = []
-    data_dir = os.path.join(project_root, 'data')
+    data_dir = os.path.join(streamlit_web_dir, 'data')
     
     try:
         if os.path.exists(data_dir):
@@ -472,7 +671,8 @@ def load_local_json_data():
                     with open(file_path, 'r', encoding='utf-8') as f:
                         print(f"정보: 로컬 파일 '{file_name}'에서 데이터 로드 중...")
                         data = json.load(f)
-                        all_data.extend(data)
+                    for position, record in enumerate(data):
+                        all_data.append({**record, 'desertionNo': _local_record_key(record, file_name, position)})
                 else:
                     print(f"경고: 로컬 파일 '{file_name}'을 찾을 수 없습니다.")
         else:
@@ -484,35 +684,170 @@ def load_local_json_data():
     return all_data
 
 # --- 데이터 적재 (Load) 함수 ---
-def update_database(shelter_df, animal_df):
+def get_db_engine(allow_local_infile=False):
+    """
+    `config.ini`의 [DB](주 DB) 설정으로 SQLAlchemy 엔진을 생성합니다.
+    [DB_REPLICA]가 있어도 쓰기는 항상 주 DB로 보내며, 커넥션 풀 옵션은 `db_settings.py`에서 읽습니다.
+    `LOAD DATA LOCAL INFILE` 적재 방식을 사용할 때는 `allow_local_infile=True`로 호출합니다.
+    """
+    db_config = get_db_config()
+    connect_args = {"allow_local_infile": True} if allow_local_infile else {}
+    return create_db_engine(db_config, connect_args=connect_args)
+
+def save_snapshot(tables, data_version):
+    """
+    DB에 반영한 데이터를 앱이 바로 읽을 수 있는 Arrow 스냅샷으로도 저장합니다.
+    동물 테이블이 있으면 검색 색인도 같은 스냅샷 폴더에 만듭니다. 색인은 앱이 보는
+    데이터와 같도록 품종 코드를 한글 이름으로 바꾼(`utils.map_species_names`) 사본으로
+    만들며, 품종 목록을 받지 못하면 색인은 저장하지 않습니다. (앱이 읽을 때 직접 만듭니다.)
+    저장에 실패하면 기존 스냅샷을 모두 지워, 앱이 오래된 스냅샷 대신 DB에서 읽도록 합니다.
+    """
+    extra_writers = {}
+    if 'animals' in tables:
+        kind_map = fetch_kind_map(get_api_key())
+        if kind_map:
+            # 색인의 문서 번호는 스냅샷 동물 테이블의 행 위치와 같습니다.
+            indexed = tables['animals'].reset_index(drop=True)
+            indexed = indexed.assign(species=map_species_names(indexed['species'], kind_map))
+            extra_writers[SEARCH_INDEX_DIRNAME] = lambda path: SearchIndex.build(indexed).save(path)
+        else:
+            print("경고: 품종 목록을 가져오지 못해 검색 색인은 저장하지 않습니다. 앱이 데이터를 읽을 때 색인을 만듭니다.")
+    try:
+        path = write_snapshot(tables, data_version, extra_writers=extra_writers)
+        print(f"데이터 스냅샷을 저장했습니다: {path}")
+    except Exception as e:
+        print(f"경고: 데이터 스냅샷 저장 실패 ({e}). 앱은 DB에서 데이터를 읽습니다.")
+        clear_snapshots()
+
+def add_shelter_key(shelter_df):
+    """보호소의 키 컬럼 `shelter_key`(보호소 등록번호, 없으면 보호소명)를 추가한 사본을 반환합니다."""
+    shelter_df = shelter_df.copy()
+    care_reg_no = shelter_df['care_reg_no'] if 'care_reg_no' in shelter_df.columns else pd.Series(index=shelter_df.index, dtype=object)
+    shelter_df['shelter_key'] = care_reg_no.fillna(shelter_df['shelter_name'])
+    return shelter_df
+
+def update_database(shelter_df, animal_df, writer=DEFAULT_BULK_WRITER):
     """
     가공된 데이터프레임을 데이터베이스의 테이블에 저장합니다.
-    `if_exists='replace'` 옵션은 기존 테이블이 있다면 삭제하고 새로 만들기 때문에,
-    항상 최신 데이터만 유지됩니다.
+    새 데이터는 스테이징 테이블(`shelters_next`, `animals_next`)에 `writer` 방식으로
+    먼저 적재하고 인덱스를 만든 뒤, `RENAME TABLE` 한 번으로 운영 테이블과 교체합니다.
+    따라서 적재 도중에도 앱은 항상 완전한 테이블만 읽게 됩니다.
+    테이블은 증분 모드와 같은 형식(키 컬럼 + 관리용 컬럼)으로 만들어집니다.
     """
-    if shelter_df.empty and animal_df.empty:
+    if not shelter_df.empty:
+        shelter_df = add_shelter_key(shelter_df)
+    tables = {name: df for name, df in [('shelters', shelter_df), ('animals', animal_df)] if not df.empty}
+    if not tables:
         print("업데이트할 데이터가 없습니다.")
         return
         
     try:
-        db_config = get_db_config()
-        engine = create_engine(f"mysql+mysqlconnector://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}")
-        
-        with engine.connect() as conn:
-            # to_sql 메소드는 DataFrame을 SQL 테이블로 매우 편리하게 변환해줍니다.
-            if not shelter_df.empty:
-                shelter_df.to_sql('shelters', conn, if_exists='replace', index=False)
-                print(f"보호소 데이터 {len(shelter_df)}건이 'shelters' 테이블에 업데이트되었습니다.")
-            if not animal_df.empty:
-                animal_df.to_sql('animals', conn, if_exists='replace', index=False)
-                print(f"유기동물 데이터 {len(animal_df)}건이 'animals' 테이블에 업데이트되었습니다.")
+        engine = get_db_engine(allow_local_infile=(writer == 'load_data'))
+        data_version = swap_in_tables(engine, tables, writer=writer)
+
+        if 'shelters' in tables:
+            print(f"보호소 데이터 {len(shelter_df)}건이 'shelters' 테이블에 업데이트되었습니다.")
+        if 'animals' in tables:
+            print(f"유기동물 데이터 {len(animal_df)}건이 'animals' 테이블에 업데이트되었습니다.")
+        print(f"데이터 버전이 {data_version}(으)로 갱신되었습니다.")
+        save_snapshot(tables, data_version)
         
     except Exception as e:
         print(f"데이터베이스 오류: {e}")
 
+def get_incremental_window(engine, today=None):
+    """
+    증분 수집 기간 `(bgnde, endde)`를 YYYYMMDD 문자열로 반환합니다.
+    시작일은 마지막 성공 수집 종료일에서 `INCREMENTAL_LOOKBACK_DAYS`만큼 앞당겨,
+    최근 공고의 상태 변경(입양, 반환 등)도 다시 반영되도록 합니다.
+    """
+    today = today or datetime.now()
+    with engine.begin() as conn:
+        last_endde = get_watermark(conn, WATERMARK_JOB)
+
+    if last_endde:
+        bgnde = datetime.strptime(last_endde, '%Y%m%d') - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+        return bgnde.strftime('%Y%m%d'), today.strftime('%Y%m%d')
+    return INITIAL_BGNDE, today.strftime('%Y%m%d')
+
+def update_database_incremental(animal_df, shelter_api_df_raw, bgnde, endde, advance_watermark=True,
+                                animals_complete=True, shelters_complete=True):
+    """
+    수집 기간(`bgnde` ~ `endde`)의 동물 데이터와 전체 보호소 데이터를 증분 반영합니다.
+
+    1. 동물은 `desertion_no` 기준으로 새로 생기거나 바뀐 행만 반영하고, 수집 기간 안에서
+       사라진 동물은 닫힘으로 표시합니다.
+    2. 보호소 집계(보호 중, 장기 보호 등)는 DB의 전체 열린 동물을 기준으로 다시 계산한 뒤,
+       `shelter_key`(보호소 등록번호, 없으면 보호소명) 기준으로 반영합니다.
+    3. `advance_watermark`가 True이면 워터마크를 `endde`로 옮깁니다.
+    4. 반영 후의 전체 열린 행으로 앱용 스냅샷을 저장합니다.
+
+    `animals_complete`/`shelters_complete`가 False이면(일부 축종이나 페이지, 시/도 수집 실패)
+    받지 못한 행을 사라진 것으로 오인하지 않도록 닫힘 표시를 건너뛰고, 동물 수집이
+    불완전하면 워터마크도 옮기지 않습니다. (다음 실행에서 같은 기간을 다시 수집합니다.)
+    """
+    advance_watermark = advance_watermark and animals_complete
+    if not animals_complete:
+        print("경고: 유기동물 수집이 완전하지 않아 사라진 동물의 닫힘 표시와 워터마크 갱신을 건너뜁니다.")
+    if not shelters_complete:
+        print("경고: 보호소 수집이 완전하지 않아 사라진 보호소의 닫힘 표시를 건너뜁니다.")
+    try:
+        engine = get_db_engine()
+
+        # 1. 동물 데이터 반영
+        with engine.begin() as conn:
+            animal_stats = upsert_changed_rows(
+                conn, 'animals', animal_df, 'desertion_no',
+                close_scope_sql="happen_date BETWEEN :bgnde AND :endde",
+                close_scope_params={
+                    "bgnde": datetime.strptime(bgnde, '%Y%m%d'),
+                    "endde": datetime.strptime(endde, '%Y%m%d'),
+                },
+                close_vanished=animals_complete,
+            )
+            print(f"유기동물 증분 반영: {animal_stats}")
+            open_animals = pd.read_sql(text("SELECT * FROM animals WHERE is_closed = 0"), conn)
+
+        # 2. 보호소 집계 재계산 및 반영
+        open_animals = open_animals.drop(columns=BOOKKEEPING_COLUMNS, errors='ignore')
+        shelter_df, _ = preprocess_data(open_animals, shelter_api_df_raw)
+        if not shelter_df.empty:
+            shelter_df = add_shelter_key(shelter_df)
+            with engine.begin() as conn:
+                shelter_stats = upsert_changed_rows(conn, 'shelters', shelter_df, 'shelter_key',
+                                                    close_vanished=shelters_complete)
+            print(f"보호소 증분 반영: {shelter_stats}")
+
+        # 3. 데이터 버전 및 워터마크 갱신
+        with engine.begin() as conn:
+            data_version = bump_data_version(conn)
+            if advance_watermark:
+                set_watermark(conn, WATERMARK_JOB, endde)
+            open_shelters = pd.read_sql(text("SELECT * FROM shelters WHERE is_closed = 0"), conn)
+        print(f"데이터 버전이 {data_version}(으)로 갱신되었습니다.")
+        if advance_watermark:
+            print(f"워터마크를 {endde}(으)로 갱신했습니다.")
+
+        # 4. 앱용 스냅샷 저장
+        save_snapshot({'shelters': open_shelters, 'animals': open_animals}, data_version)
+
+    except Exception as e:
+        print(f"데이터베이스 오류: {e}")
+
 # --- 메인 실행 블록 ---
 if __name__ == "__main__":
-    print("데이터 수집 및 DB 업데이트를 시작합니다...")
+    parser = argparse.ArgumentParser(description="유기동물/보호소 데이터 수집 및 DB 업데이트")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full",
+                        help="full: 전체 테이블 교체, incremental: 마지막 성공 이후 기간만 수집하여 변경분만 반영")
+    parser.add_argument("--bgnde", help="수집 시작일(YYYYMMDD). 지정하면 워터마크 대신 사용합니다.")
+    parser.add_argument("--endde", help="수집 종료일(YYYYMMDD). 지정하면 워터마크 대신 사용합니다.")
+    parser.add_argument("--writer", choices=list(BULK_WRITERS), default=DEFAULT_BULK_WRITER,
+                        help="전체 모드에서 스테이징 테이블에 적재할 방식")
+    parser.add_argument("--skip-images", action="store_true",
+                        help="적재 후 동물 이미지를 미리 받지 않습니다. (앱이 백그라운드에서 받습니다)")
+    args = parser.parse_args()
+
+    print(f"데이터 수집 및 DB 업데이트를 시작합니다... (모드: {args.mode})")
     try:
         API_KEY = get_api_key()
         if not API_KEY or 'YOUR_API_KEY' in API_KEY:
@@ -521,41 +856,63 @@ if __name__ == "__main__":
         # 1. 로컬 JSON 데이터 로드
         local_animals_data = load_local_json_data()
 
+        # 수집 기간 설정
+        if args.mode == "incremental":
+            bgnde_str, endde_str = get_incremental_window(get_db_engine())
+        else:
+            # 전체 모드는 실제 데이터가 있는 과거 날짜로 고정
+            bgnde_str, endde_str = INITIAL_BGNDE, '20240531'
+        bgnde_str = args.bgnde or bgnde_str
+        endde_str = args.endde or endde_str
+
         # 2. 외부 API 데이터 수집
         all_animals_data_from_api = []
+        fetch_ok = False
         # API 키가 유효할 경우에만 API 데이터를 가져옵니다.
         if API_KEY and 'YOUR_API_KEY' not in API_KEY:
-            # 수집 기간 설정 (실제 데이터가 있는 과거 날짜로 고정)
-            bgnde_str = '20240501'
-            endde_str = '20240531'
-            animal_types = {'개': '417000', '고양이': '422400', '기타': '429900'}
-
-            for animal_name, animal_code in animal_types.items():
-                print(f"--- {animal_name} 데이터 수집 시작 (기간: {bgnde_str} ~ {endde_str}) ---")
-                items = fetch_abandoned_animals(API_KEY, bgnde_str, endde_str, upkind=animal_code)
-                if isinstance(items, list):
+            print(f"--- 유기동물 데이터 수집 시작 (기간: {bgnde_str} ~ {endde_str}, 축종 {len(ANIMAL_TYPES)}개 동시 수집) ---")
+            results = run_with_client(fetch_all_abandoned_animals_async, API_KEY, bgnde_str, endde_str)
+
+            # 모든 축종의 모든 페이지를 받았을 때만 True입니다.
+            fetch_ok = True
+            for animal_name, (items, complete) in results.items():
+                fetch_ok = fetch_ok and complete
+                if items is not None:
                     all_animals_data_from_api.extend(items)
-                    print(f"성공: {animal_name} 데이터 {len(items)}건 수집")
+                    print(f"{'성공' if complete else '일부 성공'}: {animal_name} 데이터 {len(items)}건 수집")
                 else:
                     print(f"경고: {animal_name} 데이터를 가져오지 못했습니다.")
 
         # 3. 동물 보호소 API 데이터 수집
         all_shelters_data = []
+        shelters_complete = False
         if API_KEY and 'YOUR_API_KEY' not in API_KEY:
             print("--- 보호소 데이터 수집 시작 ---")
-            all_shelters_data = fetch_shelters(API_KEY)
-            if isinstance(all_shelters_data, list):
-                print(f"성공: 보호소 데이터 {len(all_shelters_data)}건 수집")
-            else:
-                print("경고: 보호소 데이터를 가져오지 못했습니다.")
-                all_shelters_data = []
+            all_shelters_data, shelters_complete = fetch_shelters(API_KEY)
+            print(f"{'성공' if shelters_complete else '일부 성공'}: 보호소 데이터 {len(all_shelters_data)}건 수집")
 
         # 4. 로컬 데이터와 API 데이터 결합
         # 로컬 JSON 데이터의 키와 API 데이터의 키가 다르므로, Pandas를 사용하여 전처리 과정에서 통일시킬 것입니다.
         combined_animals_data = local_animals_data + all_animals_data_from_api
         
         # 5. 데이터 전처리 및 DB 업데이트
-        if combined_animals_data or all_shelters_data:
+        loaded_animals = pd.DataFrame()
+        if args.mode == "incremental":
+            if all_animals_data_from_api or all_shelters_data:
+                print("증분 데이터 전처리를 시작합니다...")
+                window_animals = preprocess_animals(pd.DataFrame(all_animals_data_from_api))
+
+                print("데이터베이스 증분 업데이트를 시작합니다...")
+                update_database_incremental(
+                    window_animals, pd.DataFrame(all_shelters_data), bgnde_str, endde_str,
+                    advance_watermark=not args.endde,
+                    animals_complete=fetch_ok,
+                    shelters_complete=shelters_complete,
+                )
+                loaded_animals = window_animals
+            else:
+                print("API에서 수집된 데이터가 없어 증분 업데이트를 건너뜁니다.")
+        elif combined_animals_data or all_shelters_data:
             raw_animal_df = pd.DataFrame(combined_animals_data)
             raw_shelter_api_df = pd.DataFrame(all_shelters_data)
 
@@ -564,13 +921,22 @@ if __name__ == "__main__":
                 shelters, animals = preprocess_data(raw_animal_df, raw_shelter_api_df)
 
                 print("데이터베이스 업데이트를 시작합니다...")
-                update_database(shelters, animals)
+                update_database(shelters, animals, writer=args.writer)
+                loaded_animals = animals
             else:
                 print("로컬 파일 및 API에서 수집된 동물 데이터가 없어 업데이트를 건너뜁니다.")
         else:
             print("수집할 데이터가 없어 업데이트를 건너뜁니다. API 키와 로컬 파일을 확인하세요.")
 
+        # 6. 앱이 바로 사용할 수 있도록 동물 이미지를 미리 받습니다.
+        if not args.skip_images and not loaded_animals.empty:
+            print("--- 동물 이미지 미리 받기 시작 ---")
+            print(f"이미지 미리 받기 결과: {prefetch_images(loaded_animals)}")
+
     except FileNotFoundError as e:
         print(e)
+    except RegionListError as e:
+        # 지역 목록 없이는 보호소를 수집할 수 없으므로, 빈 데이터로 적재하지 않고 실패로 끝냅니다.
+        raise SystemExit(f"오류: {e} 보호소 데이터를 수집할 수 없어 업데이트를 중단합니다.")
     except Exception as e:
-        print(f"예상치 못한 오류 발생: {e}")
\ No newline at end of file
+        print(f"예상치 못한 오류 발생: {e}")
@@ -14,10 +14,23 @@
 #
 # [예시]
 # - 날짜/시간 포맷팅 함수
+# - 동물 사진의 표시 경로를 고르는 함수 (`get_image_source`)
+# - 크기가 제한된 LRU 캐시 (`LRUCache`)
+# - 나이 문자열에서 출생 연도를 뽑는 함수 (`parse_birth_year`)
+# - 품종 코드를 한글 이름으로 바꾸는 함수 (`map_species_names`)
 # - 특정 문자열을 정제하는 함수
 # - 복잡한 계산을 수행하는 함수 등
 # ==============================================================================
 
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from image_prefetcher import IMAGE_PATH_COLUMNS
+from image_store import get_image_store
+
 def format_date(dt):
     """
     datetime 객체를 'YYYY-MM-DD' 형식의 문자열로 변환합니다.
@@ -30,6 +43,113 @@ def format_date(dt):
     """
     return dt.strftime("%Y-%m-%d")
 
+PLACEHOLDER_IMAGE_URL = 'https://via.placeholder.com/150?text=No+Image'
+
+def get_image_source(animal, variant='w150'):
+    """
+    동물 사진으로 보여줄 이미지 경로(또는 URL)를 반환합니다.
+    저장소에 받아 둔 이미지가 있으면 `variant` 크기의 파일을, 아직 받는 중이면
+    원본 `image_url`을, 둘 다 없으면 대체 이미지를 사용합니다.
+
+    Args:
+        animal (pd.Series | dict): `image_url`, `desertion_no`와 `load_data`가 채운
+            이미지 경로 컬럼(`image_w150_path` 등)을 담은 동물 정보
+        variant (str): 'original', 'w150', 'w300' 중 하나 (목록 화면은 썸네일 사용)
+
+    Returns:
+        str: `st.image`에 넘길 경로 또는 URL
+    """
+    image_path = animal.get(IMAGE_PATH_COLUMNS[variant])
+    if isinstance(image_path, str) and os.path.exists(image_path):
+        return image_path
+
+    image_url = animal.get('image_url')
+    if isinstance(image_url, str) and image_url:
+        # 앱이 데이터를 읽은 뒤 백그라운드 다운로드가 끝났을 수 있으므로 색인을 한 번 더 확인합니다.
+        desertion_no = str(animal.get('desertion_no'))
+        stored = get_image_store().lookup_many([desertion_no]).get(desertion_no)
+        if stored and os.path.exists(stored[variant]):
+            return stored[variant]
+        return image_url
+    return PLACEHOLDER_IMAGE_URL
+
+def parse_birth_year(age):
+    """
+    나이 정보(예: "2021(년생)")에서 네 자리 출생 연도를 뽑아 정수 Series로 반환합니다.
+    연도를 찾지 못한 행은 결측(<NA>)입니다.
+
+    Args:
+        age (pd.Series): 나이 컬럼
+
+    Returns:
+        pd.Series: `Int64` 타입의 출생 연도
+    """
+    years = age.astype('string').str.extract(r'(\d{4})', expand=False)
+    return pd.to_numeric(years, errors='coerce').astype('Int64')
+
+OTHER_SPECIES = '기타'
+
+def map_species_names(species, kind_map):
+    """
+    품종 코드(예: "000054")를 한글 이름으로 바꿉니다. 앱(`data_manager.py`)과
+    검색 색인을 만드는 적재 스크립트(`update_data.py`)가 같은 규칙을 쓰도록 여기에 둡니다.
+
+    Args:
+        species (pd.Series): 품종 코드 컬럼
+        kind_map (dict): 품종 코드 → 한글 이름 사전
+
+    Returns:
+        pd.Series: 품종 이름. 사전에 없는 코드와 결측은 `OTHER_SPECIES`('기타')입니다.
+    """
+    return species.map(kind_map).fillna(OTHER_SPECIES)
+
+class LRUCache:
+    """
+    크기가 제한된 LRU(Least Recently Used) 캐시입니다. 여러 스레드에서 함께 사용할 수 있으며,
+    적중/실패 횟수를 기록합니다.
+
+    Args:
+        maxsize (int): 보관할 최대 항목 수. 넘치면 가장 오래 사용하지 않은 항목부터 버립니다.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """`key`의 값이 있으면 반환하고, 없으면 `compute()`로 계산해 저장한 뒤 반환합니다."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        value = compute()  # 계산 중에는 잠금을 풀어 다른 키 조회를 막지 않습니다.
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def stats(self):
+        """`{'hits', 'misses', 'size', 'hit_rate'}` 형태의 통계를 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._items),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
 # 향후 추가될 수 있는 공통 함수 예시:
 #
 # def clean_text(text):